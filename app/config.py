@@ -1,15 +1,56 @@
 from pydantic_settings import BaseSettings
 
+from app.enums import DetectionEngine
+
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./reconciliation.db"
+    database_pool_size: int = 8
+    database_max_overflow: int = 8
+    sqlite_journal_mode: str | None = "WAL"
+    sqlite_synchronous: str | None = "FULL"
+    sqlite_mmap_size: int | None = 256 * 1024 * 1024
+    sqlite_cache_size: int | None = -64 * 1024
+    sqlite_temp_store: str | None = "MEMORY"
+    sqlite_busy_timeout_ms: int | None = 5000
     app_name: str = "OXXO Reconciliation Service"
     api_v1_prefix: str = "/api/v1"
     stuck_pending_threshold_hours: int = 72
     stuck_pending_high_threshold_hours: int = 120
+    stuck_timer_interval_seconds: int = 60
     amount_mismatch_tolerance: float = 0.01
     amount_mismatch_medium_threshold: float = 0.05
     amount_mismatch_high_threshold: float = 0.10
+    orphan_match_enabled: bool = True
+    orphan_match_amount_tolerance: float = 0.0
+    orphan_match_window_hours: int = 72
+    orphan_match_max_suggestions: int = 3
+    detection_engine: DetectionEngine = DetectionEngine.PYTHON
+    detection_stream_batch_size: int = 1000
+    detection_workers: int = 4
+    detection_lease_seconds: int = 600
+    detection_lease_wait_seconds: float = 30.0
+    detection_lease_poll_seconds: float = 0.5
+    detection_run_history_limit: int = 10000
+    detection_trace_memory: bool = False
+    ingest_stream_chunk_size: int = 1000
+    ingest_stream_max_errors: int = 100
+    ingest_stream_max_line_bytes: int = 1_048_576
+    ingest_group_commit: bool = False
+    ingest_group_commit_window_ms: int = 5
+    ingest_group_commit_max_rows: int = 1000
+    response_cache_max_entries: int = 256
+    issue_export_batch_size: int = 1000
+    batch_workers: int = 2
+    batch_lease_seconds: int = 300
+    batch_poll_interval_seconds: float = 1.0
+    batch_max_attempts: int = 3
+    batch_chunk_size: int = 500
+    batch_events_poll_seconds: float = 0.5
+    batch_job_ttl_seconds: int = 3600
+    batch_job_max_finished: int = 1000
+    batch_archive_ttl_seconds: int = 30 * 86400
+    batch_eviction_interval_seconds: int = 60
 
 
 settings = Settings()
@@ -1,9 +1,52 @@
-from sqlalchemy import create_engine
+from collections.abc import Iterator, Sequence
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from app.config import settings
 
-engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+# Keeps each IN (...) lookup well under SQLite's bound-parameter limit.
+LOOKUP_CHUNK_SIZE = 500
+
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    pragmas = {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "temp_store": settings.sqlite_temp_store,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+    }
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(database_url: str) -> Engine:
+    options = {}
+    if make_url(database_url).database not in (None, "", ":memory:"):
+        options = {
+            "pool_size": settings.database_pool_size,
+            "max_overflow": settings.database_max_overflow,
+            "pool_pre_ping": True,
+        }
+    db_engine = create_engine(
+        database_url, connect_args={"check_same_thread": False}, **options
+    )
+    event.listen(db_engine, "connect", apply_sqlite_pragmas)
+    return db_engine
+
+
+engine = create_db_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -21,3 +64,10 @@ def get_db() -> Session:
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA optimize")
+
+
+def chunked(items: Sequence, size: int = LOOKUP_CHUNK_SIZE) -> Iterator[Sequence]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
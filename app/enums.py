@@ -18,6 +18,15 @@ class IssueType(StrEnum):
     POST_EXPIRATION_PAYMENT = "POST_EXPIRATION_PAYMENT"
 
 
+class IssueTemplate(StrEnum):
+    ORPHANED_PAYMENT = "orphaned_payment"
+    STUCK_PENDING = "stuck_pending"
+    CURRENCY_MISMATCH = "currency_mismatch"
+    AMOUNT_MISMATCH = "amount_mismatch"
+    ZOMBIE_COMPLETION = "zombie_completion"
+    POST_EXPIRATION_PAYMENT = "post_expiration_payment"
+
+
 class Severity(StrEnum):
     LOW = "LOW"
     MEDIUM = "MEDIUM"
@@ -32,3 +41,47 @@ class PaymentMethod(StrEnum):
 class Currency(StrEnum):
     MXN = "MXN"
     COP = "COP"
+
+
+class DetectionEngine(StrEnum):
+    PYTHON = "python"
+    SQL = "sql"
+    STREAMING = "streaming"
+    PARALLEL = "parallel"
+
+
+class DetectionMode(StrEnum):
+    FULL = "full"
+    INCREMENTAL = "incremental"
+
+
+class DetectionRunStatus(StrEnum):
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class ExportFormat(StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+class LookupField(StrEnum):
+    VOUCHER = "voucher"
+    PAYMENT = "payment"
+    SETTLEMENT = "settlement"
+    ISSUES = "issues"
+
+
+class LifecycleStatus(StrEnum):
+    ORPHANED = "orphaned"
+    PARTIAL = "partial"
+    COMPLETE = "complete"
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
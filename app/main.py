@@ -5,12 +5,26 @@ from fastapi import FastAPI
 from app.config import settings
 from app.database import init_db
 from app.routers import batch, detection, ingestion, issues, transactions
+from app.services.batch import start_workers, stop_workers
+from app.services.lifecycle import ensure_lifecycle
+from app.services.migrations import migrate_schema
+from app.services.parallel_detection import shutdown_pool
+from app.services.scheduler import start_scheduler, stop_scheduler
+from app.services.write_coordinator import write_coordinator
 
 
 @asynccontextmanager
 async def lifespan(application: FastAPI):
+    migrate_schema()
     init_db()
+    ensure_lifecycle()
+    start_scheduler()
+    start_workers()
     yield
+    write_coordinator.stop()
+    stop_workers()
+    stop_scheduler()
+    shutdown_pool()
 
 
 app = FastAPI(title=settings.app_name, version="1.0.0", lifespan=lifespan)
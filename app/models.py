@@ -1,10 +1,24 @@
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import DateTime, Index, Numeric, String, Text
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    LargeBinary,
+    Numeric,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
+from app.rules.snapshots import to_minor_units
+from app.rules.templates import render_description, render_resolution
 
 
 class VoucherRecord(Base):
@@ -22,6 +36,10 @@ class VoucherRecord(Base):
     customer_name: Mapped[str | None] = mapped_column(String(200), nullable=True)
     store_id: Mapped[str | None] = mapped_column(String(50), nullable=True)
 
+    @property
+    def amount_minor(self) -> int:
+        return to_minor_units(self.amount)
+
 
 class PaymentConfirmation(Base):
     __tablename__ = "payment_confirmations"
@@ -36,6 +54,10 @@ class PaymentConfirmation(Base):
     paid_at: Mapped[datetime] = mapped_column(DateTime)
     store_id: Mapped[str | None] = mapped_column(String(50), nullable=True)
 
+    @property
+    def amount_minor(self) -> int:
+        return to_minor_units(self.amount)
+
 
 class SettlementRecord(Base):
     __tablename__ = "settlement_records"
@@ -48,6 +70,32 @@ class SettlementRecord(Base):
     source_system: Mapped[str] = mapped_column(String(50))
     settled_at: Mapped[datetime] = mapped_column(DateTime)
 
+    @property
+    def amount_minor(self) -> int:
+        return to_minor_units(self.amount)
+
+
+class TransactionLifecycle(Base):
+    __tablename__ = "transaction_lifecycle"
+
+    transaction_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    has_voucher: Mapped[bool] = mapped_column(Boolean, default=False)
+    has_payment: Mapped[bool] = mapped_column(Boolean, default=False)
+    has_settlement: Mapped[bool] = mapped_column(Boolean, default=False)
+    currency: Mapped[str | None] = mapped_column(String(3), nullable=True)
+    store_id: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    voucher_amount: Mapped[Decimal | None] = mapped_column(Numeric(14, 2), nullable=True)
+    payment_amount: Mapped[Decimal | None] = mapped_column(Numeric(14, 2), nullable=True)
+    settlement_amount: Mapped[Decimal | None] = mapped_column(Numeric(14, 2), nullable=True)
+    voucher_created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    paid_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    settled_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), index=True)
+
+    __table_args__ = (
+        Index("ix_lifecycle_unmatched_vouchers", "has_voucher", "has_payment"),
+    )
+
 
 class ReconciliationIssue(Base):
     __tablename__ = "reconciliation_issues"
@@ -57,12 +105,143 @@ class ReconciliationIssue(Base):
     issue_type: Mapped[str] = mapped_column(String(30), index=True)
     severity: Mapped[str] = mapped_column(String(10), index=True)
     detected_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    description: Mapped[str] = mapped_column(Text)
+    template: Mapped[str] = mapped_column(String(30))
+    params: Mapped[dict | None] = mapped_column(JSON(none_as_null=True), nullable=True)
     amount_at_risk: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
     payment_method: Mapped[str | None] = mapped_column(String(20), nullable=True, index=True)
     currency: Mapped[str | None] = mapped_column(String(3), nullable=True)
-    suggested_resolution: Mapped[str | None] = mapped_column(Text, nullable=True)
+    suggested_matches: Mapped[list | None] = mapped_column(
+        JSON(none_as_null=True), nullable=True
+    )
+    first_detected_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    @property
+    def description(self) -> str:
+        return render_description(
+            self.template, self.transaction_id, self.params, self.last_seen_at or self.detected_at
+        )
+
+    @property
+    def suggested_resolution(self) -> str:
+        return render_resolution(self.template, self.severity, self.suggested_matches)
 
     __table_args__ = (
         Index("ix_issues_type_severity", "issue_type", "severity"),
+        Index("ix_issues_detected_at_id", "detected_at", "id"),
+        UniqueConstraint("transaction_id", "issue_type", name="uq_issues_fingerprint"),
     )
+
+
+class StagedIssue(Base):
+    __tablename__ = "staged_issues"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    transaction_id: Mapped[str] = mapped_column(String(100))
+    issue_type: Mapped[str] = mapped_column(String(30))
+    severity: Mapped[str] = mapped_column(String(10))
+    detected_at: Mapped[datetime] = mapped_column(DateTime)
+    template: Mapped[str] = mapped_column(String(30))
+    params: Mapped[dict | None] = mapped_column(JSON(none_as_null=True), nullable=True)
+    amount_at_risk: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+    payment_method: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    currency: Mapped[str | None] = mapped_column(String(3), nullable=True)
+    suggested_matches: Mapped[list | None] = mapped_column(
+        JSON(none_as_null=True), nullable=True
+    )
+
+    __table_args__ = (
+        Index("ix_staged_issues_fingerprint", "transaction_id", "issue_type", unique=True),
+    )
+
+
+class StuckPendingTimer(Base):
+    __tablename__ = "stuck_pending_timers"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    transaction_id: Mapped[str] = mapped_column(String(100), index=True)
+    due_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+
+class DirtyTransaction(Base):
+    __tablename__ = "dirty_transactions"
+
+    transaction_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+
+class IssueRollup(Base):
+    __tablename__ = "issue_rollups"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    issue_type: Mapped[str] = mapped_column(String(30))
+    severity: Mapped[str] = mapped_column(String(10))
+    payment_method: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    currency: Mapped[str | None] = mapped_column(String(3), nullable=True)
+    issue_count: Mapped[int] = mapped_column(Integer, default=0)
+    amount_at_risk: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+
+
+class SummaryCounter(Base):
+    __tablename__ = "summary_counters"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class DetectionRun(Base):
+    __tablename__ = "detection_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    mode: Mapped[str] = mapped_column(String(20), index=True)
+    engine: Mapped[str] = mapped_column(String(20))
+    status: Mapped[str] = mapped_column(String(20), index=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime)
+    wall_ms: Mapped[float] = mapped_column(Float)
+    cpu_ms: Mapped[float] = mapped_column(Float)
+    rows_loaded: Mapped[dict] = mapped_column(JSON)
+    rule_timings: Mapped[dict] = mapped_column(JSON)
+    phase_timings: Mapped[dict] = mapped_column(JSON)
+    process_peak_rss_kb: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    peak_rss_growth_kb: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    peak_traced_kb: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    transactions_evaluated: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    issues_found: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    issues_by_type: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+
+
+class DetectionLease(Base):
+    __tablename__ = "detection_leases"
+
+    name: Mapped[str] = mapped_column(String(30), primary_key=True)
+    owner: Mapped[str | None] = mapped_column(String(80), nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class BatchJob(Base):
+    __tablename__ = "batch_jobs"
+
+    id: Mapped[str] = mapped_column(String(40), primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, index=True)
+    progress: Mapped[int] = mapped_column(Integer, default=0)
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    payload: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    summary: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    lease_owner: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_batch_jobs_claim", "status", "created_at"),)
+
+
+class BatchJobArchive(Base):
+    __tablename__ = "batch_job_archive"
+
+    id: Mapped[str] = mapped_column(String(40), primary_key=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    record: Mapped[bytes] = mapped_column(LargeBinary)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from app.enums import JobStatus
 from app.schemas import PaymentIn, SettlementIn, VoucherIn
-from app.services.batch import get_job, submit_batch
+from app.services.batch import cancel_job, get_job, job_events, submit_batch
 
 router = APIRouter(tags=["batch"])
 
@@ -30,3 +32,24 @@ def get_batch_status(job_id: str):
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return {"job_id": job_id, **job}
+
+
+@router.delete("/batch/{job_id}")
+def cancel_batch(job_id: str):
+    job = cancel_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != JobStatus.CANCELLED:
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    return {"job_id": job_id, **job}
+
+
+@router.get("/batch/{job_id}/events")
+def stream_batch_events(job_id: str, request: Request):
+    if not get_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_events(job_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
@@ -1,13 +1,30 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.schemas import DetectionRunResponse
-from app.services.detection import run_detection
+from app.enums import DetectionMode
+from app.schemas import DetectionRunHistory, DetectionRunResponse
+from app.services.detection_coordinator import DetectionBusy, detection_coordinator
+from app.services.run_history import list_runs
 
 router = APIRouter(tags=["detection"])
 
 
 @router.post("/detection/run", response_model=DetectionRunResponse)
-def run_detection_endpoint(db: Session = Depends(get_db)):
-    return run_detection(db)
+def run_detection_endpoint(
+    mode: DetectionMode = Query(DetectionMode.FULL, description="full or incremental"),
+    db: Session = Depends(get_db),
+):
+    try:
+        return detection_coordinator.run(db, mode)
+    except DetectionBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.get("/detection/runs", response_model=DetectionRunHistory)
+def list_detection_runs(
+    limit: int = Query(50, ge=1, le=1000),
+    mode: DetectionMode | None = Query(None, description="Only full or incremental runs"),
+    db: Session = Depends(get_db),
+):
+    return list_runs(db, limit=limit, mode=mode)
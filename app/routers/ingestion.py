@@ -1,23 +1,92 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import get_db
-from app.schemas import IngestionResponse, PaymentIn, SettlementIn, VoucherIn
-from app.services.ingestion import ingest_payments, ingest_settlements, ingest_vouchers
+from app.schemas import (
+    IngestionResponse,
+    PaymentIn,
+    SettlementIn,
+    StreamIngestionResponse,
+    VoucherIn,
+)
+from app.services.ingestion import (
+    ingest_ndjson,
+    ingest_payments,
+    ingest_settlements,
+    ingest_vouchers,
+    stage_payments,
+    stage_settlements,
+    stage_vouchers,
+)
+from app.services.write_coordinator import write_coordinator
 
 router = APIRouter(tags=["ingestion"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}},
+    }
+}
+
+
+def _require_ndjson(request: Request):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type != NDJSON_MEDIA_TYPE:
+        raise HTTPException(status_code=415, detail=f"Expected {NDJSON_MEDIA_TYPE} body")
+
 
 @router.post("/ingest/vouchers", response_model=IngestionResponse, status_code=201)
 def ingest_vouchers_endpoint(vouchers: list[VoucherIn], db: Session = Depends(get_db)):
+    if settings.ingest_group_commit:
+        return write_coordinator.submit(stage_vouchers, vouchers)
     return ingest_vouchers(db, vouchers)
 
 
 @router.post("/ingest/payments", response_model=IngestionResponse, status_code=201)
 def ingest_payments_endpoint(payments: list[PaymentIn], db: Session = Depends(get_db)):
+    if settings.ingest_group_commit:
+        return write_coordinator.submit(stage_payments, payments)
     return ingest_payments(db, payments)
 
 
 @router.post("/ingest/settlements", response_model=IngestionResponse, status_code=201)
 def ingest_settlements_endpoint(settlements: list[SettlementIn], db: Session = Depends(get_db)):
+    if settings.ingest_group_commit:
+        return write_coordinator.submit(stage_settlements, settlements)
     return ingest_settlements(db, settlements)
+
+
+@router.post(
+    "/ingest/vouchers/stream",
+    response_model=StreamIngestionResponse,
+    status_code=201,
+    openapi_extra=NDJSON_REQUEST_BODY,
+)
+async def ingest_vouchers_stream_endpoint(request: Request, db: Session = Depends(get_db)):
+    _require_ndjson(request)
+    return await ingest_ndjson(db, request.stream(), VoucherIn, ingest_vouchers)
+
+
+@router.post(
+    "/ingest/payments/stream",
+    response_model=StreamIngestionResponse,
+    status_code=201,
+    openapi_extra=NDJSON_REQUEST_BODY,
+)
+async def ingest_payments_stream_endpoint(request: Request, db: Session = Depends(get_db)):
+    _require_ndjson(request)
+    return await ingest_ndjson(db, request.stream(), PaymentIn, ingest_payments)
+
+
+@router.post(
+    "/ingest/settlements/stream",
+    response_model=StreamIngestionResponse,
+    status_code=201,
+    openapi_extra=NDJSON_REQUEST_BODY,
+)
+async def ingest_settlements_stream_endpoint(request: Request, db: Session = Depends(get_db)):
+    _require_ndjson(request)
+    return await ingest_ndjson(db, request.stream(), SettlementIn, ingest_settlements)
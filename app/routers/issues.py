@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.database import get_db
+from app.enums import ExportFormat
 from app.schemas import IssueSummary, PaginatedIssues
-from app.services.issues import get_summary, query_issues
+from app.services.issue_export import MEDIA_TYPES, export_issues, parquet_available
+from app.services.issues import get_summary, issue_filters, query_issues
+from app.services.response_cache import cached_json_response
 
 router = APIRouter(tags=["issues"])
 
 
 @router.get("/issues", response_model=PaginatedIssues)
 def list_issues(
+    request: Request,
     issue_type: str | None = Query(None, description="Filter by issue type"),
     severity: str | None = Query(None, description="Filter by severity"),
     payment_method: str | None = Query(None, description="Filter by payment method"),
@@ -18,21 +23,52 @@ def list_issues(
     date_to: str | None = Query(None, description="Filter issues detected before this date"),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Run a COUNT(*) for the total"),
     db: Session = Depends(get_db),
 ):
-    return query_issues(
-        db,
-        issue_type=issue_type,
-        severity=severity,
-        payment_method=payment_method,
-        currency=currency,
-        date_from=date_from,
-        date_to=date_to,
-        limit=limit,
-        offset=offset,
-    )
+    def render():
+        return query_issues(
+            db,
+            issue_type=issue_type,
+            severity=severity,
+            payment_method=payment_method,
+            currency=currency,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            include_total=include_total,
+        )
+
+    try:
+        return cached_json_response(request, db, render)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
 
 @router.get("/issues/summary", response_model=IssueSummary)
-def issues_summary(db: Session = Depends(get_db)):
-    return get_summary(db)
+def issues_summary(request: Request, db: Session = Depends(get_db)):
+    return cached_json_response(request, db, lambda: get_summary(db))
+
+
+@router.get("/issues/export")
+def export_issues_endpoint(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="ndjson, csv or parquet"),
+    issue_type: str | None = Query(None, description="Filter by issue type"),
+    severity: str | None = Query(None, description="Filter by severity"),
+    payment_method: str | None = Query(None, description="Filter by payment method"),
+    currency: str | None = Query(None, description="Filter by currency"),
+    date_from: str | None = Query(None, description="Filter issues detected after this date"),
+    date_to: str | None = Query(None, description="Filter issues detected before this date"),
+    db: Session = Depends(get_db),
+):
+    if format == ExportFormat.PARQUET and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    filters = issue_filters(issue_type, severity, payment_method, currency, date_from, date_to)
+    return StreamingResponse(
+        export_issues(db, format, filters),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="issues.{format}"'},
+    )
@@ -1,16 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.schemas import TransactionView
-from app.services.transactions import get_transaction_view
+from app.schemas import TransactionLookupRequest, TransactionLookupResponse, TransactionView
+from app.services.response_cache import cached_json_response
+from app.services.transactions import get_transaction_view, lookup_transactions
 
 router = APIRouter(tags=["transactions"])
 
 
 @router.get("/transactions/{transaction_id}", response_model=TransactionView)
-def get_transaction(transaction_id: str, db: Session = Depends(get_db)):
-    view = get_transaction_view(db, transaction_id)
-    if not view:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    return view
+def get_transaction(transaction_id: str, request: Request, db: Session = Depends(get_db)):
+    def render():
+        view = get_transaction_view(db, transaction_id)
+        if not view:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        return view
+
+    return cached_json_response(request, db, render)
+
+
+@router.post(
+    "/transactions/lookup",
+    response_model=TransactionLookupResponse,
+    response_model_exclude_unset=True,
+)
+def lookup_transactions_endpoint(
+    request: TransactionLookupRequest, db: Session = Depends(get_db)
+):
+    return lookup_transactions(db, request.transaction_ids, request.fields)
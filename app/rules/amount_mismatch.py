@@ -1,79 +1,78 @@
 from datetime import UTC, datetime
-from decimal import Decimal
 
 from app.config import settings
-from app.enums import IssueType, Severity
-from app.models import PaymentConfirmation, ReconciliationIssue, VoucherRecord
+from app.enums import IssueTemplate, IssueType, Severity
+from app.models import ReconciliationIssue
+from app.rules.snapshots import PaymentSnapshot, VoucherSnapshot, basis_points, from_minor_units
+
+
+def currency_mismatch_issue(
+    voucher: VoucherSnapshot, payment: PaymentSnapshot
+) -> ReconciliationIssue:
+    return ReconciliationIssue(
+        transaction_id=voucher.transaction_id,
+        issue_type=IssueType.AMOUNT_MISMATCH,
+        severity=Severity.HIGH,
+        detected_at=datetime.now(UTC).replace(tzinfo=None),
+        template=IssueTemplate.CURRENCY_MISMATCH,
+        params={"voucher_currency": voucher.currency, "payment_currency": payment.currency},
+        amount_at_risk=payment.amount,
+        payment_method=voucher.payment_method,
+        currency=voucher.currency,
+    )
+
+
+def amount_mismatch_issue(
+    voucher: VoucherSnapshot, payment: PaymentSnapshot, diff_minor: int, severity: Severity
+) -> ReconciliationIssue:
+    return ReconciliationIssue(
+        transaction_id=voucher.transaction_id,
+        issue_type=IssueType.AMOUNT_MISMATCH,
+        severity=severity,
+        detected_at=datetime.now(UTC).replace(tzinfo=None),
+        template=IssueTemplate.AMOUNT_MISMATCH,
+        params={
+            "voucher_amount": str(voucher.amount),
+            "voucher_currency": voucher.currency,
+            "payment_amount": str(payment.amount),
+            "payment_currency": payment.currency,
+            "difference_pct": round(diff_minor * 100 / abs(voucher.amount_minor), 2),
+        },
+        amount_at_risk=from_minor_units(diff_minor),
+        payment_method=voucher.payment_method,
+        currency=voucher.currency,
+    )
 
 
 def detect_amount_mismatch(
-    pairs: list[tuple[VoucherRecord, PaymentConfirmation]],
+    pairs: list[tuple[VoucherSnapshot, PaymentSnapshot]],
 ) -> list[ReconciliationIssue]:
     issues = []
-    tolerance = Decimal(str(settings.amount_mismatch_tolerance))
-    medium_threshold = Decimal(str(settings.amount_mismatch_medium_threshold))
-    high_threshold = Decimal(str(settings.amount_mismatch_high_threshold))
+    tolerance_bp = basis_points(settings.amount_mismatch_tolerance)
+    medium_bp = basis_points(settings.amount_mismatch_medium_threshold)
+    high_bp = basis_points(settings.amount_mismatch_high_threshold)
 
     for voucher, payment in pairs:
         if voucher.currency != payment.currency:
-            issues.append(
-                ReconciliationIssue(
-                    transaction_id=voucher.transaction_id,
-                    issue_type=IssueType.AMOUNT_MISMATCH,
-                    severity=Severity.HIGH,
-                    detected_at=datetime.now(UTC).replace(tzinfo=None),
-                    description=(
-                        f"Currency mismatch for transaction {voucher.transaction_id}: "
-                        f"voucher in {voucher.currency}, payment in {payment.currency}"
-                    ),
-                    amount_at_risk=payment.amount,
-                    payment_method=voucher.payment_method,
-                    currency=voucher.currency,
-                    suggested_resolution=(
-                        "Review currency configuration. This may indicate a system error "
-                        "where the payment was processed in the wrong currency."
-                    ),
-                )
-            )
+            issues.append(currency_mismatch_issue(voucher, payment))
             continue
 
-        if voucher.amount == Decimal("0"):
+        voucher_minor = abs(voucher.amount_minor)
+        if voucher_minor == 0:
             continue
 
-        diff = abs(voucher.amount - payment.amount)
-        pct = diff / abs(voucher.amount)
+        diff_minor = abs(voucher.amount_minor - payment.amount_minor)
+        scaled_diff = diff_minor * 10000
 
-        if pct <= tolerance:
+        if scaled_diff <= tolerance_bp * voucher_minor:
             continue
 
-        if pct > high_threshold:
+        if scaled_diff > high_bp * voucher_minor:
             severity = Severity.HIGH
-        elif pct > medium_threshold:
+        elif scaled_diff > medium_bp * voucher_minor:
             severity = Severity.MEDIUM
         else:
             severity = Severity.LOW
 
-        issues.append(
-            ReconciliationIssue(
-                transaction_id=voucher.transaction_id,
-                issue_type=IssueType.AMOUNT_MISMATCH,
-                severity=severity,
-                detected_at=datetime.now(UTC).replace(tzinfo=None),
-                description=(
-                    f"Amount mismatch for transaction {voucher.transaction_id}: "
-                    f"voucher={voucher.amount} {voucher.currency}, "
-                    f"payment={payment.amount} {payment.currency} "
-                    f"(difference: {pct * 100:.2f}%)"
-                ),
-                amount_at_risk=diff,
-                payment_method=voucher.payment_method,
-                currency=voucher.currency,
-                suggested_resolution=(
-                    "Auto-approve if under 1% tolerance threshold. "
-                    "For larger discrepancies, escalate to finance team for manual review."
-                    if severity == Severity.LOW
-                    else "Escalate to finance team for manual review and reconciliation."
-                ),
-            )
-        )
+        issues.append(amount_mismatch_issue(voucher, payment, diff_minor, severity))
     return issues
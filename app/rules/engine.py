@@ -0,0 +1,67 @@
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+from app.enums import IssueType, PaymentStatus
+from app.models import ReconciliationIssue
+from app.rules.amount_mismatch import detect_amount_mismatch
+from app.rules.orphaned import detect_orphaned_payments
+from app.rules.post_expiration import detect_post_expiration_payments
+from app.rules.profiling import timed_rule
+from app.rules.snapshots import PaymentSnapshot, SettlementSnapshot, VoucherSnapshot
+from app.rules.stuck_pending import detect_stuck_pending
+from app.rules.zombie import detect_zombie_completions
+
+
+def evaluate_rules(
+    payments: list[PaymentSnapshot],
+    vouchers: list[VoucherSnapshot],
+    settlements: list[SettlementSnapshot],
+    now: datetime,
+) -> list[ReconciliationIssue]:
+    voucher_ids = {v.transaction_id for v in vouchers}
+    confirmed_ids = {p.transaction_id for p in payments if p.status == PaymentStatus.CONFIRMED}
+    voucher_map = {v.transaction_id: v for v in vouchers}
+    pairs = [
+        (voucher_map[p.transaction_id], p)
+        for p in payments
+        if p.transaction_id in voucher_map
+    ]
+
+    all_issues = []
+    all_issues += timed_rule(
+        IssueType.ORPHANED_PAYMENT, detect_orphaned_payments, payments, voucher_ids
+    )
+    all_issues += timed_rule(
+        IssueType.STUCK_PENDING, detect_stuck_pending, vouchers, confirmed_ids, now
+    )
+    all_issues += timed_rule(IssueType.AMOUNT_MISMATCH, detect_amount_mismatch, pairs)
+    all_issues += timed_rule(
+        IssueType.ZOMBIE_COMPLETION,
+        detect_zombie_completions,
+        settlements,
+        confirmed_ids,
+        voucher_map,
+    )
+    all_issues += timed_rule(
+        IssueType.POST_EXPIRATION_PAYMENT, detect_post_expiration_payments, pairs
+    )
+    return all_issues
+
+
+def merge_by_transaction(
+    vouchers: Iterable[VoucherSnapshot],
+    payments: Iterable[PaymentSnapshot],
+    settlements: Iterable[SettlementSnapshot],
+) -> Iterator[tuple[VoucherSnapshot | None, PaymentSnapshot | None, SettlementSnapshot | None]]:
+    streams = [iter(vouchers), iter(payments), iter(settlements)]
+    heads = [next(stream, None) for stream in streams]
+    while any(head is not None for head in heads):
+        transaction_id = min(head.transaction_id for head in heads if head is not None)
+        row = []
+        for i, head in enumerate(heads):
+            if head is not None and head.transaction_id == transaction_id:
+                row.append(head)
+                heads[i] = next(streams[i], None)
+            else:
+                row.append(None)
+        yield tuple(row)
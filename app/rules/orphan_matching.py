@@ -0,0 +1,94 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.config import settings
+from app.rules.snapshots import from_minor_units, to_minor_units
+
+
+@dataclass(slots=True, frozen=True)
+class VoucherCandidate:
+    transaction_id: str
+    amount_minor: int
+    currency: str
+    store_id: str | None
+    created_at: datetime
+
+
+@dataclass(slots=True, frozen=True)
+class CandidateMatch:
+    transaction_id: str
+    amount_difference_minor: int
+    seconds_apart: int
+
+    def as_dict(self) -> dict:
+        return {
+            "transaction_id": self.transaction_id,
+            "amount_difference": str(from_minor_units(self.amount_difference_minor)),
+            "seconds_apart": self.seconds_apart,
+        }
+
+
+def _sort_key(candidate: VoucherCandidate) -> tuple[int, datetime]:
+    return candidate.amount_minor, candidate.created_at
+
+
+class CandidateIndex:
+    def __init__(self, vouchers: Iterable[VoucherCandidate]):
+        self._groups: dict[tuple[str, str | None], list[VoucherCandidate]] = {}
+        for voucher in vouchers:
+            self._groups.setdefault((voucher.currency, voucher.store_id), []).append(voucher)
+        for group in self._groups.values():
+            group.sort(key=_sort_key)
+
+    def __len__(self) -> int:
+        return sum(len(group) for group in self._groups.values())
+
+    def _within(
+        self,
+        group: list[VoucherCandidate],
+        amount_minor: int,
+        at: datetime,
+        amount_tolerance_minor: int,
+        window: timedelta,
+    ) -> Iterable[VoucherCandidate]:
+        max_amount = amount_minor + amount_tolerance_minor
+        position = bisect_left(
+            group, (amount_minor - amount_tolerance_minor, datetime.min), key=_sort_key
+        )
+        while position < len(group) and group[position].amount_minor <= max_amount:
+            amount = group[position].amount_minor
+            start = bisect_left(group, (amount, at - window), lo=position, key=_sort_key)
+            end = bisect_right(group, (amount, at + window), lo=start, key=_sort_key)
+            yield from group[start:end]
+            position = bisect_left(group, (amount + 1, datetime.min), lo=end, key=_sort_key)
+
+    def best_matches(
+        self,
+        currency: str,
+        store_id: str | None,
+        amount_minor: int,
+        at: datetime,
+    ) -> list[CandidateMatch]:
+        group = self._groups.get((currency, store_id))
+        if not group:
+            return []
+        tolerance = Decimal(str(settings.orphan_match_amount_tolerance))
+        amount_tolerance_minor = to_minor_units(tolerance)
+        window = timedelta(hours=settings.orphan_match_window_hours)
+        matches = (
+            CandidateMatch(
+                transaction_id=voucher.transaction_id,
+                amount_difference_minor=voucher.amount_minor - amount_minor,
+                seconds_apart=int(abs((at - voucher.created_at).total_seconds())),
+            )
+            for voucher in self._within(group, amount_minor, at, amount_tolerance_minor, window)
+        )
+        return heapq.nsmallest(
+            settings.orphan_match_max_suggestions,
+            matches,
+            key=lambda m: (abs(m.amount_difference_minor), m.seconds_apart, m.transaction_id),
+        )
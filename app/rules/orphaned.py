@@ -1,11 +1,12 @@
 from datetime import UTC, datetime
 
-from app.enums import IssueType, Severity
-from app.models import PaymentConfirmation, ReconciliationIssue
+from app.enums import IssueTemplate, IssueType, Severity
+from app.models import ReconciliationIssue
+from app.rules.snapshots import PaymentSnapshot
 
 
 def detect_orphaned_payments(
-    payments: list[PaymentConfirmation],
+    payments: list[PaymentSnapshot],
     voucher_ids: set[str],
 ) -> list[ReconciliationIssue]:
     issues = []
@@ -17,17 +18,10 @@ def detect_orphaned_payments(
                     issue_type=IssueType.ORPHANED_PAYMENT,
                     severity=Severity.HIGH,
                     detected_at=datetime.now(UTC).replace(tzinfo=None),
-                    description=(
-                        f"Payment confirmation exists for transaction {payment.transaction_id} "
-                        f"but no voucher record was found in the voucher system"
-                    ),
+                    template=IssueTemplate.ORPHANED_PAYMENT,
                     amount_at_risk=payment.amount,
                     payment_method=payment.payment_method,
                     currency=payment.currency,
-                    suggested_resolution=(
-                        "Investigate if the voucher was generated in a different system or if "
-                        "this is a fraudulent payment. Cross-reference with store POS records."
-                    ),
                 )
             )
     return issues
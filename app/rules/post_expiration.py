@@ -1,11 +1,31 @@
 from datetime import UTC, datetime
 
-from app.enums import IssueType, Severity
-from app.models import PaymentConfirmation, ReconciliationIssue, VoucherRecord
+from app.enums import IssueTemplate, IssueType, Severity
+from app.models import ReconciliationIssue
+from app.rules.snapshots import PaymentSnapshot, VoucherSnapshot
+
+
+def post_expiration_issue(
+    voucher: VoucherSnapshot, payment: PaymentSnapshot
+) -> ReconciliationIssue:
+    return ReconciliationIssue(
+        transaction_id=voucher.transaction_id,
+        issue_type=IssueType.POST_EXPIRATION_PAYMENT,
+        severity=Severity.HIGH,
+        detected_at=datetime.now(UTC).replace(tzinfo=None),
+        template=IssueTemplate.POST_EXPIRATION_PAYMENT,
+        params={
+            "paid_at": payment.paid_at.isoformat(),
+            "expires_at": voucher.expires_at.isoformat(),
+        },
+        amount_at_risk=payment.amount,
+        payment_method=voucher.payment_method,
+        currency=voucher.currency,
+    )
 
 
 def detect_post_expiration_payments(
-    pairs: list[tuple[VoucherRecord, PaymentConfirmation]],
+    pairs: list[tuple[VoucherSnapshot, PaymentSnapshot]],
 ) -> list[ReconciliationIssue]:
     issues = []
     for voucher, payment in pairs:
@@ -13,24 +33,5 @@ def detect_post_expiration_payments(
             continue
         if payment.paid_at <= voucher.expires_at:
             continue
-        issues.append(
-            ReconciliationIssue(
-                transaction_id=voucher.transaction_id,
-                issue_type=IssueType.POST_EXPIRATION_PAYMENT,
-                severity=Severity.HIGH,
-                detected_at=datetime.now(UTC).replace(tzinfo=None),
-                description=(
-                    f"Payment for transaction {voucher.transaction_id} was received at "
-                    f"{payment.paid_at.isoformat()} but the voucher expired at "
-                    f"{voucher.expires_at.isoformat()}"
-                ),
-                amount_at_risk=payment.amount,
-                payment_method=voucher.payment_method,
-                currency=voucher.currency,
-                suggested_resolution=(
-                    "Process a refund to the customer since the voucher had expired. "
-                    "Review store network for delayed payment transmissions."
-                ),
-            )
-        )
+        issues.append(post_expiration_issue(voucher, payment))
     return issues
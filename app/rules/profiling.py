@@ -0,0 +1,71 @@
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class RunProfile:
+    rules: dict[str, list[float]] = field(default_factory=dict)
+    phases: dict[str, list[float]] = field(default_factory=dict)
+    rows_loaded: dict[str, int] = field(default_factory=dict)
+
+    def add(self, group: dict[str, list[float]], name: str, wall: float, cpu: float):
+        totals = group.setdefault(name, [0.0, 0.0])
+        totals[0] += wall
+        totals[1] += cpu
+
+    def add_rows(self, source: str, count: int):
+        self.rows_loaded[source] = self.rows_loaded.get(source, 0) + count
+
+    def merge(self, other: "RunProfile"):
+        for mine, theirs in ((self.rules, other.rules), (self.phases, other.phases)):
+            for name, (wall, cpu) in theirs.items():
+                self.add(mine, name, wall, cpu)
+        for source, count in other.rows_loaded.items():
+            self.add_rows(source, count)
+
+
+_active: ContextVar[RunProfile | None] = ContextVar("detection_profile", default=None)
+
+
+def active_profile() -> RunProfile | None:
+    return _active.get()
+
+
+@contextmanager
+def profiling(profile: RunProfile) -> Iterator[RunProfile]:
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+
+
+def timed_rule(name: str, rule: Callable, *args):
+    profile = _active.get()
+    if profile is None:
+        return rule(*args)
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        return rule(*args)
+    finally:
+        profile.add(
+            profile.rules, name, time.perf_counter() - wall, time.thread_time() - cpu
+        )
+
+
+@contextmanager
+def timed_phase(name: str) -> Iterator[None]:
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        profile.add(
+            profile.phases, name, time.perf_counter() - wall, time.thread_time() - cpu
+        )
@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+MINOR_UNITS_PER_MAJOR = 100
+
+
+def to_minor_units(amount: Decimal) -> int:
+    return int((amount * MINOR_UNITS_PER_MAJOR).to_integral_value())
+
+
+def from_minor_units(amount_minor: int) -> Decimal:
+    return Decimal(amount_minor).scaleb(-2)
+
+
+def basis_points(ratio: float) -> int:
+    return round(ratio * 10000)
+
+
+@dataclass(slots=True, frozen=True)
+class VoucherSnapshot:
+    transaction_id: str
+    amount_minor: int
+    currency: str
+    payment_method: str
+    status: str
+    created_at: datetime
+    expires_at: datetime | None
+
+    @property
+    def amount(self) -> Decimal:
+        return from_minor_units(self.amount_minor)
+
+
+@dataclass(slots=True, frozen=True)
+class PaymentSnapshot:
+    transaction_id: str
+    amount_minor: int
+    currency: str
+    payment_method: str
+    status: str
+    paid_at: datetime
+
+    @property
+    def amount(self) -> Decimal:
+        return from_minor_units(self.amount_minor)
+
+
+@dataclass(slots=True, frozen=True)
+class SettlementSnapshot:
+    transaction_id: str
+    amount_minor: int
+    currency: str
+    status: str
+
+    @property
+    def amount(self) -> Decimal:
+        return from_minor_units(self.amount_minor)
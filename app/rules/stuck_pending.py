@@ -1,12 +1,13 @@
 from datetime import datetime
 
 from app.config import settings
-from app.enums import IssueType, PaymentStatus, Severity
-from app.models import ReconciliationIssue, VoucherRecord
+from app.enums import IssueTemplate, IssueType, PaymentStatus, Severity
+from app.models import ReconciliationIssue
+from app.rules.snapshots import VoucherSnapshot
 
 
 def detect_stuck_pending(
-    vouchers: list[VoucherRecord],
+    vouchers: list[VoucherSnapshot],
     confirmed_ids: set[str],
     now: datetime,
 ) -> list[ReconciliationIssue]:
@@ -33,17 +34,11 @@ def detect_stuck_pending(
                 issue_type=IssueType.STUCK_PENDING,
                 severity=severity,
                 detected_at=now,
-                description=(
-                    f"Voucher {voucher.transaction_id} has been in PENDING state for "
-                    f"{age_hours:.1f} hours without payment confirmation"
-                ),
+                template=IssueTemplate.STUCK_PENDING,
+                params={"created_at": voucher.created_at.isoformat()},
                 amount_at_risk=voucher.amount,
                 payment_method=voucher.payment_method,
                 currency=voucher.currency,
-                suggested_resolution=(
-                    "Send a payment reminder to the customer. If past expiration window, "
-                    "consider marking as EXPIRED and notifying the customer."
-                ),
             )
         )
     return issues
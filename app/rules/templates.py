@@ -0,0 +1,97 @@
+from datetime import datetime
+
+from app.enums import IssueTemplate, Severity
+
+DESCRIPTIONS = {
+    IssueTemplate.ORPHANED_PAYMENT: (
+        "Payment confirmation exists for transaction {transaction_id} "
+        "but no voucher record was found in the voucher system"
+    ),
+    IssueTemplate.STUCK_PENDING: (
+        "Voucher {transaction_id} has been in PENDING state for "
+        "{age_hours:.1f} hours without payment confirmation"
+    ),
+    IssueTemplate.CURRENCY_MISMATCH: (
+        "Currency mismatch for transaction {transaction_id}: "
+        "voucher in {voucher_currency}, payment in {payment_currency}"
+    ),
+    IssueTemplate.AMOUNT_MISMATCH: (
+        "Amount mismatch for transaction {transaction_id}: "
+        "voucher={voucher_amount} {voucher_currency}, "
+        "payment={payment_amount} {payment_currency} "
+        "(difference: {difference_pct:.2f}%)"
+    ),
+    IssueTemplate.ZOMBIE_COMPLETION: (
+        "Transaction {transaction_id} was marked COMPLETED "
+        "but never went through CONFIRMED state — "
+        "no payment confirmation record exists"
+    ),
+    IssueTemplate.POST_EXPIRATION_PAYMENT: (
+        "Payment for transaction {transaction_id} was received at "
+        "{paid_at} but the voucher expired at {expires_at}"
+    ),
+}
+
+ORPHANED_RESOLUTION = (
+    "Investigate if the voucher was generated in a different system or if "
+    "this is a fraudulent payment. Cross-reference with store POS records."
+)
+MATCHED_ORPHAN_RESOLUTION = (
+    "Likely the same payment as unmatched voucher {voucher_transaction_id} "
+    "(same store and currency, similar amount and time). Verify and correct "
+    "the transaction id; see suggested_matches for other candidates."
+)
+STUCK_PENDING_RESOLUTION = (
+    "Send a payment reminder to the customer. If past expiration window, "
+    "consider marking as EXPIRED and notifying the customer."
+)
+CURRENCY_MISMATCH_RESOLUTION = (
+    "Review currency configuration. This may indicate a system error "
+    "where the payment was processed in the wrong currency."
+)
+LOW_SEVERITY_RESOLUTION = (
+    "Auto-approve if under 1% tolerance threshold. "
+    "For larger discrepancies, escalate to finance team for manual review."
+)
+ESCALATION_RESOLUTION = "Escalate to finance team for manual review and reconciliation."
+ZOMBIE_RESOLUTION = (
+    "Verify if the payment was actually confirmed. "
+    "The settlement may have been processed without proper confirmation, "
+    "which could indicate a system bypass or data sync issue."
+)
+POST_EXPIRATION_RESOLUTION = (
+    "Process a refund to the customer since the voucher had expired. "
+    "Review store network for delayed payment transmissions."
+)
+
+RESOLUTIONS = {
+    IssueTemplate.ORPHANED_PAYMENT: ORPHANED_RESOLUTION,
+    IssueTemplate.STUCK_PENDING: STUCK_PENDING_RESOLUTION,
+    IssueTemplate.CURRENCY_MISMATCH: CURRENCY_MISMATCH_RESOLUTION,
+    IssueTemplate.AMOUNT_MISMATCH: ESCALATION_RESOLUTION,
+    IssueTemplate.ZOMBIE_COMPLETION: ZOMBIE_RESOLUTION,
+    IssueTemplate.POST_EXPIRATION_PAYMENT: POST_EXPIRATION_RESOLUTION,
+}
+
+
+def render_description(
+    template: str, transaction_id: str, params: dict | None, as_of: datetime | None = None
+) -> str:
+    values = dict(params or {})
+    # Issues written before created_at was stored keep their age until the next run.
+    if template == IssueTemplate.STUCK_PENDING and "created_at" in values:
+        age = as_of - datetime.fromisoformat(values["created_at"])
+        values["age_hours"] = age.total_seconds() / 3600
+    return DESCRIPTIONS[template].format(transaction_id=transaction_id, **values)
+
+
+def render_resolution(
+    template: str, severity: str, suggested_matches: list[dict] | None = None
+) -> str:
+    if template == IssueTemplate.ORPHANED_PAYMENT and suggested_matches:
+        return MATCHED_ORPHAN_RESOLUTION.format(
+            voucher_transaction_id=suggested_matches[0]["transaction_id"]
+        )
+    if template == IssueTemplate.AMOUNT_MISMATCH and severity == Severity.LOW:
+        return LOW_SEVERITY_RESOLUTION
+    return RESOLUTIONS[template]
@@ -1,13 +1,14 @@
 from datetime import UTC, datetime
 
-from app.enums import IssueType, PaymentStatus, Severity
-from app.models import ReconciliationIssue, SettlementRecord, VoucherRecord
+from app.enums import IssueTemplate, IssueType, PaymentStatus, Severity
+from app.models import ReconciliationIssue
+from app.rules.snapshots import SettlementSnapshot, VoucherSnapshot
 
 
 def detect_zombie_completions(
-    settlements: list[SettlementRecord],
+    settlements: list[SettlementSnapshot],
     confirmed_ids: set[str],
-    voucher_map: dict[str, VoucherRecord] | None = None,
+    voucher_map: dict[str, VoucherSnapshot] | None = None,
 ) -> list[ReconciliationIssue]:
     issues = []
     if voucher_map is None:
@@ -25,19 +26,10 @@ def detect_zombie_completions(
                 issue_type=IssueType.ZOMBIE_COMPLETION,
                 severity=Severity.HIGH,
                 detected_at=datetime.now(UTC).replace(tzinfo=None),
-                description=(
-                    f"Transaction {settlement.transaction_id} was marked COMPLETED "
-                    f"but never went through CONFIRMED state — "
-                    f"no payment confirmation record exists"
-                ),
+                template=IssueTemplate.ZOMBIE_COMPLETION,
                 amount_at_risk=settlement.amount,
                 payment_method=payment_method,
                 currency=settlement.currency,
-                suggested_resolution=(
-                    "Verify if the payment was actually confirmed. "
-                    "The settlement may have been processed without proper confirmation, "
-                    "which could indicate a system bypass or data sync issue."
-                ),
             )
         )
     return issues
@@ -3,6 +3,8 @@ from decimal import Decimal
 
 from pydantic import BaseModel, Field
 
+from app.enums import LookupField
+
 
 class VoucherIn(BaseModel):
     transaction_id: str
@@ -43,11 +45,27 @@ class IngestionResponse(BaseModel):
     duplicates: int
 
 
+class LineError(BaseModel):
+    line: int
+    error: str
+
+
+class StreamIngestionResponse(IngestionResponse):
+    invalid: int
+    errors: list[LineError]
+
+
 class SourceRecord(BaseModel):
     source_system: str
     data: dict
 
 
+class SuggestedMatch(BaseModel):
+    transaction_id: str
+    amount_difference: Decimal
+    seconds_apart: int
+
+
 class IssueResponse(BaseModel):
     id: int
     transaction_id: str
@@ -59,6 +77,9 @@ class IssueResponse(BaseModel):
     payment_method: str | None
     currency: str | None
     suggested_resolution: str | None = None
+    suggested_matches: list[SuggestedMatch] | None = None
+    first_detected_at: datetime | None = None
+    last_seen_at: datetime | None = None
 
 
 class TransactionView(BaseModel):
@@ -70,10 +91,71 @@ class TransactionView(BaseModel):
     status: str
 
 
+class TransactionLookupRequest(BaseModel):
+    transaction_ids: list[str] = Field(min_length=1, max_length=1000)
+    fields: list[LookupField] | None = None
+
+
+class TransactionLookupResponse(BaseModel):
+    items: list[TransactionView]
+    not_found: list[str]
+
+
 class DetectionRunResponse(BaseModel):
+    mode: str = "full"
+    transactions_evaluated: int | None = None
     previous_issues_cleared: int
     new_issues_found: int
     issues_by_type: dict[str, int]
+    issues_inserted: int = 0
+    issues_updated: int = 0
+    issues_unchanged: int = 0
+    issues_resolved: int = 0
+    run_id: int | None = None
+
+
+class Timing(BaseModel):
+    wall_ms: float
+    cpu_ms: float
+
+
+class DetectionRunRecord(BaseModel):
+    id: int
+    mode: str
+    engine: str
+    status: str
+    error: str | None
+    started_at: datetime
+    finished_at: datetime
+    wall_ms: float
+    cpu_ms: float
+    rows_loaded: dict[str, int]
+    rule_timings: dict[str, Timing]
+    phase_timings: dict[str, Timing]
+    process_peak_rss_kb: int | None
+    peak_rss_growth_kb: int | None
+    peak_traced_kb: int | None
+    transactions_evaluated: int | None
+    issues_found: int | None
+    issues_by_type: dict[str, int] | None
+
+
+class Percentiles(BaseModel):
+    p50: float
+    p95: float
+
+
+class DetectionRunTrends(BaseModel):
+    runs: int
+    failures: int = 0
+    wall_ms: Percentiles | None = None
+    rules: dict[str, Percentiles] = {}
+    phases: dict[str, Percentiles] = {}
+
+
+class DetectionRunHistory(BaseModel):
+    items: list[DetectionRunRecord]
+    trends: dict[str, DetectionRunTrends]
 
 
 class IssueSummary(BaseModel):
@@ -88,6 +170,7 @@ class IssueSummary(BaseModel):
 
 class PaginatedIssues(BaseModel):
     items: list[IssueResponse]
-    total: int
+    total: int | None
     limit: int
     offset: int
+    next_cursor: str | None = None
@@ -1,22 +1,50 @@
+import asyncio
+import json
+import logging
+import os
+import socket
 import threading
+import time
 import uuid
-from datetime import UTC, datetime
-from enum import StrEnum
+import zlib
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
 
-from app.database import SessionLocal
-from app.services.detection import run_detection
-from app.services.ingestion import ingest_payments, ingest_settlements, ingest_vouchers
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.config import settings
+from app.database import SessionLocal, chunked
+from app.enums import JobStatus
+from app.models import BatchJob, BatchJobArchive
 from app.schemas import PaymentIn, SettlementIn, VoucherIn
+from app.services.detection_coordinator import DetectionBusy, detection_coordinator
+from app.services.ingestion import stage_payments, stage_settlements, stage_vouchers
+
+logger = logging.getLogger(__name__)
+
+BATCH_SOURCES = (
+    ("vouchers", VoucherIn, stage_vouchers),
+    ("payments", PaymentIn, stage_payments),
+    ("settlements", SettlementIn, stage_settlements),
+)
+FINISHED_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+PROCESS_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
 
+class LeaseLost(Exception):
+    pass
 
-class JobStatus(StrEnum):
-    QUEUED = "queued"
-    PROCESSING = "processing"
-    COMPLETED = "completed"
-    FAILED = "failed"
 
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
 
-_jobs: dict[str, dict] = {}
+
+def _lease_expiry() -> datetime:
+    return _now() + timedelta(seconds=settings.batch_lease_seconds)
 
 
 def submit_batch(
@@ -25,63 +53,357 @@ def submit_batch(
     settlements: list[SettlementIn],
 ) -> str:
     job_id = f"batch-{uuid.uuid4().hex[:12]}"
-    _jobs[job_id] = {
-        "status": JobStatus.QUEUED,
-        "created_at": datetime.now(UTC).replace(tzinfo=None).isoformat(),
-        "progress": 0,
-        "total": len(vouchers) + len(payments) + len(settlements),
-        "summary": None,
-        "error": None,
-    }
+    with SessionLocal() as db:
+        db.add(
+            BatchJob(
+                id=job_id,
+                status=JobStatus.QUEUED,
+                created_at=_now(),
+                progress=0,
+                total=len(vouchers) + len(payments) + len(settlements),
+                payload={
+                    "vouchers": [v.model_dump(mode="json") for v in vouchers],
+                    "payments": [p.model_dump(mode="json") for p in payments],
+                    "settlements": [s.model_dump(mode="json") for s in settlements],
+                },
+            )
+        )
+        db.commit()
+    _pool.wake()
+    return job_id
 
-    thread = threading.Thread(
-        target=_process_batch,
-        args=(job_id, vouchers, payments, settlements),
-        daemon=True,
+
+def claim_job(db: Session, owner: str) -> BatchJob | None:
+    now = _now()
+    claimable = or_(
+        BatchJob.status == JobStatus.QUEUED,
+        and_(BatchJob.status == JobStatus.PROCESSING, BatchJob.lease_expires_at < now),
     )
-    thread.start()
-    return job_id
+    candidates = db.execute(
+        select(BatchJob.id, BatchJob.status, BatchJob.lease_owner)
+        .where(claimable)
+        .order_by(BatchJob.created_at)
+        .limit(settings.batch_workers + 1)
+    ).all()
+    for job_id, status, lease_owner in candidates:
+        claimed = db.execute(
+            update(BatchJob)
+            .where(
+                BatchJob.id == job_id,
+                BatchJob.status == status,
+                BatchJob.lease_owner.is_not_distinct_from(lease_owner),
+                claimable,
+            )
+            .values(
+                status=JobStatus.PROCESSING,
+                lease_owner=owner,
+                lease_expires_at=_lease_expiry(),
+                started_at=now,
+                attempts=BatchJob.attempts + 1,
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            job = db.get(BatchJob, job_id)
+            db.expunge(job)
+            return job
+    return None
 
 
-def _process_batch(
-    job_id: str,
-    vouchers: list[VoucherIn],
-    payments: list[PaymentIn],
-    settlements: list[SettlementIn],
-):
-    _jobs[job_id]["status"] = JobStatus.PROCESSING
+def _write_job(db: Session, job_id: str, owner: str, **values):
+    updated = db.execute(
+        update(BatchJob)
+        .where(
+            BatchJob.id == job_id,
+            BatchJob.lease_owner == owner,
+            BatchJob.status == JobStatus.PROCESSING,
+        )
+        .values(lease_expires_at=_lease_expiry(), **values)
+    ).rowcount
+    if not updated:
+        raise LeaseLost(job_id)
+
+
+def _update_job(job_id: str, owner: str, **values):
+    with SessionLocal() as db:
+        _write_job(db, job_id, owner, **values)
+        db.commit()
+
+
+def _finish_job(job_id: str, owner: str, status: JobStatus, **values):
+    _update_job(
+        job_id,
+        owner,
+        status=status,
+        finished_at=_now(),
+        lease_owner=None,
+        payload=None,
+        **values,
+    )
+
+
+def _fail_job(job_id: str, owner: str, error: str):
     try:
-        db = SessionLocal()
+        _finish_job(job_id, owner, JobStatus.FAILED, error=error)
+    except LeaseLost:
+        logger.warning("Batch job %s was cancelled or its lease was taken over", job_id)
+
+
+def _renew_until(job_id: str, owner: str, done: threading.Event):
+    interval = settings.batch_lease_seconds / 3
+    while not done.wait(interval):
         try:
-            v_result = ingest_vouchers(db, vouchers)
-            _jobs[job_id]["progress"] = len(vouchers)
+            _update_job(job_id, owner)
+        except LeaseLost:
+            logger.warning("Batch job %s was cancelled or its lease was taken over", job_id)
+            return
+        except Exception:
+            # Usually detection's write lock, which also blocks anyone reclaiming the job.
+            logger.warning("Renewing batch job %s lease failed", job_id, exc_info=True)
 
-            p_result = ingest_payments(db, payments)
-            _jobs[job_id]["progress"] += len(payments)
 
-            s_result = ingest_settlements(db, settlements)
-            _jobs[job_id]["progress"] += len(settlements)
+def _detect(db: Session, job_id: str, owner: str) -> dict:
+    done = threading.Event()
+    heartbeat = threading.Thread(
+        target=_renew_until, args=(job_id, owner, done), name="batch-lease", daemon=True
+    )
+    heartbeat.start()
+    try:
+        result = detection_coordinator.run(db)
+    except DetectionBusy as exc:
+        # The batch is committed and its transactions are dirty, so the next incremental
+        # run evaluates them.
+        return {"status": "pending", "reason": str(exc)}
+    finally:
+        done.set()
+        heartbeat.join()
+    return {
+        "status": "completed",
+        "issues_found": result.new_issues_found,
+        "issues_by_type": result.issues_by_type,
+    }
 
-            detection_result = run_detection(db)
 
-            _jobs[job_id]["status"] = JobStatus.COMPLETED
-            _jobs[job_id]["summary"] = {
-                "ingestion": {
-                    "vouchers": {"created": v_result.created, "duplicates": v_result.duplicates},
-                    "payments": {"created": p_result.created, "duplicates": p_result.duplicates},
-                    "settlements": {"created": s_result.created, "duplicates": s_result.duplicates},
-                },
-                "detection": {
-                    "issues_found": detection_result.new_issues_found,
-                    "issues_by_type": detection_result.issues_by_type,
-                },
-            }
-        finally:
-            db.close()
+def process_job(job: BatchJob, owner: str):
+    if job.attempts > settings.batch_max_attempts:
+        _fail_job(job.id, owner, "Exceeded maximum attempts")
+        return
+
+    ingestion = (job.summary or {}).get("ingestion") or {
+        name: {"created": 0, "duplicates": 0} for name, _, _ in BATCH_SOURCES
+    }
+    offset = 0
+    try:
+        with SessionLocal() as db:
+            for name, schema, stage in BATCH_SOURCES:
+                records = job.payload[name]
+                resume_at = max(job.progress - offset, 0)
+                for start in range(resume_at, len(records), settings.batch_chunk_size):
+                    chunk = records[start:start + settings.batch_chunk_size]
+                    result = stage(db, [schema(**record) for record in chunk])
+                    ingestion[name]["created"] += result.created
+                    ingestion[name]["duplicates"] += result.duplicates
+                    # Progress commits with the chunk, so a resumed job never re-ingests it.
+                    _write_job(
+                        db,
+                        job.id,
+                        owner,
+                        progress=offset + start + len(chunk),
+                        summary={"ingestion": ingestion},
+                    )
+                    db.commit()
+                offset += len(records)
+
+            _update_job(job.id, owner)
+            detection = _detect(db, job.id, owner)
+
+        _finish_job(
+            job.id,
+            owner,
+            JobStatus.COMPLETED,
+            summary={"ingestion": ingestion, "detection": detection},
+        )
+    except LeaseLost:
+        logger.warning("Batch job %s was cancelled or its lease was taken over", job.id)
     except Exception as e:
-        _jobs[job_id]["status"] = JobStatus.FAILED
-        _jobs[job_id]["error"] = str(e)
+        logger.exception("Batch job %s failed", job.id)
+        _fail_job(job.id, owner, str(e))
+
+
+def cancel_job(job_id: str) -> dict | None:
+    with SessionLocal() as db:
+        db.execute(
+            update(BatchJob)
+            .where(
+                BatchJob.id == job_id,
+                BatchJob.status.in_([JobStatus.QUEUED, JobStatus.PROCESSING]),
+            )
+            .values(
+                status=JobStatus.CANCELLED,
+                finished_at=_now(),
+                lease_owner=None,
+                lease_expires_at=None,
+                payload=None,
+            )
+        )
+        db.commit()
+        job = db.get(BatchJob, job_id)
+        return _job_dict(job) if job else None
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def job_events(job_id: str, request: Request) -> AsyncIterator[str]:
+    last = None
+    while not await request.is_disconnected():
+        job = await run_in_threadpool(get_job, job_id)
+        if job is None:
+            yield _sse("error", {"detail": "Job not found"})
+            return
+        if job != last:
+            finished = job["status"] in FINISHED_STATUSES
+            yield _sse(job["status"] if finished else "progress", {"job_id": job_id, **job})
+            if finished:
+                return
+            last = job
+        await asyncio.sleep(settings.batch_events_poll_seconds)
+
+
+def _job_dict(job: BatchJob) -> dict:
+    return {
+        "status": job.status,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "progress": job.progress,
+        "total": job.total,
+        "attempts": job.attempts,
+        "summary": job.summary,
+        "error": job.error,
+    }
 
 
 def get_job(job_id: str) -> dict | None:
-    return _jobs.get(job_id)
+    with SessionLocal() as db:
+        job = db.get(BatchJob, job_id)
+        if job:
+            return _job_dict(job)
+        archived = db.get(BatchJobArchive, job_id)
+        return json.loads(zlib.decompress(archived.record)) if archived else None
+
+
+def evict_jobs(db: Session, now: datetime | None = None) -> int:
+    now = now or _now()
+    finished = BatchJob.status.in_(FINISHED_STATUSES)
+    expired = select(BatchJob.id).where(
+        finished, BatchJob.finished_at < now - timedelta(seconds=settings.batch_job_ttl_seconds)
+    )
+    overflow = (
+        select(BatchJob.id)
+        .where(finished)
+        .order_by(BatchJob.finished_at.desc())
+        .offset(settings.batch_job_max_finished)
+    )
+    evicted_ids = list({*db.execute(expired).scalars(), *db.execute(overflow).scalars()})
+
+    for chunk in chunked(evicted_ids):
+        jobs = db.execute(select(BatchJob).where(BatchJob.id.in_(chunk))).scalars().all()
+        if settings.batch_archive_ttl_seconds > 0:
+            db.execute(
+                sqlite_insert(BatchJobArchive).on_conflict_do_nothing(),
+                [
+                    {
+                        "id": job.id,
+                        "finished_at": job.finished_at,
+                        "record": zlib.compress(json.dumps(_job_dict(job)).encode()),
+                    }
+                    for job in jobs
+                ],
+            )
+        db.execute(delete(BatchJob).where(BatchJob.id.in_(chunk)))
+
+    db.execute(
+        delete(BatchJobArchive).where(
+            BatchJobArchive.finished_at
+            < now - timedelta(seconds=settings.batch_archive_ttl_seconds)
+        )
+    )
+    db.commit()
+    return len(evicted_ids)
+
+
+class WorkerPool:
+    def __init__(self):
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._eviction_lock = threading.Lock()
+        self._next_eviction = 0.0
+
+    def _maybe_evict(self):
+        with self._eviction_lock:
+            if time.monotonic() < self._next_eviction:
+                return
+            self._next_eviction = time.monotonic() + settings.batch_eviction_interval_seconds
+        try:
+            with SessionLocal() as db:
+                evict_jobs(db)
+        except Exception:
+            logger.exception("Evicting finished batch jobs failed")
+
+    def _run(self, owner: str):
+        while not self._stop.is_set():
+            try:
+                with SessionLocal() as db:
+                    job = claim_job(db, owner)
+            except Exception:
+                logger.exception("Claiming batch job failed")
+                job = None
+            if job is None:
+                self._maybe_evict()
+                self._wake.wait(settings.batch_poll_interval_seconds)
+                self._wake.clear()
+                continue
+            try:
+                process_job(job, owner)
+            except Exception:
+                logger.exception("Processing batch job %s failed", job.id)
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._run,
+                args=(f"{PROCESS_ID}-{i}",),
+                name=f"batch-worker-{i}",
+                daemon=True,
+            )
+            for i in range(settings.batch_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+_pool = WorkerPool()
+
+
+def start_workers():
+    _pool.start()
+
+
+def stop_workers():
+    _pool.stop()
@@ -1,52 +1,199 @@
+import logging
+import time
+import tracemalloc
 from datetime import UTC, datetime
 
-from sqlalchemy import func, select
+from sqlalchemy import Select, delete, select
 from sqlalchemy.orm import Session
 
-from app.enums import PaymentStatus
-from app.models import PaymentConfirmation, ReconciliationIssue, SettlementRecord, VoucherRecord
-from app.rules.amount_mismatch import detect_amount_mismatch
-from app.rules.orphaned import detect_orphaned_payments
-from app.rules.post_expiration import detect_post_expiration_payments
-from app.rules.stuck_pending import detect_stuck_pending
-from app.rules.zombie import detect_zombie_completions
+from app.config import settings
+from app.database import chunked
+from app.enums import DetectionEngine, DetectionMode, DetectionRunStatus
+from app.models import (
+    DetectionRun,
+    DirtyTransaction,
+    PaymentConfirmation,
+    ReconciliationIssue,
+    SettlementRecord,
+    VoucherRecord,
+)
+from app.rules.engine import evaluate_rules, merge_by_transaction
+from app.rules.profiling import RunProfile, profiling, timed_phase
 from app.schemas import DetectionRunResponse
+from app.services.issue_store import (
+    clear_staged_issues,
+    count_issues,
+    merge_staged_issues,
+    stage_issues,
+)
+from app.services.orphan_matching import attach_orphan_matches
+from app.services.parallel_detection import stage_parallel_issues
+from app.services.response_cache import bump_generation
+from app.services.rollups import issue_totals, refresh_issue_rollups
+from app.services.run_history import profile_columns, record_run
+from app.services.snapshots import load_snapshots, stream_snapshots
+from app.services.sql_detection import stage_sql_issues
+from app.services.stuck_timers import (
+    fire_due_timers,
+    rebuild_stuck_timers,
+    refresh_changed_thresholds,
+)
 
+logger = logging.getLogger(__name__)
 
-def run_detection(db: Session) -> DetectionRunResponse:
-    previous_count = db.execute(select(func.count(ReconciliationIssue.id))).scalar() or 0
-    db.query(ReconciliationIssue).delete()
-
-    payments = db.execute(select(PaymentConfirmation)).scalars().all()
-    vouchers = db.execute(select(VoucherRecord)).scalars().all()
-    settlements = db.execute(select(SettlementRecord)).scalars().all()
-
-    voucher_ids = {v.transaction_id for v in vouchers}
-    confirmed_ids = {p.transaction_id for p in payments if p.status == PaymentStatus.CONFIRMED}
-    voucher_map = {v.transaction_id: v for v in vouchers}
-    pairs = [
-        (voucher_map[p.transaction_id], p)
-        for p in payments
-        if p.transaction_id in voucher_map
-    ]
-
-    now = datetime.now(UTC).replace(tzinfo=None)
-    all_issues = []
-    all_issues += detect_orphaned_payments(payments, voucher_ids)
-    all_issues += detect_stuck_pending(vouchers, confirmed_ids, now)
-    all_issues += detect_amount_mismatch(pairs)
-    all_issues += detect_zombie_completions(settlements, confirmed_ids, voucher_map)
-    all_issues += detect_post_expiration_payments(pairs)
-
-    db.bulk_save_objects(all_issues)
-    db.commit()
+
+def _run_python_rules(
+    db: Session, now: datetime, transaction_ids: list[str] | None
+) -> dict[str, int]:
+    with timed_phase("load_sources"):
+        payments = load_snapshots(db, PaymentConfirmation, transaction_ids)
+        vouchers = load_snapshots(db, VoucherRecord, transaction_ids)
+        settlements = load_snapshots(db, SettlementRecord, transaction_ids)
+
+    all_issues = evaluate_rules(payments, vouchers, settlements, now)
+    stage_issues(db, all_issues)
 
     issues_by_type: dict[str, int] = {}
     for issue in all_issues:
         issues_by_type[issue.issue_type] = issues_by_type.get(issue.issue_type, 0) + 1
+    return issues_by_type
+
+
+def _run_streaming_rules(db: Session, now: datetime, scope: Select | None) -> dict[str, int]:
+    issues_by_type: dict[str, int] = {}
+    buffer: list[ReconciliationIssue] = []
+    merged = merge_by_transaction(
+        stream_snapshots(db, VoucherRecord, scope),
+        stream_snapshots(db, PaymentConfirmation, scope),
+        stream_snapshots(db, SettlementRecord, scope),
+    )
+    for voucher, payment, settlement in merged:
+        issues = evaluate_rules(
+            [payment] if payment else [],
+            [voucher] if voucher else [],
+            [settlement] if settlement else [],
+            now,
+        )
+        for issue in issues:
+            issues_by_type[issue.issue_type] = issues_by_type.get(issue.issue_type, 0) + 1
+        buffer += issues
+        if len(buffer) >= settings.detection_stream_batch_size:
+            stage_issues(db, buffer)
+            buffer.clear()
+    stage_issues(db, buffer)
+    return issues_by_type
+
+
+def _peak_rss_kb() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _detect(db: Session, mode: DetectionMode, now: datetime) -> DetectionRunResponse:
+    clear_staged_issues(db)
+
+    if mode == DetectionMode.INCREMENTAL:
+        refresh_changed_thresholds(db, now)
+        fire_due_timers(db, now)
+        scope = select(DirtyTransaction.transaction_id)
+        transaction_ids = sorted(db.execute(scope).scalars())
+    else:
+        rebuild_stuck_timers(db, now)
+        scope = transaction_ids = None
+    previous_count = count_issues(db, scope)
+    totals_before = issue_totals(db, scope) if scope is not None else None
+
+    if settings.detection_engine == DetectionEngine.SQL:
+        issues_by_type = stage_sql_issues(db, now, scope)
+    elif settings.detection_engine == DetectionEngine.STREAMING:
+        issues_by_type = _run_streaming_rules(db, now, scope)
+    elif settings.detection_engine == DetectionEngine.PARALLEL:
+        issues_by_type = stage_parallel_issues(db, now, transaction_ids)
+    else:
+        issues_by_type = _run_python_rules(db, now, transaction_ids)
+    if settings.orphan_match_enabled:
+        with timed_phase("orphan_matching"):
+            attach_orphan_matches(db)
+    with timed_phase("merge_issues"):
+        diff = merge_staged_issues(db, now, scope)
+    with timed_phase("rollups"):
+        refresh_issue_rollups(db, scope, totals_before)
+
+    if transaction_ids is None:
+        db.query(DirtyTransaction).delete()
+    else:
+        for chunk in chunked(transaction_ids):
+            db.execute(delete(DirtyTransaction).where(DirtyTransaction.transaction_id.in_(chunk)))
+    # Matched issues get a new last_seen_at, which cached responses serialize.
+    if any(diff.values()):
+        bump_generation(db)
+    db.commit()
 
     return DetectionRunResponse(
+        mode=mode,
+        transactions_evaluated=len(transaction_ids) if transaction_ids is not None else None,
         previous_issues_cleared=previous_count,
-        new_issues_found=len(all_issues),
+        new_issues_found=sum(issues_by_type.values()),
         issues_by_type=issues_by_type,
+        issues_inserted=diff["inserted"],
+        issues_updated=diff["updated"],
+        issues_unchanged=diff["unchanged"],
+        issues_resolved=diff["resolved"],
     )
+
+
+def run_detection(
+    db: Session,
+    mode: DetectionMode = DetectionMode.FULL,
+    now: datetime | None = None,
+) -> DetectionRunResponse:
+    started_at = datetime.now(UTC).replace(tzinfo=None)
+    profile = RunProfile()
+    trace_memory = settings.detection_trace_memory and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
+    rss_before = _peak_rss_kb()
+    wall, cpu = time.perf_counter(), time.thread_time()
+    result: DetectionRunResponse | None = None
+    error = peak_traced_kb = None
+    try:
+        with profiling(profile):
+            result = _detect(db, mode, now or started_at)
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        db.rollback()
+        raise
+    finally:
+        if trace_memory:
+            peak_traced_kb = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+        rss_after = _peak_rss_kb()
+        run = DetectionRun(
+            mode=mode,
+            engine=settings.detection_engine,
+            status=DetectionRunStatus.FAILED if result is None else DetectionRunStatus.SUCCEEDED,
+            error=error,
+            started_at=started_at,
+            finished_at=datetime.now(UTC).replace(tzinfo=None),
+            wall_ms=round((time.perf_counter() - wall) * 1000, 3),
+            cpu_ms=round((time.thread_time() - cpu) * 1000, 3),
+            process_peak_rss_kb=rss_after,
+            peak_rss_growth_kb=rss_after - rss_before if rss_after is not None else None,
+            peak_traced_kb=peak_traced_kb,
+            transactions_evaluated=result.transactions_evaluated if result else None,
+            issues_found=result.new_issues_found if result else None,
+            issues_by_type=result.issues_by_type if result else None,
+            **profile_columns(profile),
+        )
+        # A failed history write must not mask the run's own outcome.
+        try:
+            run_id = record_run(db, run)
+        except Exception:
+            db.rollback()
+            logger.exception("Recording detection run failed")
+            run_id = None
+    result.run_id = run_id
+    return result
@@ -0,0 +1,174 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import Engine, or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.enums import DetectionMode
+from app.models import DetectionLease
+from app.schemas import DetectionRunResponse
+from app.services.detection import run_detection
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "detection"
+PROCESS_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+
+class DetectionBusy(Exception):
+    pass
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def acquire_lease(db: Session, owner: str) -> bool:
+    now = _now()
+    db.execute(
+        sqlite_insert(DetectionLease)
+        .values(name=LEASE_NAME, owner=None, expires_at=now)
+        .on_conflict_do_nothing()
+    )
+    acquired = db.execute(
+        update(DetectionLease)
+        .where(
+            DetectionLease.name == LEASE_NAME,
+            or_(DetectionLease.owner.is_(None), DetectionLease.expires_at < now),
+        )
+        .values(owner=owner, expires_at=now + timedelta(seconds=settings.detection_lease_seconds))
+    ).rowcount
+    db.commit()
+    return bool(acquired)
+
+
+def release_lease(db: Session, owner: str):
+    db.execute(
+        update(DetectionLease)
+        .where(DetectionLease.name == LEASE_NAME, DetectionLease.owner == owner)
+        .values(owner=None)
+    )
+    db.commit()
+
+
+def renew_lease(db: Session, owner: str) -> bool:
+    renewed = db.execute(
+        update(DetectionLease)
+        .where(DetectionLease.name == LEASE_NAME, DetectionLease.owner == owner)
+        .values(expires_at=_now() + timedelta(seconds=settings.detection_lease_seconds))
+    ).rowcount
+    db.commit()
+    return bool(renewed)
+
+
+def _renew_until(bind: Engine, owner: str, done: threading.Event):
+    interval = settings.detection_lease_seconds / 3
+    with Session(bind=bind) as db:
+        while not done.wait(interval):
+            try:
+                if not renew_lease(db, owner):
+                    logger.error("Detection lease %s was taken over during the run", owner)
+                    return
+            except Exception:
+                # Usually the run's own write lock; nobody else can take the lease meanwhile.
+                db.rollback()
+                logger.warning("Renewing detection lease %s failed", owner, exc_info=True)
+
+
+def _run_with_lease(db: Session, mode: DetectionMode) -> DetectionRunResponse:
+    owner = f"{PROCESS_ID}-{uuid.uuid4().hex[:8]}"
+    deadline = time.monotonic() + settings.detection_lease_wait_seconds
+    with Session(bind=db.get_bind()) as lease_db:
+        while not acquire_lease(lease_db, owner):
+            if time.monotonic() >= deadline:
+                raise DetectionBusy("Detection is already running in another process")
+            time.sleep(settings.detection_lease_poll_seconds)
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=_renew_until,
+            args=(db.get_bind(), owner, done),
+            name="detection-lease",
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            return run_detection(db, mode)
+        finally:
+            done.set()
+            heartbeat.join()
+            release_lease(lease_db, owner)
+
+
+@dataclass(slots=True)
+class _Flight:
+    mode: DetectionMode
+    future: Future = field(default_factory=Future)
+
+    def covers(self, mode: DetectionMode) -> bool:
+        return self.mode == DetectionMode.FULL or self.mode == mode
+
+
+class DetectionCoordinator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current: _Flight | None = None
+        self._follow_up: _Flight | None = None
+
+    def run(self, db: Session, mode: DetectionMode = DetectionMode.FULL) -> DetectionRunResponse:
+        with self._lock:
+            leader = self._current is None
+            if leader:
+                flight = self._current = _Flight(mode)
+            elif self._current.covers(mode):
+                flight = self._current
+            else:
+                if self._follow_up is None:
+                    self._follow_up = _Flight(mode)
+                elif mode == DetectionMode.FULL:
+                    self._follow_up.mode = DetectionMode.FULL
+                flight = self._follow_up
+        if leader:
+            self._fly(db, flight)
+        return flight.future.result()
+
+    def _fly(self, db: Session, flight: _Flight):
+        try:
+            result, error = _run_with_lease(db, flight.mode), None
+        except Exception as exc:
+            result, error = None, exc
+        with self._lock:
+            follow_up = self._current = self._follow_up
+            self._follow_up = None
+        if error is None:
+            flight.future.set_result(result)
+        else:
+            flight.future.set_exception(error)
+        if follow_up is not None:
+            threading.Thread(
+                target=self._fly_follow_up,
+                args=(db.get_bind(), follow_up),
+                name="detection-follow-up",
+                daemon=True,
+            ).start()
+
+    def _fly_follow_up(self, bind: Engine, flight: _Flight):
+        with Session(bind=bind) as db:
+            self._fly(db, flight)
+        if flight.future.exception() is not None:
+            logger.error("Follow-up detection run failed", exc_info=flight.future.exception())
+
+    def idle(self) -> bool:
+        with self._lock:
+            return self._current is None
+
+
+detection_coordinator = DetectionCoordinator()
@@ -1,58 +1,190 @@
-from sqlalchemy import select
+from collections.abc import AsyncIterable, Callable
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import Base, chunked
+from app.models import DirtyTransaction, PaymentConfirmation, SettlementRecord, VoucherRecord
+from app.schemas import (
+    IngestionResponse,
+    LineError,
+    PaymentIn,
+    SettlementIn,
+    StreamIngestionResponse,
+    VoucherIn,
+)
+from app.services.lifecycle import count_new_transactions, upsert_lifecycle
+from app.services.response_cache import bump_generation
+from app.services.rollups import record_new_transactions, summary_initialized
+from app.services.stuck_timers import cancel_stuck_timers, schedule_stuck_timers
+
+
+def existing_transaction_ids(
+    db: Session, model: type[Base], transaction_ids: list[str]
+) -> set[str]:
+    existing: set[str] = set()
+    for chunk in chunked(transaction_ids):
+        existing.update(
+            db.execute(
+                select(model.transaction_id).where(model.transaction_id.in_(chunk))
+            ).scalars()
+        )
+    return existing
+
+
+def mark_dirty(db: Session, transaction_ids: list[str]):
+    already_dirty = existing_transaction_ids(db, DirtyTransaction, transaction_ids)
+    new_ids = [txn_id for txn_id in transaction_ids if txn_id not in already_dirty]
+    if new_ids:
+        db.execute(insert(DirtyTransaction), [{"transaction_id": txn_id} for txn_id in new_ids])
+
+
+def _stage_records(
+    db: Session,
+    model: type[Base],
+    records: list,
+    after_insert: Callable[[Session, list[dict]], None] | None = None,
+) -> IngestionResponse:
+    rows_by_id: dict[str, dict] = {}
+    for record in records:
+        rows_by_id.setdefault(record.transaction_id, record.model_dump())
 
-from app.models import PaymentConfirmation, SettlementRecord, VoucherRecord
-from app.schemas import IngestionResponse, PaymentIn, SettlementIn, VoucherIn
+    existing = existing_transaction_ids(db, model, list(rows_by_id))
+    rows = [row for txn_id, row in rows_by_id.items() if txn_id not in existing]
+
+    if rows:
+        new_ids = [row["transaction_id"] for row in rows]
+        if summary_initialized(db):
+            record_new_transactions(db, count_new_transactions(db, new_ids))
+        db.execute(insert(model), rows)
+        upsert_lifecycle(db, model, rows)
+        mark_dirty(db, new_ids)
+        bump_generation(db)
+        if after_insert:
+            after_insert(db, rows)
+    return IngestionResponse(
+        received=len(records),
+        created=len(rows),
+        duplicates=len(records) - len(rows),
+    )
+
+
+def stage_vouchers(db: Session, vouchers: list[VoucherIn]) -> IngestionResponse:
+    return _stage_records(db, VoucherRecord, vouchers, schedule_stuck_timers)
+
+
+def stage_payments(db: Session, payments: list[PaymentIn]) -> IngestionResponse:
+    return _stage_records(db, PaymentConfirmation, payments, cancel_stuck_timers)
+
+
+def stage_settlements(db: Session, settlements: list[SettlementIn]) -> IngestionResponse:
+    return _stage_records(db, SettlementRecord, settlements)
 
 
 def ingest_vouchers(db: Session, vouchers: list[VoucherIn]) -> IngestionResponse:
-    created = 0
-    duplicates = 0
-    for v in vouchers:
-        existing = db.execute(
-            select(VoucherRecord).where(VoucherRecord.transaction_id == v.transaction_id)
-        ).scalar_one_or_none()
-        if existing:
-            duplicates += 1
-            continue
-        record = VoucherRecord(**v.model_dump())
-        db.add(record)
-        created += 1
+    result = stage_vouchers(db, vouchers)
     db.commit()
-    return IngestionResponse(received=len(vouchers), created=created, duplicates=duplicates)
+    return result
 
 
 def ingest_payments(db: Session, payments: list[PaymentIn]) -> IngestionResponse:
-    created = 0
-    duplicates = 0
-    for p in payments:
-        existing = db.execute(
-            select(PaymentConfirmation).where(
-                PaymentConfirmation.transaction_id == p.transaction_id
-            )
-        ).scalar_one_or_none()
-        if existing:
-            duplicates += 1
-            continue
-        record = PaymentConfirmation(**p.model_dump())
-        db.add(record)
-        created += 1
+    result = stage_payments(db, payments)
     db.commit()
-    return IngestionResponse(received=len(payments), created=created, duplicates=duplicates)
+    return result
 
 
 def ingest_settlements(db: Session, settlements: list[SettlementIn]) -> IngestionResponse:
-    created = 0
-    duplicates = 0
-    for s in settlements:
-        existing = db.execute(
-            select(SettlementRecord).where(SettlementRecord.transaction_id == s.transaction_id)
-        ).scalar_one_or_none()
-        if existing:
-            duplicates += 1
-            continue
-        record = SettlementRecord(**s.model_dump())
-        db.add(record)
-        created += 1
+    result = stage_settlements(db, settlements)
     db.commit()
-    return IngestionResponse(received=len(settlements), created=created, duplicates=duplicates)
+    return result
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'line'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+async def _ndjson_lines(chunks: AsyncIterable[bytes], max_length: int):
+    buffer = bytearray()
+    scanned = 0
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", max(start, scanned))) != -1:
+            if oversized:
+                oversized = False
+            elif end - start > max_length:
+                yield None
+            else:
+                yield bytes(buffer[start:end])
+            start = end + 1
+        del buffer[:start]
+        scanned = len(buffer)
+        if len(buffer) > max_length:
+            if not oversized:
+                oversized = True
+                yield None
+            buffer.clear()
+            scanned = 0
+    if buffer and not oversized:
+        yield bytes(buffer)
+
+
+async def ingest_ndjson(
+    db: Session,
+    chunks: AsyncIterable[bytes],
+    schema: type[BaseModel],
+    ingest: Callable[[Session, list], IngestionResponse],
+) -> StreamIngestionResponse:
+    received = created = duplicates = invalid = 0
+    errors: list[LineError] = []
+    batch: list[BaseModel] = []
+
+    async def flush():
+        nonlocal created, duplicates
+        result = await run_in_threadpool(ingest, db, batch)
+        created += result.created
+        duplicates += result.duplicates
+        batch.clear()
+
+    def reject(line_number: int, error: str):
+        nonlocal invalid
+        invalid += 1
+        if len(errors) < settings.ingest_stream_max_errors:
+            errors.append(LineError(line=line_number, error=error))
+
+    max_length = settings.ingest_stream_max_line_bytes
+    line_number = 0
+    async for line in _ndjson_lines(chunks, max_length):
+        line_number += 1
+        if line is None:
+            received += 1
+            reject(line_number, f"line: longer than {max_length} bytes")
+            continue
+        if not line.strip():
+            continue
+        received += 1
+        try:
+            batch.append(schema.model_validate_json(line))
+        except ValidationError as e:
+            reject(line_number, _format_validation_error(e))
+            continue
+        if len(batch) >= settings.ingest_stream_chunk_size:
+            await flush()
+
+    if batch:
+        await flush()
+
+    return StreamIngestionResponse(
+        received=received,
+        created=created,
+        duplicates=duplicates,
+        invalid=invalid,
+        errors=errors,
+    )
@@ -0,0 +1,154 @@
+import csv
+import io
+import json
+from collections.abc import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.enums import ExportFormat
+from app.models import ReconciliationIssue
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_COLUMNS = [
+    "id",
+    "transaction_id",
+    "issue_type",
+    "severity",
+    "detected_at",
+    "description",
+    "amount_at_risk",
+    "payment_method",
+    "currency",
+    "suggested_resolution",
+    "first_detected_at",
+    "last_seen_at",
+]
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def _batches(db: Session, filters: list) -> Iterator[list]:
+    issue = ReconciliationIssue
+    result = db.execute(
+        select(issue)
+        .where(*filters)
+        .order_by(issue.id)
+        .execution_options(yield_per=settings.issue_export_batch_size)
+    ).scalars()
+    for issues in result.partitions():
+        yield [tuple(getattr(i, column) for column in EXPORT_COLUMNS) for i in issues]
+
+
+def _text(value) -> str | None:
+    if value is None:
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _ndjson(batches: Iterator[list]) -> Iterator[bytes]:
+    for rows in batches:
+        yield "".join(
+            json.dumps(
+                {
+                    column: value if isinstance(value, int) else _text(value)
+                    for column, value in zip(EXPORT_COLUMNS, row)
+                }
+            )
+            + "\n"
+            for row in rows
+        ).encode()
+
+
+def _csv(batches: Iterator[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        writer.writerows([_text(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("transaction_id", pa.string()),
+            ("issue_type", pa.string()),
+            ("severity", pa.string()),
+            ("detected_at", pa.timestamp("us")),
+            ("description", pa.string()),
+            ("amount_at_risk", pa.decimal128(14, 2)),
+            ("payment_method", pa.string()),
+            ("currency", pa.string()),
+            ("suggested_resolution", pa.string()),
+            ("first_detected_at", pa.timestamp("us")),
+            ("last_seen_at", pa.timestamp("us")),
+        ]
+    )
+
+
+def _parquet(batches: Iterator[list]) -> Iterator[bytes]:
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+WRITERS = {
+    ExportFormat.NDJSON: _ndjson,
+    ExportFormat.CSV: _csv,
+    ExportFormat.PARQUET: _parquet,
+}
+
+
+def export_issues(db: Session, export_format: ExportFormat, filters: list) -> Iterator[bytes]:
+    return WRITERS[export_format](_batches(db, filters))
@@ -0,0 +1,125 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Select, delete, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import ReconciliationIssue, StagedIssue
+from app.rules.profiling import timed_phase
+
+ISSUE_COLUMNS = [
+    "transaction_id",
+    "issue_type",
+    "severity",
+    "detected_at",
+    "template",
+    "params",
+    "amount_at_risk",
+    "payment_method",
+    "currency",
+]
+MERGED_COLUMNS = [*ISSUE_COLUMNS, "suggested_matches"]
+CONTENT_COLUMNS = [
+    "severity",
+    "template",
+    "params",
+    "amount_at_risk",
+    "payment_method",
+    "currency",
+    "suggested_matches",
+]
+
+
+def issue_row(issue: ReconciliationIssue) -> dict:
+    return {column: getattr(issue, column) for column in ISSUE_COLUMNS}
+
+
+def stage_issue_rows(db: Session, rows: list[dict]):
+    if rows:
+        with timed_phase("stage_issues"):
+            db.execute(insert(StagedIssue), rows)
+
+
+def stage_issues(db: Session, issues: list[ReconciliationIssue]):
+    stage_issue_rows(db, [issue_row(issue) for issue in issues])
+
+
+def clear_staged_issues(db: Session):
+    db.execute(delete(StagedIssue))
+
+
+def _staged_match() -> Select:
+    return select(StagedIssue.id).where(
+        StagedIssue.transaction_id == ReconciliationIssue.transaction_id,
+        StagedIssue.issue_type == ReconciliationIssue.issue_type,
+    )
+
+
+def count_issues(db: Session, scope: Select | None = None) -> int:
+    query = select(func.count(ReconciliationIssue.id))
+    if scope is not None:
+        query = query.where(ReconciliationIssue.transaction_id.in_(scope))
+    return db.execute(query).scalar() or 0
+
+
+def merge_staged_issues(
+    db: Session, now: datetime, scope: Select | None = None
+) -> dict[str, int]:
+    issue, staged = ReconciliationIssue, StagedIssue
+
+    matched = db.execute(
+        update(issue)
+        .where(_staged_match().exists())
+        .values(last_seen_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    changed = _staged_match().where(
+        or_(
+            *(
+                getattr(staged, column).is_distinct_from(getattr(issue, column))
+                for column in CONTENT_COLUMNS
+            )
+        )
+    )
+    updated = db.execute(
+        update(issue)
+        .where(changed.exists())
+        .values(
+            detected_at=now,
+            **{
+                column: _staged_match().with_only_columns(getattr(staged, column)).scalar_subquery()
+                for column in CONTENT_COLUMNS
+            },
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    resolved_query = delete(issue).where(~_staged_match().exists())
+    if scope is not None:
+        resolved_query = resolved_query.where(issue.transaction_id.in_(scope))
+    resolved = db.execute(
+        resolved_query.execution_options(synchronize_session=False)
+    ).rowcount
+
+    existing = select(issue.id).where(
+        issue.transaction_id == staged.transaction_id,
+        issue.issue_type == staged.issue_type,
+    )
+    inserted = db.execute(
+        insert(issue).from_select(
+            MERGED_COLUMNS + ["first_detected_at", "last_seen_at"],
+            select(
+                *(getattr(staged, column) for column in MERGED_COLUMNS),
+                literal(now, DateTime),
+                literal(now, DateTime),
+            ).where(~existing.exists()),
+        )
+    ).rowcount
+
+    clear_staged_issues(db)
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": matched - updated,
+        "resolved": resolved,
+    }
@@ -1,54 +1,93 @@
+import base64
+import json
+from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import distinct, func, select
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
 
-from app.models import (
-    PaymentConfirmation,
-    ReconciliationIssue,
-    SettlementRecord,
-    VoucherRecord,
-)
+from app.models import ReconciliationIssue
 from app.schemas import IssueResponse, IssueSummary, PaginatedIssues
+from app.services.rollups import (
+    TRANSACTIONS,
+    TRANSACTIONS_WITH_ISSUES,
+    load_rollups,
+    read_counter,
+    rebuild_summary,
+    summary_initialized,
+)
 
 
-def query_issues(
-    db: Session,
+def encode_cursor(detected_at: datetime, issue_id: int) -> str:
+    payload = json.dumps([detected_at.isoformat(), issue_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        detected_at, issue_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(detected_at), int(issue_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def issue_filters(
     issue_type: str | None = None,
     severity: str | None = None,
     payment_method: str | None = None,
     currency: str | None = None,
     date_from: str | None = None,
     date_to: str | None = None,
-    limit: int = 50,
-    offset: int = 0,
-) -> PaginatedIssues:
-    query = select(ReconciliationIssue)
-    count_query = select(func.count(ReconciliationIssue.id))
-
+) -> list:
+    issue = ReconciliationIssue
+    filters = []
     if issue_type:
-        query = query.where(ReconciliationIssue.issue_type == issue_type)
-        count_query = count_query.where(ReconciliationIssue.issue_type == issue_type)
+        filters.append(issue.issue_type == issue_type)
     if severity:
-        query = query.where(ReconciliationIssue.severity == severity)
-        count_query = count_query.where(ReconciliationIssue.severity == severity)
+        filters.append(issue.severity == severity)
     if payment_method:
-        query = query.where(ReconciliationIssue.payment_method == payment_method)
-        count_query = count_query.where(ReconciliationIssue.payment_method == payment_method)
+        filters.append(issue.payment_method == payment_method)
     if currency:
-        query = query.where(ReconciliationIssue.currency == currency)
-        count_query = count_query.where(ReconciliationIssue.currency == currency)
+        filters.append(issue.currency == currency)
     if date_from:
-        query = query.where(ReconciliationIssue.detected_at >= date_from)
-        count_query = count_query.where(ReconciliationIssue.detected_at >= date_from)
+        filters.append(issue.detected_at >= date_from)
     if date_to:
-        query = query.where(ReconciliationIssue.detected_at <= date_to)
-        count_query = count_query.where(ReconciliationIssue.detected_at <= date_to)
+        filters.append(issue.detected_at <= date_to)
+    return filters
+
+
+def query_issues(
+    db: Session,
+    issue_type: str | None = None,
+    severity: str | None = None,
+    payment_method: str | None = None,
+    currency: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    limit: int = 50,
+    offset: int = 0,
+    cursor: str | None = None,
+    include_total: bool = True,
+) -> PaginatedIssues:
+    issue = ReconciliationIssue
+    filters = issue_filters(issue_type, severity, payment_method, currency, date_from, date_to)
 
-    total = db.execute(count_query).scalar()
-    rows = db.execute(
-        query.order_by(ReconciliationIssue.detected_at.desc()).offset(offset).limit(limit)
-    ).scalars().all()
+    total = None
+    if include_total:
+        total = db.execute(select(func.count(issue.id)).where(*filters)).scalar()
+
+    query = select(issue).where(*filters).order_by(issue.detected_at.desc(), issue.id.desc())
+    if cursor:
+        query = query.where(tuple_(issue.detected_at, issue.id) < tuple_(*decode_cursor(cursor)))
+    elif offset:
+        query = query.offset(offset)
+    rows = db.execute(query.limit(limit + 1)).scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].detected_at, rows[-1].id)
 
     items = [
         IssueResponse(
@@ -62,49 +101,35 @@ def query_issues(
             payment_method=r.payment_method,
             currency=r.currency,
             suggested_resolution=r.suggested_resolution,
+            suggested_matches=r.suggested_matches,
+            first_detected_at=r.first_detected_at,
+            last_seen_at=r.last_seen_at,
         )
         for r in rows
     ]
 
-    return PaginatedIssues(items=items, total=total, limit=limit, offset=offset)
+    return PaginatedIssues(
+        items=items, total=total, limit=limit, offset=offset, next_cursor=next_cursor
+    )
 
 
 def get_summary(db: Session) -> IssueSummary:
-    total_issues = db.execute(select(func.count(ReconciliationIssue.id))).scalar() or 0
-
-    type_counts = {}
-    rows = db.execute(
-        select(ReconciliationIssue.issue_type, func.count(ReconciliationIssue.id))
-        .group_by(ReconciliationIssue.issue_type)
-    ).all()
-    for issue_type, count in rows:
-        type_counts[issue_type] = count
-
-    severity_counts = {}
-    sev_rows = db.execute(
-        select(ReconciliationIssue.severity, func.count(ReconciliationIssue.id))
-        .group_by(ReconciliationIssue.severity)
-    ).all()
-    for severity, count in sev_rows:
-        severity_counts[severity] = count
-
-    total_at_risk = db.execute(
-        select(func.coalesce(func.sum(ReconciliationIssue.amount_at_risk), 0))
-    ).scalar()
-
-    voucher_count = db.execute(select(func.count(VoucherRecord.id))).scalar() or 0
-    payment_count = db.execute(select(func.count(PaymentConfirmation.id))).scalar() or 0
-    settlement_count = db.execute(select(func.count(SettlementRecord.id))).scalar() or 0
-
-    all_txn_ids = set()
-    for model in [VoucherRecord, PaymentConfirmation, SettlementRecord]:
-        ids = db.execute(select(model.transaction_id)).scalars().all()
-        all_txn_ids.update(ids)
-    total_transactions = len(all_txn_ids)
-
-    txn_with_issues = db.execute(
-        select(func.count(distinct(ReconciliationIssue.transaction_id)))
-    ).scalar() or 0
+    if not summary_initialized(db):
+        rebuild_summary(db)
+        db.commit()
+
+    type_counts: dict[str, int] = {}
+    severity_counts: dict[str, int] = {}
+    total_issues = 0
+    total_at_risk = Decimal("0")
+    for (issue_type, severity, _, _), (count, amount) in load_rollups(db).items():
+        type_counts[issue_type] = type_counts.get(issue_type, 0) + count
+        severity_counts[severity] = severity_counts.get(severity, 0) + count
+        total_issues += count
+        total_at_risk += amount
+
+    total_transactions = read_counter(db, TRANSACTIONS)
+    txn_with_issues = read_counter(db, TRANSACTIONS_WITH_ISSUES)
 
     issue_rate = (
         Decimal(str(txn_with_issues)) / Decimal(str(total_transactions)) * 100
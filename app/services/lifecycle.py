@@ -0,0 +1,113 @@
+from sqlalchemy import ColumnElement, and_, case, delete, func, not_, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.database import Base, SessionLocal, chunked
+from app.enums import LifecycleStatus
+from app.models import PaymentConfirmation, SettlementRecord, TransactionLifecycle, VoucherRecord
+
+LIFECYCLE_SOURCES: dict[type[Base], tuple[str, dict[str, str]]] = {
+    VoucherRecord: (
+        "has_voucher",
+        {"voucher_amount": "amount", "voucher_created_at": "created_at"},
+    ),
+    PaymentConfirmation: (
+        "has_payment",
+        {"payment_amount": "amount", "paid_at": "paid_at"},
+    ),
+    SettlementRecord: (
+        "has_settlement",
+        {"settlement_amount": "amount", "settled_at": "settled_at"},
+    ),
+}
+FLAGS = ("has_voucher", "has_payment", "has_settlement")
+
+
+def lifecycle_status(has_voucher: bool, has_payment: bool, has_settlement: bool) -> LifecycleStatus:
+    if has_payment and not has_voucher:
+        return LifecycleStatus.ORPHANED
+    if has_voucher and has_payment and has_settlement:
+        return LifecycleStatus.COMPLETE
+    return LifecycleStatus.PARTIAL
+
+
+def _status_expression(
+    has_voucher: ColumnElement, has_payment: ColumnElement, has_settlement: ColumnElement
+) -> ColumnElement:
+    return case(
+        (and_(has_payment, not_(has_voucher)), LifecycleStatus.ORPHANED.value),
+        (and_(has_voucher, has_payment, has_settlement), LifecycleStatus.COMPLETE.value),
+        else_=LifecycleStatus.PARTIAL.value,
+    )
+
+
+def upsert_lifecycle(db: Session, model: type[Base], rows: list[dict]):
+    if not rows:
+        return
+    flag, fields = LIFECYCLE_SOURCES[model]
+    lifecycle = TransactionLifecycle
+    status = lifecycle_status(**{name: name == flag for name in FLAGS})
+    values = [
+        {
+            "transaction_id": row["transaction_id"],
+            flag: True,
+            "currency": row["currency"],
+            "store_id": row.get("store_id"),
+            "status": status,
+            **{column: row[source] for column, source in fields.items()},
+        }
+        for row in rows
+    ]
+
+    statement = sqlite_insert(lifecycle)
+    flags = {name: getattr(lifecycle, name) for name in FLAGS} | {flag: true()}
+    # The voucher is the authoritative source for currency and store.
+    if model is VoucherRecord:
+        currency = statement.excluded.currency
+        store_id = func.coalesce(statement.excluded.store_id, lifecycle.store_id)
+    else:
+        currency = func.coalesce(lifecycle.currency, statement.excluded.currency)
+        store_id = func.coalesce(lifecycle.store_id, statement.excluded.store_id)
+    statement = statement.on_conflict_do_update(
+        index_elements=[lifecycle.transaction_id],
+        set_={
+            flag: True,
+            "currency": currency,
+            "store_id": store_id,
+            "status": _status_expression(**flags),
+            **{column: getattr(statement.excluded, column) for column in fields},
+        },
+    )
+    for chunk in chunked(values):
+        db.execute(statement, list(chunk))
+
+
+def count_new_transactions(db: Session, transaction_ids: list[str]) -> int:
+    known = 0
+    for chunk in chunked(transaction_ids):
+        known += db.execute(
+            select(func.count())
+            .select_from(TransactionLifecycle)
+            .where(TransactionLifecycle.transaction_id.in_(chunk))
+        ).scalar()
+    return len(transaction_ids) - known
+
+
+def rebuild_lifecycle(db: Session):
+    db.execute(delete(TransactionLifecycle))
+    for model in LIFECYCLE_SOURCES:
+        result = db.execute(select(*model.__table__.columns)).mappings()
+        for rows in result.partitions(1000):
+            upsert_lifecycle(db, model, [dict(row) for row in rows])
+
+
+def ensure_lifecycle():
+    with SessionLocal() as db:
+        if db.execute(select(TransactionLifecycle.transaction_id).limit(1)).first():
+            return
+        if not any(
+            db.execute(select(model.id).limit(1)).first() for model in LIFECYCLE_SOURCES
+        ):
+            return
+        rebuild_lifecycle(db)
+        db.commit()
@@ -0,0 +1,78 @@
+import logging
+
+from sqlalchemy import Connection, Engine, Table, delete, inspect
+
+from app.database import Base, engine
+from app.models import (
+    DetectionRun,
+    IssueRollup,
+    ReconciliationIssue,
+    StagedIssue,
+    SummaryCounter,
+)
+from app.services.rollups import TRANSACTIONS
+
+logger = logging.getLogger(__name__)
+
+# Issues and their rollups are derived from the source tables, so a full detection run can
+# repopulate them after they are recreated. Run history is diagnostic and can simply restart.
+DERIVED_TABLES = (ReconciliationIssue.__table__, StagedIssue.__table__, IssueRollup.__table__)
+DISPOSABLE_TABLES = (*DERIVED_TABLES, DetectionRun.__table__)
+
+
+class SchemaOutdated(RuntimeError):
+    pass
+
+
+def _is_outdated(connection: Connection, table: Table) -> bool:
+    columns = {column["name"]: column for column in inspect(connection).get_columns(table.name)}
+    if set(table.columns.keys()) - set(columns):
+        return True
+    return any(
+        not column["nullable"] and column["default"] is None
+        for name, column in columns.items()
+        if name not in table.columns
+    )
+
+
+def outdated_tables(connection: Connection) -> list[Table]:
+    existing = set(inspect(connection).get_table_names())
+    return [
+        table
+        for table in Base.metadata.sorted_tables
+        if table.name in existing and _is_outdated(connection, table)
+    ]
+
+
+def migrate_schema(bind: Engine = engine) -> list[str]:
+    with bind.begin() as connection:
+        outdated = outdated_tables(connection)
+        blocking = [table.name for table in outdated if table not in DISPOSABLE_TABLES]
+        if blocking:
+            raise SchemaOutdated(
+                f"Tables {', '.join(blocking)} do not match the current schema. "
+                "Back up and remove the database file, then re-ingest the source data."
+            )
+        if not outdated:
+            return []
+        rebuilt = list(outdated)
+        issues_rebuilt = any(table in DERIVED_TABLES for table in outdated)
+        if issues_rebuilt:
+            rebuilt += [
+                table
+                for table in DERIVED_TABLES
+                if table not in rebuilt and inspect(connection).has_table(table.name)
+            ]
+        for table in rebuilt:
+            table.drop(connection)
+        if issues_rebuilt and inspect(connection).has_table(SummaryCounter.__tablename__):
+            connection.execute(delete(SummaryCounter).where(SummaryCounter.name == TRANSACTIONS))
+    names = [table.name for table in rebuilt]
+    if issues_rebuilt:
+        logger.warning(
+            "Recreated %s for the current schema; run a full detection to repopulate issues",
+            ", ".join(names),
+        )
+    else:
+        logger.warning("Recreated %s for the current schema", ", ".join(names))
+    return names
@@ -0,0 +1,49 @@
+from itertools import starmap
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.enums import IssueType
+from app.models import PaymentConfirmation, StagedIssue, TransactionLifecycle
+from app.rules.orphan_matching import CandidateIndex, VoucherCandidate
+from app.services.snapshots import minor_units
+
+
+def load_unmatched_vouchers(db: Session) -> list[VoucherCandidate]:
+    lifecycle = TransactionLifecycle
+    query = select(
+        lifecycle.transaction_id,
+        minor_units(lifecycle.voucher_amount),
+        lifecycle.currency,
+        lifecycle.store_id,
+        lifecycle.voucher_created_at,
+    ).where(lifecycle.has_voucher.is_(True), lifecycle.has_payment.is_(False))
+    return list(starmap(VoucherCandidate, db.execute(query)))
+
+
+def attach_orphan_matches(db: Session) -> int:
+    orphans = db.execute(
+        select(
+            StagedIssue.id,
+            PaymentConfirmation.currency,
+            PaymentConfirmation.store_id,
+            minor_units(PaymentConfirmation.amount),
+            PaymentConfirmation.paid_at,
+        )
+        .join(PaymentConfirmation, PaymentConfirmation.transaction_id == StagedIssue.transaction_id)
+        .where(StagedIssue.issue_type == IssueType.ORPHANED_PAYMENT)
+    ).all()
+    if not orphans:
+        return 0
+
+    index = CandidateIndex(load_unmatched_vouchers(db))
+    updates = []
+    for staged_id, currency, store_id, amount_minor, paid_at in orphans:
+        matches = index.best_matches(currency, store_id, amount_minor, paid_at)
+        if matches:
+            updates.append(
+                {"id": staged_id, "suggested_matches": [match.as_dict() for match in matches]}
+            )
+    if updates:
+        db.execute(update(StagedIssue), updates)
+    return len(updates)
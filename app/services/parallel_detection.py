@@ -0,0 +1,132 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from sqlalchemy import ColumnElement, Engine, and_, func, select, true
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import Base, create_db_engine
+from app.models import PaymentConfirmation, SettlementRecord, TransactionLifecycle, VoucherRecord
+from app.rules.engine import evaluate_rules
+from app.rules.profiling import RunProfile, active_profile, profiling
+from app.services.issue_store import issue_row, stage_issue_rows
+from app.services.snapshots import load_snapshots
+
+Bounds = tuple[str | None, str | None]
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_worker_engine: tuple[str, Engine] | None = None
+
+
+def partition_bounds(db: Session, partitions: int) -> list[Bounds]:
+    lifecycle_id = TransactionLifecycle.transaction_id
+    total = db.execute(select(func.count(lifecycle_id))).scalar()
+    cuts: list[str] = []
+    for partition in range(1, partitions):
+        cut = db.execute(
+            select(lifecycle_id)
+            .order_by(lifecycle_id)
+            .offset(partition * total // partitions)
+            .limit(1)
+        ).scalar()
+        if cut is not None and (not cuts or cut > cuts[-1]):
+            cuts.append(cut)
+    edges = [None, *cuts, None]
+    return list(zip(edges, edges[1:]))
+
+
+def _in_range(model: type[Base], bounds: Bounds) -> ColumnElement[bool]:
+    low, high = bounds
+    return and_(
+        model.transaction_id >= low if low is not None else true(),
+        model.transaction_id < high if high is not None else true(),
+    )
+
+
+def _engine_for(database_url: str) -> Engine:
+    global _worker_engine
+    if _worker_engine is None or _worker_engine[0] != database_url:
+        if _worker_engine is not None:
+            _worker_engine[1].dispose()
+        _worker_engine = (database_url, create_db_engine(database_url))
+    return _worker_engine[1]
+
+
+def _evaluate_partition(
+    database_url: str,
+    settings_values: dict,
+    now: datetime,
+    bounds: Bounds | None,
+    transaction_ids: list[str] | None,
+) -> tuple[list[dict], RunProfile]:
+    for name, value in settings_values.items():
+        setattr(settings, name, value)
+
+    with Session(_engine_for(database_url)) as db, profiling(RunProfile()) as profile:
+        snapshots = []
+        for model in (PaymentConfirmation, VoucherRecord, SettlementRecord):
+            in_range = _in_range(model, bounds) if bounds is not None else None
+            snapshots.append(load_snapshots(db, model, transaction_ids, in_range))
+        issues = evaluate_rules(*snapshots, now)
+    return [issue_row(issue) for issue in issues], profile
+
+
+def _worker_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def stage_parallel_issues(
+    db: Session, now: datetime, transaction_ids: list[str] | None
+) -> dict[str, int]:
+    partitions = max(settings.detection_workers, 1)
+    if transaction_ids is None:
+        jobs = [(bounds, None) for bounds in partition_bounds(db, partitions)]
+    else:
+        size = -(-len(transaction_ids) // partitions)
+        jobs = [
+            (None, transaction_ids[start:start + size])
+            for start in range(0, len(transaction_ids), max(size, 1))
+        ]
+
+    database_url = db.get_bind().engine.url.render_as_string(hide_password=False)
+    settings_values = settings.model_dump()
+    issues_by_type: dict[str, int] = {}
+    pool = _worker_pool(partitions)
+    try:
+        futures = [
+            pool.submit(_evaluate_partition, database_url, settings_values, now, bounds, ids)
+            for bounds, ids in jobs
+        ]
+        for future in as_completed(futures):
+            rows, partition_profile = future.result()
+            if profile := active_profile():
+                profile.merge(partition_profile)
+            stage_issue_rows(db, rows)
+            for row in rows:
+                issues_by_type[row["issue_type"]] = issues_by_type.get(row["issue_type"], 0) + 1
+    except BrokenProcessPool:
+        shutdown_pool()
+        raise
+    return issues_by_type
@@ -0,0 +1,96 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+from pydantic import BaseModel
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.config import settings
+from app.models import SummaryCounter
+from app.services.rollups import read_counter
+
+GENERATION = "generation"
+
+
+def current_generation(db: Session) -> int:
+    return read_counter(db, GENERATION)
+
+
+def bump_generation(db: Session):
+    bumped = db.execute(
+        update(SummaryCounter)
+        .where(SummaryCounter.name == GENERATION)
+        .values(value=SummaryCounter.value + 1)
+    ).rowcount
+    if not bumped:
+        db.execute(insert(SummaryCounter).values(name=GENERATION, value=1))
+
+
+class ResponseCache:
+    def __init__(self):
+        self._entries: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> bytes | None:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Hashable, body: bytes):
+        if settings.response_cache_max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.response_cache_max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
+
+
+def _etag(key: tuple) -> str:
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return f'"{key[-1]}-{digest}"'
+
+
+def _if_none_match(request: Request) -> set[str]:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def cached_json_response(
+    request: Request, db: Session, render: Callable[[], BaseModel]
+) -> Response:
+    key = (
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        current_generation(db),
+    )
+    etag = _etag(key)
+    candidates = _if_none_match(request)
+    if etag in candidates:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    body = response_cache.get(key)
+    if body is None:
+        body = render().model_dump_json().encode()
+        response_cache.put(key, body)
+    if "*" in candidates:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
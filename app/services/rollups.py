@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+from sqlalchemy import Select, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models import IssueRollup, ReconciliationIssue, SummaryCounter, TransactionLifecycle
+
+ROLLUP_KEYS = ("issue_type", "severity", "payment_method", "currency")
+TRANSACTIONS = "transactions"
+TRANSACTIONS_WITH_ISSUES = "transactions_with_issues"
+
+RollupKey = tuple[str, str, str | None, str | None]
+
+
+@dataclass(slots=True, frozen=True)
+class IssueTotals:
+    groups: dict[RollupKey, tuple[int, Decimal]]
+    transactions: int
+
+
+def summary_initialized(db: Session) -> bool:
+    return db.get(SummaryCounter, TRANSACTIONS) is not None
+
+
+def read_counter(db: Session, name: str) -> int:
+    return db.execute(select(SummaryCounter.value).where(SummaryCounter.name == name)).scalar() or 0
+
+
+def write_counter(db: Session, name: str, value: int):
+    db.execute(delete(SummaryCounter).where(SummaryCounter.name == name))
+    db.execute(insert(SummaryCounter).values(name=name, value=value))
+
+
+def _add_to_counter(db: Session, name: str, delta: int):
+    if delta:
+        db.execute(
+            update(SummaryCounter)
+            .where(SummaryCounter.name == name)
+            .values(value=SummaryCounter.value + delta)
+        )
+
+
+def record_new_transactions(db: Session, count: int):
+    _add_to_counter(db, TRANSACTIONS, count)
+
+
+def issue_totals(db: Session, scope: Select | None = None) -> IssueTotals:
+    issue = ReconciliationIssue
+    keys = [getattr(issue, key) for key in ROLLUP_KEYS]
+    grouped = select(*keys, func.count(issue.id), func.sum(issue.amount_at_risk)).group_by(*keys)
+    distinct = select(func.count(func.distinct(issue.transaction_id)))
+    if scope is not None:
+        grouped = grouped.where(issue.transaction_id.in_(scope))
+        distinct = distinct.where(issue.transaction_id.in_(scope))
+    groups = {
+        tuple(row[:4]): (row[4], Decimal(str(row[5] or 0)).quantize(Decimal("0.01")))
+        for row in db.execute(grouped)
+    }
+    return IssueTotals(groups, db.execute(distinct).scalar() or 0)
+
+
+def _write_rollups(db: Session, groups: dict[RollupKey, tuple[int, Decimal]]):
+    db.execute(delete(IssueRollup))
+    rows = [
+        {**dict(zip(ROLLUP_KEYS, key)), "issue_count": count, "amount_at_risk": amount}
+        for key, (count, amount) in groups.items()
+        if count
+    ]
+    if rows:
+        db.execute(insert(IssueRollup), rows)
+
+
+def load_rollups(db: Session) -> dict[RollupKey, tuple[int, Decimal]]:
+    return {
+        (r.issue_type, r.severity, r.payment_method, r.currency): (r.issue_count, r.amount_at_risk)
+        for r in db.execute(select(IssueRollup)).scalars()
+    }
+
+
+def rebuild_summary(db: Session):
+    totals = issue_totals(db)
+    _write_rollups(db, totals.groups)
+    write_counter(db, TRANSACTIONS_WITH_ISSUES, totals.transactions)
+    transactions = select(func.count(TransactionLifecycle.transaction_id))
+    write_counter(db, TRANSACTIONS, db.execute(transactions).scalar())
+
+
+def refresh_issue_rollups(db: Session, scope: Select | None, before: IssueTotals | None):
+    if scope is None or before is None:
+        rebuild_summary(db)
+        return
+    if not summary_initialized(db):
+        return
+
+    after = issue_totals(db, scope)
+    groups = load_rollups(db)
+    for sign, totals in ((-1, before), (1, after)):
+        for key, (count, amount) in totals.groups.items():
+            current_count, current_amount = groups.get(key, (0, Decimal("0")))
+            groups[key] = (current_count + sign * count, current_amount + sign * amount)
+    _write_rollups(db, groups)
+    _add_to_counter(db, TRANSACTIONS_WITH_ISSUES, after.transactions - before.transactions)
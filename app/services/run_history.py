@@ -0,0 +1,82 @@
+import math
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.enums import DetectionRunStatus
+from app.models import DetectionRun
+from app.rules.profiling import RunProfile
+from app.schemas import DetectionRunHistory, DetectionRunRecord, DetectionRunTrends, Percentiles
+
+
+def timings_ms(group: dict[str, list[float]]) -> dict[str, dict[str, float]]:
+    return {
+        name: {"wall_ms": round(wall * 1000, 3), "cpu_ms": round(cpu * 1000, 3)}
+        for name, (wall, cpu) in sorted(group.items())
+    }
+
+
+def profile_columns(profile: RunProfile) -> dict:
+    return {
+        "rows_loaded": dict(sorted(profile.rows_loaded.items())),
+        "rule_timings": timings_ms(profile.rules),
+        "phase_timings": timings_ms(profile.phases),
+    }
+
+
+def record_run(db: Session, run: DetectionRun) -> int:
+    db.add(run)
+    db.flush()
+    cutoff = db.execute(
+        select(DetectionRun.id)
+        .order_by(DetectionRun.id.desc())
+        .offset(max(settings.detection_run_history_limit, 1))
+        .limit(1)
+    ).scalar()
+    if cutoff is not None:
+        db.execute(delete(DetectionRun).where(DetectionRun.id <= cutoff))
+    db.commit()
+    return run.id
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _percentiles(values: list[float]) -> Percentiles:
+    return Percentiles(p50=percentile(values, 0.5), p95=percentile(values, 0.95))
+
+
+def _grouped(runs: list[DetectionRun], column: str) -> dict[str, Percentiles]:
+    values: dict[str, list[float]] = {}
+    for run in runs:
+        for name, timing in getattr(run, column).items():
+            values.setdefault(name, []).append(timing["wall_ms"])
+    return {name: _percentiles(series) for name, series in sorted(values.items())}
+
+
+def run_trends(runs: list[DetectionRun]) -> DetectionRunTrends:
+    succeeded = [run for run in runs if run.status == DetectionRunStatus.SUCCEEDED]
+    trends = DetectionRunTrends(runs=len(runs), failures=len(runs) - len(succeeded))
+    if succeeded:
+        trends.wall_ms = _percentiles([run.wall_ms for run in succeeded])
+        trends.rules = _grouped(succeeded, "rule_timings")
+        trends.phases = _grouped(succeeded, "phase_timings")
+    return trends
+
+
+def list_runs(db: Session, limit: int = 50, mode: str | None = None) -> DetectionRunHistory:
+    query = select(DetectionRun).order_by(DetectionRun.id.desc()).limit(limit)
+    if mode is not None:
+        query = query.where(DetectionRun.mode == mode)
+    runs = list(db.execute(query).scalars())
+    by_mode: dict[str, list[DetectionRun]] = {}
+    for run in runs:
+        by_mode.setdefault(run.mode, []).append(run)
+    return DetectionRunHistory(
+        items=[DetectionRunRecord.model_validate(run, from_attributes=True) for run in runs],
+        trends={name: run_trends(group) for name, group in sorted(by_mode.items())},
+    )
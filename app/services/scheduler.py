@@ -0,0 +1,42 @@
+import logging
+import threading
+
+from app.config import settings
+from app.database import SessionLocal
+from app.enums import DetectionMode
+from app.services.detection_coordinator import detection_coordinator
+
+logger = logging.getLogger(__name__)
+
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def _tick_loop(interval: int):
+    while not _stop.wait(interval):
+        db = SessionLocal()
+        try:
+            detection_coordinator.run(db, DetectionMode.INCREMENTAL)
+        except Exception:
+            db.rollback()
+            logger.exception("Scheduled incremental detection failed")
+        finally:
+            db.close()
+
+
+def start_scheduler():
+    global _thread
+    interval = settings.stuck_timer_interval_seconds
+    if interval <= 0 or (_thread and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_tick_loop, args=(interval,), daemon=True)
+    _thread.start()
+
+
+def stop_scheduler():
+    global _thread
+    _stop.set()
+    if _thread:
+        _thread.join()
+        _thread = None
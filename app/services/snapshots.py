@@ -0,0 +1,101 @@
+from collections.abc import Iterator
+from itertools import starmap
+
+from sqlalchemy import ColumnElement, Integer, Select, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import Base, chunked
+from app.models import PaymentConfirmation, SettlementRecord, VoucherRecord
+from app.rules.profiling import active_profile
+from app.rules.snapshots import (
+    MINOR_UNITS_PER_MAJOR,
+    PaymentSnapshot,
+    SettlementSnapshot,
+    VoucherSnapshot,
+)
+
+
+def minor_units(column):
+    return cast(func.round(column * MINOR_UNITS_PER_MAJOR), Integer)
+
+
+SNAPSHOT_QUERIES: dict[type[Base], tuple[Select, type]] = {
+    VoucherRecord: (
+        select(
+            VoucherRecord.transaction_id,
+            minor_units(VoucherRecord.amount),
+            VoucherRecord.currency,
+            VoucherRecord.payment_method,
+            VoucherRecord.status,
+            VoucherRecord.created_at,
+            VoucherRecord.expires_at,
+        ),
+        VoucherSnapshot,
+    ),
+    PaymentConfirmation: (
+        select(
+            PaymentConfirmation.transaction_id,
+            minor_units(PaymentConfirmation.amount),
+            PaymentConfirmation.currency,
+            PaymentConfirmation.payment_method,
+            PaymentConfirmation.status,
+            PaymentConfirmation.paid_at,
+        ),
+        PaymentSnapshot,
+    ),
+    SettlementRecord: (
+        select(
+            SettlementRecord.transaction_id,
+            minor_units(SettlementRecord.amount),
+            SettlementRecord.currency,
+            SettlementRecord.status,
+        ),
+        SettlementSnapshot,
+    ),
+}
+
+
+def load_snapshots(
+    db: Session,
+    model: type[Base],
+    transaction_ids: list[str] | None = None,
+    where: ColumnElement[bool] | None = None,
+) -> list:
+    query, snapshot = SNAPSHOT_QUERIES[model]
+    if where is not None:
+        query = query.where(where)
+    if transaction_ids is None:
+        snapshots = list(starmap(snapshot, db.execute(query)))
+    else:
+        snapshots = []
+        for chunk in chunked(transaction_ids):
+            snapshots += starmap(
+                snapshot, db.execute(query.where(model.transaction_id.in_(chunk)))
+            )
+    if profile := active_profile():
+        profile.add_rows(model.__tablename__, len(snapshots))
+    return snapshots
+
+
+def _counted(rows: Iterator, source: str) -> Iterator:
+    profile = active_profile()
+    count = 0
+    try:
+        for row in rows:
+            count += 1
+            yield row
+    finally:
+        if profile is not None:
+            profile.add_rows(source, count)
+
+
+def stream_snapshots(db: Session, model: type[Base], scope: Select | None = None) -> Iterator:
+    query, snapshot = SNAPSHOT_QUERIES[model]
+    query = query.order_by(model.transaction_id)
+    if scope is not None:
+        query = query.where(model.transaction_id.in_(scope))
+    result = db.execute(
+        query.execution_options(yield_per=settings.detection_stream_batch_size)
+    )
+    return _counted(starmap(snapshot, result), model.__tablename__)
@@ -0,0 +1,216 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    DateTime,
+    Select,
+    String,
+    and_,
+    case,
+    cast,
+    func,
+    insert,
+    literal,
+    null,
+    or_,
+    select,
+)
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.enums import IssueTemplate, IssueType, PaymentStatus, Severity
+from app.models import PaymentConfirmation, SettlementRecord, StagedIssue, VoucherRecord
+from app.rules.profiling import timed_rule
+from app.rules.snapshots import basis_points
+from app.services.issue_store import ISSUE_COLUMNS
+from app.services.snapshots import minor_units
+
+
+def _isoformat(column):
+    text = cast(column, String)
+    trimmed = case((func.substr(text, 20) == ".000000", func.substr(text, 1, 19)), else_=text)
+    return func.replace(trimmed, " ", "T")
+
+
+def _scoped(query: Select, column, scope: Select | None) -> Select:
+    return query.where(column.in_(scope)) if scope is not None else query
+
+
+def _confirmed_payment_exists(transaction_id):
+    return (
+        select(PaymentConfirmation.id)
+        .where(
+            PaymentConfirmation.transaction_id == transaction_id,
+            PaymentConfirmation.status == PaymentStatus.CONFIRMED,
+        )
+        .exists()
+    )
+
+
+def orphaned_payments_query(now: datetime, scope: Select | None = None) -> Select:
+    p = PaymentConfirmation
+    voucher_exists = select(VoucherRecord.id).where(
+        VoucherRecord.transaction_id == p.transaction_id
+    )
+    query = select(
+        p.transaction_id,
+        literal(IssueType.ORPHANED_PAYMENT.value),
+        literal(Severity.HIGH.value),
+        literal(now, DateTime),
+        literal(IssueTemplate.ORPHANED_PAYMENT.value),
+        null(),
+        p.amount,
+        p.payment_method,
+        p.currency,
+    ).where(~voucher_exists.exists())
+    return _scoped(query, p.transaction_id, scope)
+
+
+def stuck_pending_query(now: datetime, scope: Select | None = None) -> Select:
+    v = VoucherRecord
+    medium_cutoff = now - timedelta(hours=settings.stuck_pending_threshold_hours)
+    high_cutoff = now - timedelta(hours=settings.stuck_pending_high_threshold_hours)
+    query = select(
+        v.transaction_id,
+        literal(IssueType.STUCK_PENDING.value),
+        case((v.created_at < high_cutoff, Severity.HIGH.value), else_=Severity.MEDIUM.value),
+        literal(now, DateTime),
+        literal(IssueTemplate.STUCK_PENDING.value),
+        func.json_object("created_at", _isoformat(v.created_at)),
+        v.amount,
+        v.payment_method,
+        v.currency,
+    ).where(
+        v.status == PaymentStatus.PENDING,
+        v.created_at < medium_cutoff,
+        ~_confirmed_payment_exists(v.transaction_id),
+    )
+    return _scoped(query, v.transaction_id, scope)
+
+
+def amount_mismatch_query(now: datetime, scope: Select | None = None) -> Select:
+    v, p = VoucherRecord, PaymentConfirmation
+    voucher_cents = minor_units(v.amount)
+    diff_cents = func.abs(voucher_cents - minor_units(p.amount))
+    abs_voucher_cents = func.abs(voucher_cents)
+    scaled_diff = diff_cents * 10000
+
+    def exceeds(ratio: float):
+        return scaled_diff > basis_points(ratio) * abs_voucher_cents
+
+    currency_mismatch = v.currency != p.currency
+    severity = case(
+        (currency_mismatch, Severity.HIGH.value),
+        (exceeds(settings.amount_mismatch_high_threshold), Severity.HIGH.value),
+        (exceeds(settings.amount_mismatch_medium_threshold), Severity.MEDIUM.value),
+        else_=Severity.LOW.value,
+    )
+    template = case(
+        (currency_mismatch, IssueTemplate.CURRENCY_MISMATCH.value),
+        else_=IssueTemplate.AMOUNT_MISMATCH.value,
+    )
+    params = case(
+        (
+            currency_mismatch,
+            func.json_object("voucher_currency", v.currency, "payment_currency", p.currency),
+        ),
+        else_=func.json_object(
+            "voucher_amount",
+            func.printf("%.2f", v.amount),
+            "voucher_currency",
+            v.currency,
+            "payment_amount",
+            func.printf("%.2f", p.amount),
+            "payment_currency",
+            p.currency,
+            "difference_pct",
+            func.round(diff_cents * 100.0 / abs_voucher_cents, 2),
+        ),
+    )
+    query = (
+        select(
+            v.transaction_id,
+            literal(IssueType.AMOUNT_MISMATCH.value),
+            severity,
+            literal(now, DateTime),
+            template,
+            params,
+            case((currency_mismatch, p.amount), else_=diff_cents / 100.0),
+            v.payment_method,
+            v.currency,
+        )
+        .join(p, p.transaction_id == v.transaction_id)
+        .where(
+            or_(
+                currency_mismatch,
+                and_(voucher_cents != 0, exceeds(settings.amount_mismatch_tolerance)),
+            )
+        )
+    )
+    return _scoped(query, v.transaction_id, scope)
+
+
+def zombie_completions_query(now: datetime, scope: Select | None = None) -> Select:
+    s, v = SettlementRecord, VoucherRecord
+    query = (
+        select(
+            s.transaction_id,
+            literal(IssueType.ZOMBIE_COMPLETION.value),
+            literal(Severity.HIGH.value),
+            literal(now, DateTime),
+            literal(IssueTemplate.ZOMBIE_COMPLETION.value),
+            null(),
+            s.amount,
+            v.payment_method,
+            s.currency,
+        )
+        .outerjoin(v, v.transaction_id == s.transaction_id)
+        .where(
+            s.status == PaymentStatus.COMPLETED,
+            ~_confirmed_payment_exists(s.transaction_id),
+        )
+    )
+    return _scoped(query, s.transaction_id, scope)
+
+
+def post_expiration_payments_query(now: datetime, scope: Select | None = None) -> Select:
+    v, p = VoucherRecord, PaymentConfirmation
+    query = (
+        select(
+            v.transaction_id,
+            literal(IssueType.POST_EXPIRATION_PAYMENT.value),
+            literal(Severity.HIGH.value),
+            literal(now, DateTime),
+            literal(IssueTemplate.POST_EXPIRATION_PAYMENT.value),
+            func.json_object(
+                "paid_at", _isoformat(p.paid_at), "expires_at", _isoformat(v.expires_at)
+            ),
+            p.amount,
+            v.payment_method,
+            v.currency,
+        )
+        .join(p, p.transaction_id == v.transaction_id)
+        .where(v.expires_at.is_not(None), p.paid_at > v.expires_at)
+    )
+    return _scoped(query, v.transaction_id, scope)
+
+
+SQL_RULES = {
+    IssueType.ORPHANED_PAYMENT: orphaned_payments_query,
+    IssueType.STUCK_PENDING: stuck_pending_query,
+    IssueType.AMOUNT_MISMATCH: amount_mismatch_query,
+    IssueType.ZOMBIE_COMPLETION: zombie_completions_query,
+    IssueType.POST_EXPIRATION_PAYMENT: post_expiration_payments_query,
+}
+
+
+def stage_sql_issues(db: Session, now: datetime, scope: Select | None = None) -> dict[str, int]:
+    issues_by_type: dict[str, int] = {}
+    for issue_type, build_query in SQL_RULES.items():
+        result = timed_rule(
+            issue_type,
+            db.execute,
+            insert(StagedIssue).from_select(ISSUE_COLUMNS, build_query(now, scope)),
+        )
+        if result.rowcount:
+            issues_by_type[issue_type] = result.rowcount
+    return issues_by_type
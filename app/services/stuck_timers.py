@@ -0,0 +1,118 @@
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import chunked
+from app.enums import PaymentStatus
+from app.models import (
+    DirtyTransaction,
+    PaymentConfirmation,
+    StuckPendingTimer,
+    SummaryCounter,
+    VoucherRecord,
+)
+from app.services.rollups import write_counter
+
+MEDIUM_THRESHOLD = "stuck_timer_threshold_hours"
+HIGH_THRESHOLD = "stuck_timer_high_threshold_hours"
+
+
+def _thresholds() -> list[timedelta]:
+    return [
+        timedelta(hours=settings.stuck_pending_threshold_hours),
+        timedelta(hours=settings.stuck_pending_high_threshold_hours),
+    ]
+
+
+def _timer_rows(
+    vouchers: Iterable[tuple[str, datetime]], now: datetime | None = None
+) -> list[dict]:
+    return [
+        {"transaction_id": transaction_id, "due_at": created_at + threshold}
+        for transaction_id, created_at in vouchers
+        for threshold in _thresholds()
+        if now is None or created_at + threshold >= now
+    ]
+
+
+def schedule_stuck_timers(db: Session, voucher_rows: list[dict]):
+    rows = _timer_rows(
+        (row["transaction_id"], row["created_at"])
+        for row in voucher_rows
+        if row["status"] == PaymentStatus.PENDING
+    )
+    if rows:
+        db.execute(insert(StuckPendingTimer), rows)
+
+
+def cancel_stuck_timers(db: Session, payment_rows: list[dict]):
+    confirmed_ids = [
+        row["transaction_id"] for row in payment_rows if row["status"] == PaymentStatus.CONFIRMED
+    ]
+    for chunk in chunked(confirmed_ids):
+        db.execute(delete(StuckPendingTimer).where(StuckPendingTimer.transaction_id.in_(chunk)))
+
+
+def fire_due_timers(db: Session, now: datetime) -> int:
+    due_ids = (
+        select(StuckPendingTimer.transaction_id)
+        .where(
+            StuckPendingTimer.due_at < now,
+            StuckPendingTimer.transaction_id.not_in(select(DirtyTransaction.transaction_id)),
+        )
+        .distinct()
+    )
+    fired = db.execute(insert(DirtyTransaction).from_select(["transaction_id"], due_ids)).rowcount
+    db.execute(delete(StuckPendingTimer).where(StuckPendingTimer.due_at < now))
+    return fired
+
+
+def _pending_vouchers():
+    confirmed_ids = select(PaymentConfirmation.transaction_id).where(
+        PaymentConfirmation.status == PaymentStatus.CONFIRMED
+    )
+    return select(VoucherRecord.transaction_id, VoucherRecord.created_at).where(
+        VoucherRecord.status == PaymentStatus.PENDING,
+        VoucherRecord.transaction_id.not_in(confirmed_ids),
+    )
+
+
+def rebuild_stuck_timers(db: Session, now: datetime):
+    db.execute(delete(StuckPendingTimer))
+    pending = db.execute(
+        _pending_vouchers().execution_options(yield_per=settings.detection_stream_batch_size)
+    )
+    for partition in pending.partitions():
+        rows = _timer_rows(partition, now)
+        if rows:
+            db.execute(insert(StuckPendingTimer), rows)
+    write_counter(db, MEDIUM_THRESHOLD, settings.stuck_pending_threshold_hours)
+    write_counter(db, HIGH_THRESHOLD, settings.stuck_pending_high_threshold_hours)
+
+
+def refresh_changed_thresholds(db: Session, now: datetime) -> bool:
+    built = [db.get(SummaryCounter, name) for name in (MEDIUM_THRESHOLD, HIGH_THRESHOLD)]
+    current = [settings.stuck_pending_threshold_hours, settings.stuck_pending_high_threshold_hours]
+    if not all(built) or [counter.value for counter in built] == current:
+        return False
+    crossed = [
+        VoucherRecord.created_at.between(
+            now - timedelta(hours=max(old.value, new)), now - timedelta(hours=min(old.value, new))
+        )
+        for old, new in zip(built, current)
+        if old.value != new
+    ]
+    rebuild_stuck_timers(db, now)
+    pending_ids = (
+        _pending_vouchers()
+        .with_only_columns(VoucherRecord.transaction_id)
+        .where(
+            or_(*crossed),
+            VoucherRecord.transaction_id.not_in(select(DirtyTransaction.transaction_id)),
+        )
+    )
+    db.execute(insert(DirtyTransaction).from_select(["transaction_id"], pending_ids))
+    return True
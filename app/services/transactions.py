@@ -3,8 +3,22 @@ from decimal import Decimal
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.models import PaymentConfirmation, ReconciliationIssue, SettlementRecord, VoucherRecord
-from app.schemas import IssueResponse, SourceRecord, TransactionView
+from app.database import chunked
+from app.enums import LookupField
+from app.models import (
+    PaymentConfirmation,
+    ReconciliationIssue,
+    SettlementRecord,
+    TransactionLifecycle,
+    VoucherRecord,
+)
+from app.schemas import IssueResponse, SourceRecord, TransactionLookupResponse, TransactionView
+
+SOURCE_FIELDS = {
+    LookupField.VOUCHER: VoucherRecord,
+    LookupField.PAYMENT: PaymentConfirmation,
+    LookupField.SETTLEMENT: SettlementRecord,
+}
 
 
 def _model_to_dict(obj) -> dict:
@@ -15,59 +29,101 @@ def _model_to_dict(obj) -> dict:
     }
 
 
-def get_transaction_view(db: Session, transaction_id: str) -> TransactionView | None:
-    voucher = db.execute(
-        select(VoucherRecord).where(VoucherRecord.transaction_id == transaction_id)
-    ).scalar_one_or_none()
+def _issue_response(i: ReconciliationIssue) -> IssueResponse:
+    return IssueResponse(
+        id=i.id,
+        transaction_id=i.transaction_id,
+        issue_type=i.issue_type,
+        severity=i.severity,
+        detected_at=i.detected_at,
+        description=i.description,
+        amount_at_risk=i.amount_at_risk,
+        payment_method=i.payment_method,
+        currency=i.currency,
+        suggested_resolution=i.suggested_resolution,
+        suggested_matches=i.suggested_matches,
+        first_detected_at=i.first_detected_at,
+        last_seen_at=i.last_seen_at,
+    )
 
-    payment = db.execute(
-        select(PaymentConfirmation).where(
-            PaymentConfirmation.transaction_id == transaction_id
-        )
-    ).scalar_one_or_none()
 
-    settlement = db.execute(
-        select(SettlementRecord).where(SettlementRecord.transaction_id == transaction_id)
-    ).scalar_one_or_none()
+def _fetch_by_transaction(db: Session, model, transaction_ids: list[str]) -> dict:
+    records = {}
+    for chunk in chunked(transaction_ids):
+        for record in db.execute(
+            select(model).where(model.transaction_id.in_(chunk))
+        ).scalars():
+            records[record.transaction_id] = record
+    return records
+
 
-    if not voucher and not payment and not settlement:
+def _fetch_issues(db: Session, transaction_ids: list[str]) -> dict[str, list[IssueResponse]]:
+    issues: dict[str, list[IssueResponse]] = {}
+    for chunk in chunked(transaction_ids):
+        for issue in db.execute(
+            select(ReconciliationIssue)
+            .where(ReconciliationIssue.transaction_id.in_(chunk))
+            .order_by(ReconciliationIssue.id)
+        ).scalars():
+            issues.setdefault(issue.transaction_id, []).append(_issue_response(issue))
+    return issues
+
+
+def _source_record(record) -> SourceRecord | None:
+    if record is None:
         return None
+    return SourceRecord(source_system=record.source_system, data=_model_to_dict(record))
+
+
+def get_transaction_views(
+    db: Session, transaction_ids: list[str], fields: list[LookupField] | None = None
+) -> list[TransactionView]:
+    transaction_ids = list(dict.fromkeys(transaction_ids))
+    selected = set(fields) if fields is not None else set(LookupField)
 
-    issues_rows = db.execute(
-        select(ReconciliationIssue).where(
-            ReconciliationIssue.transaction_id == transaction_id
+    statuses: dict[str, str] = {}
+    for chunk in chunked(transaction_ids):
+        statuses.update(
+            db.execute(
+                select(TransactionLifecycle.transaction_id, TransactionLifecycle.status)
+                .where(TransactionLifecycle.transaction_id.in_(chunk))
+            ).all()
         )
-    ).scalars().all()
-
-    issues = [
-        IssueResponse(
-            id=i.id,
-            transaction_id=i.transaction_id,
-            issue_type=i.issue_type,
-            severity=i.severity,
-            detected_at=i.detected_at,
-            description=i.description,
-            amount_at_risk=i.amount_at_risk,
-            payment_method=i.payment_method,
-            currency=i.currency,
-            suggested_resolution=i.suggested_resolution,
+    found = [txn_id for txn_id in transaction_ids if txn_id in statuses]
+
+    records = {
+        field: _fetch_by_transaction(db, model, found)
+        for field, model in SOURCE_FIELDS.items()
+        if field in selected
+    }
+    issues = _fetch_issues(db, found) if LookupField.ISSUES in selected else {}
+
+    views = []
+    for txn_id in found:
+        projected = {
+            field.value: _source_record(records[field].get(txn_id))
+            for field in SOURCE_FIELDS
+            if field in selected
+        }
+        if LookupField.ISSUES in selected:
+            projected["issues"] = issues.get(txn_id, [])
+        views.append(
+            TransactionView(transaction_id=txn_id, status=statuses[txn_id], **projected)
         )
-        for i in issues_rows
-    ]
-
-    sources_present = sum(bool(x) for x in [voucher, payment, settlement])
-    if payment and not voucher:
-        status = "orphaned"
-    elif sources_present == 3:
-        status = "complete"
-    else:
-        status = "partial"
-
-    return TransactionView(
-        transaction_id=transaction_id,
-        voucher=SourceRecord(source_system=voucher.source_system, data=_model_to_dict(voucher)) if voucher else None,
-        payment=SourceRecord(source_system=payment.source_system, data=_model_to_dict(payment)) if payment else None,
-        settlement=SourceRecord(source_system=settlement.source_system, data=_model_to_dict(settlement)) if settlement else None,
-        issues=issues,
-        status=status,
+    return views
+
+
+def get_transaction_view(db: Session, transaction_id: str) -> TransactionView | None:
+    views = get_transaction_views(db, [transaction_id])
+    return views[0] if views else None
+
+
+def lookup_transactions(
+    db: Session, transaction_ids: list[str], fields: list[LookupField] | None = None
+) -> TransactionLookupResponse:
+    views = get_transaction_views(db, transaction_ids, fields)
+    found = {view.transaction_id for view in views}
+    return TransactionLookupResponse(
+        items=views,
+        not_found=[txn_id for txn_id in dict.fromkeys(transaction_ids) if txn_id not in found],
     )
@@ -0,0 +1,122 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import SessionLocal
+from app.schemas import IngestionResponse
+
+logger = logging.getLogger(__name__)
+
+StageFunction = Callable[[Session, list], IngestionResponse]
+
+
+@dataclass(slots=True)
+class PendingWrite:
+    stage: StageFunction
+    records: list
+    future: Future = field(default_factory=Future)
+
+
+class GroupCommitCoordinator:
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self.session_factory = session_factory
+        self._queue: queue.Queue[PendingWrite | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, stage: StageFunction, records: list) -> IngestionResponse:
+        write = PendingWrite(stage, records)
+        # Enqueue under the lock so a write can never land behind a stop sentinel.
+        with self._lock:
+            self._start()
+            self._queue.put(write)
+        return write.future.result()
+
+    def _collect(self, first: PendingWrite) -> tuple[list[PendingWrite], bool]:
+        group, rows = [first], len(first.records)
+        deadline = time.monotonic() + settings.ingest_group_commit_window_ms / 1000
+        while rows < settings.ingest_group_commit_max_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                write = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if write is None:
+                return group, True
+            group.append(write)
+            rows += len(write.records)
+        return group, False
+
+    def _commit_group(self, group: list[PendingWrite]):
+        with self.session_factory() as db:
+            results = [write.stage(db, write.records) for write in group]
+            db.commit()
+        for write, result in zip(group, results):
+            write.future.set_result(result)
+
+    def _commit_each(self, group: list[PendingWrite]):
+        for write in group:
+            try:
+                with self.session_factory() as db:
+                    result = write.stage(db, write.records)
+                    db.commit()
+            except Exception as exc:
+                write.future.set_exception(exc)
+            else:
+                write.future.set_result(result)
+
+    def _flush(self, group: list[PendingWrite]):
+        try:
+            self._commit_group(group)
+        except Exception:
+            logger.warning("Group commit of %d writes failed, retrying one by one", len(group))
+            self._commit_each(group)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            group, stopping = self._collect(first)
+            self._flush(group)
+
+    def _start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def start(self):
+        with self._lock:
+            self._start()
+
+    def _fail_pending(self):
+        while True:
+            try:
+                write = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if write is not None:
+                write.future.set_exception(RuntimeError("Group commit coordinator stopped"))
+
+    def stop(self):
+        with self._lock:
+            if not self._thread:
+                return
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._fail_pending()
+
+
+write_coordinator = GroupCommitCoordinator()
@@ -0,0 +1,131 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.database import Base, create_db_engine  # noqa: E402
+from app.models import ReconciliationIssue, VoucherRecord  # noqa: E402
+from app.schemas import PaymentIn, VoucherIn  # noqa: E402
+from app.services.detection import run_detection  # noqa: E402
+from app.services.ingestion import ingest_payments, ingest_vouchers  # noqa: E402
+
+PROFILES = {
+    "default": {
+        "sqlite_journal_mode": None,
+        "sqlite_synchronous": None,
+        "sqlite_mmap_size": None,
+        "sqlite_cache_size": None,
+        "sqlite_temp_store": None,
+        "sqlite_busy_timeout_ms": 5000,
+    },
+    "tuned": {
+        name: field_info.default
+        for name, field_info in type(settings).model_fields.items()
+        if name.startswith("sqlite_")
+    },
+}
+BASE_DATE = datetime(2026, 2, 20, 10, 0, 0)
+
+
+def make_records(count):
+    vouchers, payments = [], []
+    for i in range(count):
+        transaction_id = f"TXN-BENCH-{i:07d}"
+        amount = Decimal(100 + i % 900)
+        vouchers.append(VoucherIn(
+            transaction_id=transaction_id, amount=amount, currency="MXN",
+            payment_method="OXXO", status="PAID", created_at=BASE_DATE,
+            expires_at=BASE_DATE + timedelta(hours=48),
+        ))
+        if i % 10:
+            payments.append(PaymentIn(
+                transaction_id=transaction_id,
+                amount=amount if i % 7 else amount * Decimal("1.08"),
+                currency="MXN", payment_method="OXXO", status="CONFIRMED",
+                paid_at=BASE_DATE + timedelta(hours=1 if i % 13 else 50),
+            ))
+    return vouchers, payments
+
+
+def read_loop(sessions, stop, latencies):
+    while not stop.is_set():
+        started = time.perf_counter()
+        with sessions() as db:
+            db.execute(select(func.count(ReconciliationIssue.id))).scalar()
+            db.execute(select(VoucherRecord).limit(50)).scalars().all()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def run_profile(name, overrides, vouchers, payments, chunk_size):
+    for field, value in overrides.items():
+        setattr(settings, field, value)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_engine = create_db_engine(f"sqlite:///{directory}/bench.db")
+        Base.metadata.create_all(bind=db_engine)
+        sessions = sessionmaker(bind=db_engine)
+
+        stop = threading.Event()
+        latencies: list[float] = []
+        reader = threading.Thread(target=read_loop, args=(sessions, stop, latencies))
+        reader.start()
+
+        started = time.perf_counter()
+        with sessions() as db:
+            for i in range(0, len(vouchers), chunk_size):
+                ingest_vouchers(db, vouchers[i:i + chunk_size])
+            for i in range(0, len(payments), chunk_size):
+                ingest_payments(db, payments[i:i + chunk_size])
+        ingest_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with sessions() as db:
+            result = run_detection(db)
+        detect_seconds = time.perf_counter() - started
+
+        stop.set()
+        reader.join()
+        db_engine.dispose()
+
+    latencies.sort()
+    return {
+        "profile": name,
+        "ingest_s": ingest_seconds,
+        "detect_s": detect_seconds,
+        "issues": result.new_issues_found,
+        "reads": len(latencies),
+        "read_p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "read_p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SQLite pragma profiles")
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    args = parser.parse_args()
+
+    vouchers, payments = make_records(args.transactions)
+    print(f"{'profile':10s} {'ingest s':>9s} {'detect s':>9s} {'issues':>7s} "
+          f"{'reads':>6s} {'p50 ms':>8s} {'p95 ms':>8s}")
+    for name in args.profiles:
+        row = run_profile(name, PROFILES[name], vouchers, payments, args.chunk_size)
+        print(f"{row['profile']:10s} {row['ingest_s']:9.2f} {row['detect_s']:9.2f} "
+              f"{row['issues']:7d} {row['reads']:6d} {row['read_p50_ms']:8.2f} "
+              f"{row['read_p95_ms']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
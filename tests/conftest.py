@@ -7,6 +7,7 @@ from fastapi.testclient import TestClient
 
 from app.database import Base, get_db
 from app.main import app
+from app.services.response_cache import response_cache
 
 TEST_DATABASE_URL = "sqlite:///./test_reconciliation.db"
 
@@ -50,6 +51,7 @@ def client(engine):
         yield session
 
     app.dependency_overrides[get_db] = override_get_db
+    response_cache.clear()
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -1,6 +1,16 @@
+import json
 import time
+from datetime import datetime
 
-from app.services.batch import _jobs
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base
+from app.models import BatchJob, VoucherRecord
+from app.schemas import VoucherIn
+from app.services import batch
 
 
 class TestBatchSubmit:
@@ -85,3 +95,399 @@ class TestBatchSubmit:
         })
 
         assert response.status_code == 422
+
+
+@pytest.fixture
+def job_sessions(tmp_path, monkeypatch):
+    file_engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(bind=file_engine)
+    sessions = sessionmaker(bind=file_engine)
+    monkeypatch.setattr(batch, "SessionLocal", sessions)
+    yield sessions
+    file_engine.dispose()
+
+
+def _voucher_payload(transaction_id):
+    return VoucherIn(
+        transaction_id=transaction_id,
+        amount="150.00",
+        currency="MXN",
+        payment_method="OXXO",
+        status="PENDING",
+        created_at=datetime(2026, 2, 20, 10, 0, 0),
+    )
+
+
+def _expire_lease(sessions, job_id):
+    with sessions() as db:
+        db.execute(
+            update(BatchJob)
+            .where(BatchJob.id == job_id)
+            .values(lease_expires_at=datetime(2000, 1, 1))
+        )
+        db.commit()
+
+
+class TestJobQueue:
+    def test_jobs_are_persisted_and_claimed_in_order(self, job_sessions):
+        first = batch.submit_batch([_voucher_payload("TXN-QUEUE-001")], [], [])
+        second = batch.submit_batch([], [], [])
+
+        with job_sessions() as db:
+            claimed = [batch.claim_job(db, "worker-a"), batch.claim_job(db, "worker-b")]
+            assert batch.claim_job(db, "worker-c") is None
+
+        assert [job.id for job in claimed] == [first, second]
+        assert [job.lease_owner for job in claimed] == ["worker-a", "worker-b"]
+        assert batch.get_job(first)["status"] == "processing"
+        assert batch.get_job(first)["attempts"] == 1
+
+    def test_claimed_job_is_processed_to_completion(self, job_sessions):
+        job_id = batch.submit_batch([_voucher_payload("TXN-QUEUE-010")], [], [])
+
+        with job_sessions() as db:
+            job = batch.claim_job(db, "worker-a")
+            batch.process_job(job, "worker-a")
+
+        data = batch.get_job(job_id)
+        assert data["status"] == "completed"
+        assert data["progress"] == data["total"] == 1
+        assert data["summary"]["ingestion"]["vouchers"]["created"] == 1
+
+    def test_expired_lease_is_recovered_by_another_worker(self, job_sessions):
+        job_id = batch.submit_batch([_voucher_payload("TXN-QUEUE-020")], [], [])
+        with job_sessions() as db:
+            crashed = batch.claim_job(db, "worker-crashed")
+            assert batch.claim_job(db, "worker-b") is None
+
+            _expire_lease(job_sessions, job_id)
+            recovered = batch.claim_job(db, "worker-b")
+            batch.process_job(recovered, "worker-b")
+
+            with pytest.raises(batch.LeaseLost):
+                batch._update_job(crashed.id, "worker-crashed", progress=0)
+
+        data = batch.get_job(job_id)
+        assert data["status"] == "completed"
+        assert data["attempts"] == 2
+
+    def test_job_fails_after_max_attempts(self, job_sessions, monkeypatch):
+        monkeypatch.setattr(settings, "batch_max_attempts", 1)
+        job_id = batch.submit_batch([], [], [])
+        with job_sessions() as db:
+            batch.claim_job(db, "worker-a")
+            _expire_lease(job_sessions, job_id)
+            job = batch.claim_job(db, "worker-b")
+            batch.process_job(job, "worker-b")
+
+        data = batch.get_job(job_id)
+        assert data["status"] == "failed"
+        assert data["error"] == "Exceeded maximum attempts"
+
+
+class TestWorkerResilience:
+    def test_failure_after_cancel_does_not_raise(self, job_sessions, monkeypatch):
+        job_id = batch.submit_batch([_voucher_payload("TXN-RESIL-001")], [], [])
+
+        def cancel_then_fail(db, records):
+            batch.cancel_job(job_id)
+            raise RuntimeError("ingest failed")
+
+        monkeypatch.setattr(
+            batch, "BATCH_SOURCES", (("vouchers", VoucherIn, cancel_then_fail),
+                                     *batch.BATCH_SOURCES[1:])
+        )
+        with job_sessions() as db:
+            batch.process_job(batch.claim_job(db, "worker-a"), "worker-a")
+
+        assert batch.get_job(job_id)["status"] == "cancelled"
+
+    def test_max_attempts_on_cancelled_job_does_not_raise(self, job_sessions, monkeypatch):
+        monkeypatch.setattr(settings, "batch_max_attempts", 0)
+        job_id = batch.submit_batch([], [], [])
+        with job_sessions() as db:
+            job = batch.claim_job(db, "worker-a")
+        batch.cancel_job(job_id)
+
+        batch.process_job(job, "worker-a")
+
+        assert batch.get_job(job_id)["status"] == "cancelled"
+
+    def test_worker_thread_survives_processing_errors(self, job_sessions, monkeypatch):
+        monkeypatch.setattr(settings, "batch_poll_interval_seconds", 0)
+        pool = batch.WorkerPool()
+        jobs = iter([BatchJob(id="batch-broken"), None])
+
+        def claim(db, owner):
+            job = next(jobs)
+            if job is None:
+                pool._stop.set()
+            return job
+
+        def broken(job, owner):
+            raise RuntimeError("database is locked")
+
+        monkeypatch.setattr(batch, "claim_job", claim)
+        monkeypatch.setattr(batch, "process_job", broken)
+
+        pool._run("worker-a")
+
+        assert pool._stop.is_set()
+
+    def test_each_worker_thread_claims_with_its_own_owner(self, monkeypatch):
+        monkeypatch.setattr(settings, "batch_workers", 2)
+        monkeypatch.setattr(settings, "batch_poll_interval_seconds", 0.01)
+        owners = set()
+
+        def claim(db, owner):
+            owners.add(owner)
+            return None
+
+        monkeypatch.setattr(batch, "claim_job", claim)
+        monkeypatch.setattr(batch.WorkerPool, "_maybe_evict", lambda self: None)
+        pool = batch.WorkerPool()
+        pool.start()
+        for _ in range(100):
+            if len(owners) == 2:
+                break
+            time.sleep(0.01)
+        pool.stop()
+
+        assert len(owners) == 2
+        assert all(owner.startswith(batch.PROCESS_ID) for owner in owners)
+
+    def test_lease_is_renewed_while_detection_runs(self, job_sessions, monkeypatch):
+        monkeypatch.setattr(settings, "batch_lease_seconds", 0.3)
+        job_id = batch.submit_batch([_voucher_payload("TXN-RESIL-HEARTBEAT")], [], [])
+        reclaimed = []
+
+        def slow_detection(db):
+            time.sleep(0.6)
+            with job_sessions() as other:
+                reclaimed.append(batch.claim_job(other, "worker-b"))
+            raise batch.DetectionBusy("Detection is already running in another process")
+
+        monkeypatch.setattr(batch.detection_coordinator, "run", slow_detection)
+        with job_sessions() as db:
+            batch.process_job(batch.claim_job(db, "worker-a"), "worker-a")
+
+        assert reclaimed == [None]
+        assert batch.get_job(job_id)["status"] == "completed"
+
+    def test_busy_detection_leaves_ingested_job_completed_with_detection_pending(
+        self, job_sessions, monkeypatch
+    ):
+        job_id = batch.submit_batch([_voucher_payload("TXN-RESIL-BUSY")], [], [])
+
+        def busy(db):
+            raise batch.DetectionBusy("Detection is already running in another process")
+
+        monkeypatch.setattr(batch.detection_coordinator, "run", busy)
+        with job_sessions() as db:
+            batch.process_job(batch.claim_job(db, "worker-a"), "worker-a")
+
+        data = batch.get_job(job_id)
+        assert data["status"] == "completed"
+        assert data["summary"]["ingestion"]["vouchers"]["created"] == 1
+        assert data["summary"]["detection"] == {
+            "status": "pending",
+            "reason": "Detection is already running in another process",
+        }
+
+
+def _wait_for_status(client, job_id, statuses=("completed", "failed")):
+    for _ in range(50):
+        data = client.get(f"/api/v1/batch/{job_id}").json()
+        if data["status"] in statuses:
+            return data
+        time.sleep(0.1)
+    return data
+
+
+class TestChunkedProcessing:
+    def test_progress_is_committed_per_chunk(self, job_sessions, monkeypatch):
+        monkeypatch.setattr(settings, "batch_chunk_size", 2)
+        progress = []
+        write_job = batch._write_job
+
+        def recording_write(db, job_id, owner, **values):
+            if "progress" in values:
+                progress.append(values["progress"])
+            write_job(db, job_id, owner, **values)
+
+        monkeypatch.setattr(batch, "_write_job", recording_write)
+        job_id = batch.submit_batch(
+            [_voucher_payload(f"TXN-CHUNK-{i}") for i in range(5)], [], []
+        )
+
+        with job_sessions() as db:
+            batch.process_job(batch.claim_job(db, "worker-a"), "worker-a")
+
+        assert progress == [2, 4, 5]
+        data = batch.get_job(job_id)
+        assert data["status"] == "completed"
+        assert data["summary"]["ingestion"]["vouchers"] == {"created": 5, "duplicates": 0}
+
+    def test_reclaimed_job_resumes_after_committed_progress(self, job_sessions, monkeypatch):
+        monkeypatch.setattr(settings, "batch_chunk_size", 2)
+        job_id = batch.submit_batch(
+            [_voucher_payload(f"TXN-RESUME-{i}") for i in range(5)], [], []
+        )
+        with job_sessions() as db:
+            db.execute(update(BatchJob).where(BatchJob.id == job_id).values(progress=4))
+            db.commit()
+            batch.process_job(batch.claim_job(db, "worker-a"), "worker-a")
+            ingested = db.execute(select(VoucherRecord.transaction_id)).scalars().all()
+
+        assert ingested == ["TXN-RESUME-4"]
+        assert batch.get_job(job_id)["progress"] == 5
+
+    def test_chunk_and_progress_commit_together(self, job_sessions, monkeypatch):
+        monkeypatch.setattr(settings, "batch_chunk_size", 2)
+        job_id = batch.submit_batch(
+            [_voucher_payload(f"TXN-ATOMIC-{i}") for i in range(5)], [], []
+        )
+        write_job = batch._write_job
+
+        def crash_on_second_chunk(db, job_id, owner, **values):
+            if values.get("progress") == 4:
+                raise RuntimeError("worker crashed")
+            write_job(db, job_id, owner, **values)
+
+        monkeypatch.setattr(batch, "_write_job", crash_on_second_chunk)
+        with job_sessions() as db:
+            batch.process_job(batch.claim_job(db, "worker-a"), "worker-a")
+            ingested = db.execute(select(VoucherRecord.transaction_id)).scalars().all()
+
+        data = batch.get_job(job_id)
+        assert sorted(ingested) == ["TXN-ATOMIC-0", "TXN-ATOMIC-1"]
+        assert data["progress"] == 2
+        assert data["summary"]["ingestion"]["vouchers"] == {"created": 2, "duplicates": 0}
+
+
+class TestCancellation:
+    def test_cancel_queued_job(self, job_sessions):
+        job_id = batch.submit_batch([], [], [])
+
+        assert batch.cancel_job(job_id)["status"] == "cancelled"
+        with job_sessions() as db:
+            assert batch.claim_job(db, "worker-a") is None
+
+    def test_cancel_stops_processing_between_chunks(self, job_sessions, monkeypatch):
+        monkeypatch.setattr(settings, "batch_chunk_size", 2)
+        job_id = batch.submit_batch(
+            [_voucher_payload(f"TXN-CANCEL-{i}") for i in range(6)], [], []
+        )
+        stage = batch.stage_vouchers
+        chunks = []
+
+        def cancel_before_second_chunk(db, records):
+            if chunks:
+                batch.cancel_job(job_id)
+            chunks.append(records)
+            return stage(db, records)
+
+        monkeypatch.setattr(
+            batch, "BATCH_SOURCES", (("vouchers", VoucherIn, cancel_before_second_chunk),
+                                     *batch.BATCH_SOURCES[1:])
+        )
+        with job_sessions() as db:
+            batch.process_job(batch.claim_job(db, "worker-a"), "worker-a")
+            ingested = db.execute(select(VoucherRecord.transaction_id)).scalars().all()
+
+        assert batch.get_job(job_id)["status"] == "cancelled"
+        assert len(ingested) == 2
+
+    def test_cancel_unknown_job_returns_404(self, client):
+        assert client.delete("/api/v1/batch/batch-missing").status_code == 404
+
+    def test_cancel_finished_job_returns_409(self, client):
+        job_id = client.post("/api/v1/batch/reconcile", json={}).json()["job_id"]
+        _wait_for_status(client, job_id)
+
+        response = client.delete(f"/api/v1/batch/{job_id}")
+
+        assert response.status_code == 409
+
+
+class TestBatchEvents:
+    def test_event_stream_ends_with_terminal_status(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "batch_events_poll_seconds", 0.05)
+        job_id = client.post("/api/v1/batch/reconcile", json={}).json()["job_id"]
+
+        response = client.get(f"/api/v1/batch/{job_id}/events")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            block.split("\n") for block in response.text.strip().split("\n\n")
+        ]
+        assert events[-1][0] == "event: completed"
+        assert json.loads(events[-1][1].removeprefix("data: "))["job_id"] == job_id
+
+    def test_event_stream_for_unknown_job_returns_404(self, client):
+        assert client.get("/api/v1/batch/batch-missing/events").status_code == 404
+
+
+def _finish(job_sessions, job_id, finished_at):
+    with job_sessions() as db:
+        job = batch.claim_job(db, "worker-a")
+        batch.process_job(job, "worker-a")
+        db.execute(update(BatchJob).where(BatchJob.id == job_id).values(finished_at=finished_at))
+        db.commit()
+
+
+class TestJobEviction:
+    def test_finished_job_drops_payload(self, job_sessions):
+        job_id = batch.submit_batch([_voucher_payload("TXN-EVICT-000")], [], [])
+        _finish(job_sessions, job_id, datetime.now())
+
+        with job_sessions() as db:
+            assert db.get(BatchJob, job_id).payload is None
+
+    def test_expired_job_is_archived_and_still_readable(self, job_sessions):
+        job_id = batch.submit_batch([_voucher_payload("TXN-EVICT-001")], [], [])
+        _finish(job_sessions, job_id, datetime(2026, 1, 1))
+        before = batch.get_job(job_id)
+
+        with job_sessions() as db:
+            evicted = batch.evict_jobs(db, now=datetime(2026, 1, 2))
+            assert db.get(BatchJob, job_id) is None
+
+        assert evicted == 1
+        assert batch.get_job(job_id) == before
+
+    def test_max_finished_bound_evicts_oldest(self, job_sessions, monkeypatch):
+        monkeypatch.setattr(settings, "batch_job_max_finished", 1)
+        job_ids = []
+        for day in (1, 2, 3):
+            job_ids.append(batch.submit_batch([], [], []))
+            _finish(job_sessions, job_ids[-1], datetime(2026, 1, day))
+        queued = batch.submit_batch([], [], [])
+
+        with job_sessions() as db:
+            batch.evict_jobs(db, now=datetime(2026, 1, 3, 0, 30))
+            remaining = db.execute(select(BatchJob.id)).scalars().all()
+
+        assert sorted(remaining) == sorted([job_ids[-1], queued])
+        assert all(batch.get_job(job_id)["status"] == "completed" for job_id in job_ids)
+
+    def test_archive_can_be_disabled(self, job_sessions, monkeypatch):
+        monkeypatch.setattr(settings, "batch_archive_ttl_seconds", 0)
+        job_id = batch.submit_batch([], [], [])
+        _finish(job_sessions, job_id, datetime(2026, 1, 1))
+
+        with job_sessions() as db:
+            batch.evict_jobs(db, now=datetime(2026, 1, 2))
+
+        assert batch.get_job(job_id) is None
+
+    def test_archived_jobs_expire(self, job_sessions):
+        job_id = batch.submit_batch([], [], [])
+        _finish(job_sessions, job_id, datetime(2026, 1, 1))
+
+        with job_sessions() as db:
+            batch.evict_jobs(db, now=datetime(2026, 1, 2))
+            batch.evict_jobs(db, now=datetime(2026, 3, 1))
+
+        assert batch.get_job(job_id) is None
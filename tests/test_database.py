@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.pool import QueuePool
+
+from app.config import settings
+from app.database import Base, create_db_engine, sqlite_pragmas
+from app.services.migrations import SchemaOutdated, migrate_schema
+
+
+def _pragma(db_engine, name):
+    with db_engine.connect() as connection:
+        return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+class TestSqliteProfile:
+    def test_file_engine_applies_pragmas_and_pool(self, tmp_path):
+        db_engine = create_db_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+        try:
+            assert _pragma(db_engine, "journal_mode") == "wal"
+            assert _pragma(db_engine, "synchronous") == 2
+            assert _pragma(db_engine, "busy_timeout") == settings.sqlite_busy_timeout_ms
+            assert _pragma(db_engine, "cache_size") == settings.sqlite_cache_size
+            assert _pragma(db_engine, "temp_store") == 2
+            assert isinstance(db_engine.pool, QueuePool)
+            assert db_engine.pool.size() == settings.database_pool_size
+        finally:
+            db_engine.dispose()
+
+    def test_unset_pragmas_are_left_at_sqlite_defaults(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "sqlite_journal_mode", None)
+        monkeypatch.setattr(settings, "sqlite_synchronous", None)
+        db_engine = create_db_engine(f"sqlite:///{tmp_path / 'default.db'}")
+        try:
+            assert "journal_mode" not in sqlite_pragmas()
+            assert _pragma(db_engine, "journal_mode") == "delete"
+            assert _pragma(db_engine, "synchronous") == 2
+        finally:
+            db_engine.dispose()
+
+    def test_memory_engine_skips_pool_sizing(self):
+        db_engine = create_db_engine("sqlite://")
+        try:
+            assert _pragma(db_engine, "temp_store") == 2
+        finally:
+            db_engine.dispose()
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    yield db_engine
+    db_engine.dispose()
+
+
+def _columns(db_engine, table):
+    return {column["name"] for column in inspect(db_engine).get_columns(table)}
+
+
+class TestMigrateSchema:
+    def test_current_schema_is_left_alone(self, file_engine):
+        Base.metadata.create_all(bind=file_engine)
+
+        assert migrate_schema(file_engine) == []
+
+    def test_outdated_issue_table_is_recreated(self, file_engine):
+        Base.metadata.create_all(bind=file_engine)
+        with file_engine.begin() as connection:
+            connection.exec_driver_sql("DROP TABLE reconciliation_issues")
+            connection.exec_driver_sql(
+                "CREATE TABLE reconciliation_issues (id INTEGER PRIMARY KEY, "
+                "transaction_id VARCHAR(100) NOT NULL, description TEXT NOT NULL)"
+            )
+
+        rebuilt = migrate_schema(file_engine)
+        Base.metadata.create_all(bind=file_engine)
+
+        assert "reconciliation_issues" in rebuilt
+        columns = _columns(file_engine, "reconciliation_issues")
+        assert {"template", "params"} <= columns
+        assert "description" not in columns
+
+    def test_outdated_run_history_is_recreated_alone(self, file_engine):
+        Base.metadata.create_all(bind=file_engine)
+        with file_engine.begin() as connection:
+            connection.exec_driver_sql("DROP TABLE detection_runs")
+            connection.exec_driver_sql(
+                "CREATE TABLE detection_runs (id INTEGER PRIMARY KEY, mode VARCHAR(20) NOT NULL)"
+            )
+
+        rebuilt = migrate_schema(file_engine)
+        Base.metadata.create_all(bind=file_engine)
+
+        assert rebuilt == ["detection_runs"]
+        assert {"status", "error"} <= _columns(file_engine, "detection_runs")
+
+    def test_outdated_source_table_fails_with_clear_message(self, file_engine):
+        with file_engine.begin() as connection:
+            connection.exec_driver_sql(
+                "CREATE TABLE voucher_records (id INTEGER PRIMARY KEY, "
+                "transaction_id VARCHAR(100) NOT NULL)"
+            )
+
+        with pytest.raises(SchemaOutdated, match="voucher_records"):
+            migrate_schema(file_engine)
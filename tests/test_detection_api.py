@@ -1,3 +1,8 @@
+from datetime import UTC, datetime, timedelta
+
+from app.config import settings
+
+
 def _make_voucher(transaction_id, amount="100.00", status="PENDING", created_at="2025-01-01T10:00:00"):
     return {
         "transaction_id": transaction_id,
@@ -62,3 +67,156 @@ class TestDetectionRun:
         second_run = client.post("/api/v1/detection/run").json()
 
         assert second_run["new_issues_found"] > first_run["new_issues_found"]
+
+
+class TestOrphanSuggestedMatches:
+    def test_orphan_lists_unmatched_voucher_from_same_store(self, client):
+        client.post("/api/v1/ingest/vouchers", json=[
+            {**_make_voucher("TXN-MATCH-0O1", amount="437.25"), "store_id": "STORE-MATCH"},
+            {**_make_voucher("TXN-MATCH-OTHER", amount="437.25"), "store_id": "STORE-ELSEWHERE"},
+        ])
+        client.post("/api/v1/ingest/payments", json=[
+            {**_make_payment("TXN-MATCH-001", amount="437.25"), "store_id": "STORE-MATCH"},
+        ])
+
+        client.post("/api/v1/detection/run")
+        issue = client.get("/api/v1/transactions/TXN-MATCH-001").json()["issues"][0]
+
+        assert issue["issue_type"] == "ORPHANED_PAYMENT"
+        assert issue["suggested_matches"] == [
+            {
+                "transaction_id": "TXN-MATCH-0O1",
+                "amount_difference": "0.00",
+                "seconds_apart": 14400,
+            },
+        ]
+        assert "TXN-MATCH-0O1" in issue["suggested_resolution"]
+
+    def test_orphan_without_candidates_keeps_default_resolution(self, client):
+        client.post("/api/v1/ingest/payments", json=[
+            {**_make_payment("TXN-MATCH-NONE", amount="911.11"), "store_id": "STORE-EMPTY"},
+        ])
+
+        client.post("/api/v1/detection/run")
+        issue = client.get("/api/v1/transactions/TXN-MATCH-NONE").json()["issues"][0]
+
+        assert issue["suggested_matches"] is None
+
+
+class TestIncrementalDetection:
+    def test_incremental_run_only_evaluates_new_transactions(self, client):
+        client.post("/api/v1/ingest/payments", json=[_make_payment("TXN-INC-001")])
+        client.post("/api/v1/detection/run")
+
+        client.post("/api/v1/ingest/payments", json=[_make_payment("TXN-INC-002")])
+        response = client.post("/api/v1/detection/run", params={"mode": "incremental"})
+
+        data = response.json()
+        assert data["mode"] == "incremental"
+        assert data["transactions_evaluated"] == 1
+        assert data["new_issues_found"] == 1
+        assert data["previous_issues_cleared"] == 0
+
+        for txn_id in ("TXN-INC-001", "TXN-INC-002"):
+            view = client.get(f"/api/v1/transactions/{txn_id}").json()
+            assert [i["issue_type"] for i in view["issues"]] == ["ORPHANED_PAYMENT"]
+
+    def test_incremental_run_replaces_issues_for_changed_transaction(self, client):
+        client.post("/api/v1/ingest/payments", json=[_make_payment("TXN-INC-FIX-001")])
+        client.post("/api/v1/detection/run", params={"mode": "incremental"})
+
+        client.post("/api/v1/ingest/vouchers", json=[
+            _make_voucher("TXN-INC-FIX-001", status="PAID"),
+        ])
+        data = client.post("/api/v1/detection/run", params={"mode": "incremental"}).json()
+
+        assert data["transactions_evaluated"] == 1
+        assert data["previous_issues_cleared"] == 1
+        assert data["new_issues_found"] == 0
+
+    def test_incremental_run_with_no_changes_is_a_no_op(self, client):
+        client.post("/api/v1/ingest/payments", json=[_make_payment("TXN-INC-NOOP-001")])
+        client.post("/api/v1/detection/run")
+
+        data = client.post("/api/v1/detection/run", params={"mode": "incremental"}).json()
+
+        assert data["transactions_evaluated"] == 0
+        assert data["new_issues_found"] == 0
+
+    def test_incremental_run_escalates_stuck_voucher_crossing_threshold(self, client, monkeypatch):
+        created_at = (datetime.now(UTC) - timedelta(hours=100)).replace(tzinfo=None).isoformat()
+        client.post("/api/v1/ingest/vouchers", json=[
+            _make_voucher("TXN-INC-STUCK-001", created_at=created_at),
+        ])
+        client.post("/api/v1/detection/run")
+
+        monkeypatch.setattr(settings, "stuck_pending_high_threshold_hours", 90)
+        data = client.post("/api/v1/detection/run", params={"mode": "incremental"}).json()
+
+        assert data["transactions_evaluated"] == 1
+        view = client.get("/api/v1/transactions/TXN-INC-STUCK-001").json()
+        assert [i["severity"] for i in view["issues"]] == ["HIGH"]
+
+    def test_incremental_run_resolves_stuck_voucher_below_raised_threshold(
+        self, client, monkeypatch
+    ):
+        created_at = (datetime.now(UTC) - timedelta(hours=80)).replace(tzinfo=None).isoformat()
+        client.post("/api/v1/ingest/vouchers", json=[
+            _make_voucher("TXN-INC-STUCK-002", created_at=created_at),
+        ])
+        client.post("/api/v1/detection/run")
+
+        monkeypatch.setattr(settings, "stuck_pending_threshold_hours", 96)
+        data = client.post("/api/v1/detection/run", params={"mode": "incremental"}).json()
+
+        assert data["issues_resolved"] == 1
+        assert client.get("/api/v1/transactions/TXN-INC-STUCK-002").json()["issues"] == []
+        again = client.post("/api/v1/detection/run", params={"mode": "incremental"}).json()
+        assert again["transactions_evaluated"] == 0
+
+
+class TestIssueDiffPersistence:
+    def test_rerun_keeps_issue_ids_and_inserts_nothing(self, client):
+        client.post("/api/v1/ingest/payments", json=[_make_payment("TXN-DIFF-STABLE-001")])
+        client.post("/api/v1/detection/run")
+        before = client.get("/api/v1/transactions/TXN-DIFF-STABLE-001").json()["issues"]
+
+        second_run = client.post("/api/v1/detection/run").json()
+        after = client.get("/api/v1/transactions/TXN-DIFF-STABLE-001").json()["issues"]
+
+        assert second_run["issues_inserted"] == 0
+        assert second_run["issues_resolved"] == 0
+        assert second_run["issues_unchanged"] == second_run["new_issues_found"]
+        assert [i["id"] for i in after] == [i["id"] for i in before]
+        assert after[0]["first_detected_at"] == before[0]["first_detected_at"]
+        assert after[0]["last_seen_at"] >= before[0]["last_seen_at"]
+
+    def test_severity_change_updates_issue_in_place(self, client, monkeypatch):
+        created_at = (datetime.now(UTC) - timedelta(hours=100)).replace(tzinfo=None).isoformat()
+        client.post("/api/v1/ingest/vouchers", json=[
+            _make_voucher("TXN-DIFF-SEV-001", created_at=created_at),
+        ])
+        client.post("/api/v1/detection/run")
+        before = client.get("/api/v1/transactions/TXN-DIFF-SEV-001").json()["issues"][0]
+
+        monkeypatch.setattr(settings, "stuck_pending_high_threshold_hours", 90)
+        run = client.post("/api/v1/detection/run").json()
+        after = client.get("/api/v1/transactions/TXN-DIFF-SEV-001").json()["issues"][0]
+
+        assert run["issues_updated"] >= 1
+        assert before["severity"] == "MEDIUM"
+        assert after["severity"] == "HIGH"
+        assert after["id"] == before["id"]
+        assert after["first_detected_at"] == before["first_detected_at"]
+
+    def test_resolved_issue_is_deleted_and_counted(self, client):
+        client.post("/api/v1/ingest/payments", json=[_make_payment("TXN-DIFF-RES-001")])
+        client.post("/api/v1/detection/run")
+
+        client.post("/api/v1/ingest/vouchers", json=[
+            _make_voucher("TXN-DIFF-RES-001", status="PAID"),
+        ])
+        run = client.post("/api/v1/detection/run").json()
+
+        assert run["issues_resolved"] >= 1
+        assert client.get("/api/v1/transactions/TXN-DIFF-RES-001").json()["issues"] == []
@@ -0,0 +1,206 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base, create_db_engine
+from app.enums import DetectionMode
+from app.models import DetectionLease
+from app.schemas import DetectionRunResponse
+from app.services import detection_coordinator as coordination
+from app.services.detection_coordinator import (
+    DetectionBusy,
+    DetectionCoordinator,
+    acquire_lease,
+    release_lease,
+)
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    file_engine = create_db_engine(f"sqlite:///{tmp_path / 'coordinator.db'}")
+    Base.metadata.create_all(bind=file_engine)
+    yield sessionmaker(bind=file_engine)
+    file_engine.dispose()
+
+
+class FakeDetection:
+    def __init__(self):
+        self.modes: list[DetectionMode] = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, db, mode=DetectionMode.FULL):
+        self.modes.append(mode)
+        self.started.set()
+        self.release.wait(5)
+        return DetectionRunResponse(
+            mode=mode,
+            previous_issues_cleared=0,
+            new_issues_found=len(self.modes),
+            issues_by_type={},
+        )
+
+
+@pytest.fixture
+def fake_detection(monkeypatch):
+    fake = FakeDetection()
+    monkeypatch.setattr(coordination, "run_detection", fake)
+    return fake
+
+
+def _start(coordinator, sessions, mode=DetectionMode.FULL):
+    results = {}
+
+    def call():
+        with sessions() as db:
+            try:
+                results["response"] = coordinator.run(db, mode)
+            except Exception as exc:
+                results["error"] = exc
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    return thread, results
+
+
+def _wait_idle(coordinator):
+    deadline = time.monotonic() + 5
+    while not coordinator.idle():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_the_in_flight_run(self, sessions, fake_detection):
+        coordinator = DetectionCoordinator()
+        leader, leader_result = _start(coordinator, sessions)
+        assert fake_detection.started.wait(5)
+
+        followers = [_start(coordinator, sessions) for _ in range(5)]
+        time.sleep(0.1)
+        fake_detection.release.set()
+        for thread, _ in [(leader, leader_result), *followers]:
+            thread.join(5)
+
+        responses = [leader_result["response"]] + [result["response"] for _, result in followers]
+        assert all(response is responses[0] for response in responses)
+        _wait_idle(coordinator)
+        assert len(fake_detection.modes) == 1
+
+    def test_uncovered_callers_queue_a_single_follow_up(self, sessions, fake_detection):
+        coordinator = DetectionCoordinator()
+        leader, _ = _start(coordinator, sessions, DetectionMode.INCREMENTAL)
+        assert fake_detection.started.wait(5)
+
+        callers = [_start(coordinator, sessions, DetectionMode.FULL) for _ in range(3)]
+        time.sleep(0.1)
+        fake_detection.release.set()
+        for thread, _ in [(leader, None), *callers]:
+            thread.join(5)
+
+        responses = [result["response"] for _, result in callers]
+        assert all(response is responses[0] for response in responses)
+        assert fake_detection.modes == [DetectionMode.INCREMENTAL, DetectionMode.FULL]
+
+    def test_sequential_calls_each_run(self, sessions, fake_detection):
+        fake_detection.release.set()
+        coordinator = DetectionCoordinator()
+
+        with sessions() as db:
+            first = coordinator.run(db)
+            second = coordinator.run(db)
+
+        assert (first.new_issues_found, second.new_issues_found) == (1, 2)
+
+    def test_full_request_during_incremental_run_waits_for_full_follow_up(
+        self, sessions, fake_detection
+    ):
+        coordinator = DetectionCoordinator()
+        leader, _ = _start(coordinator, sessions, DetectionMode.INCREMENTAL)
+        assert fake_detection.started.wait(5)
+
+        incremental, incremental_result = _start(coordinator, sessions, DetectionMode.INCREMENTAL)
+        full, full_result = _start(coordinator, sessions, DetectionMode.FULL)
+        time.sleep(0.1)
+        fake_detection.release.set()
+        for thread in (leader, incremental, full):
+            thread.join(5)
+
+        assert incremental_result["response"].mode == DetectionMode.INCREMENTAL
+        assert full_result["response"].mode == DetectionMode.FULL
+        assert fake_detection.modes == [DetectionMode.INCREMENTAL, DetectionMode.FULL]
+
+    def test_failure_is_shared_and_releases_the_lease(self, sessions, monkeypatch):
+        def failing_detection(db, mode):
+            raise RuntimeError("detection failed")
+
+        monkeypatch.setattr(coordination, "run_detection", failing_detection)
+        coordinator = DetectionCoordinator()
+
+        with sessions() as db:
+            with pytest.raises(RuntimeError, match="detection failed"):
+                coordinator.run(db)
+            assert acquire_lease(db, "other-process")
+
+
+class TestDetectionLease:
+    def test_lease_is_exclusive_until_released(self, sessions):
+        with sessions() as db:
+            assert acquire_lease(db, "process-a")
+            assert not acquire_lease(db, "process-b")
+
+            release_lease(db, "process-a")
+
+            assert acquire_lease(db, "process-b")
+
+    def test_expired_lease_can_be_taken_over(self, sessions):
+        with sessions() as db:
+            assert acquire_lease(db, "crashed-process")
+            db.execute(update(DetectionLease).values(expires_at=datetime(2000, 1, 1)))
+            db.commit()
+
+            assert acquire_lease(db, "process-b")
+
+    def test_run_waits_then_gives_up_when_another_process_holds_the_lease(
+        self, sessions, fake_detection, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "detection_lease_wait_seconds", 0.1)
+        monkeypatch.setattr(settings, "detection_lease_poll_seconds", 0.02)
+        fake_detection.release.set()
+
+        with sessions() as db:
+            acquire_lease(db, "other-process")
+            with pytest.raises(DetectionBusy):
+                DetectionCoordinator().run(db)
+
+        assert fake_detection.modes == []
+
+    def test_lease_is_renewed_while_detection_runs(self, sessions, fake_detection, monkeypatch):
+        monkeypatch.setattr(settings, "detection_lease_seconds", 1)
+        coordinator = DetectionCoordinator()
+        leader, result = _start(coordinator, sessions)
+        assert fake_detection.started.wait(5)
+
+        time.sleep(1.5)
+        with sessions() as db:
+            taken_over = acquire_lease(db, "other-process")
+        fake_detection.release.set()
+        leader.join(5)
+
+        assert not taken_over
+        assert "response" in result
+        with sessions() as db:
+            assert acquire_lease(db, "other-process")
+
+    def test_endpoint_returns_409_while_another_process_runs(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "detection_lease_wait_seconds", 0)
+        monkeypatch.setattr(coordination, "acquire_lease", lambda db, owner: False)
+
+        response = client.post("/api/v1/detection/run")
+
+        assert response.status_code == 409
@@ -0,0 +1,295 @@
+import json
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.config import Settings, settings
+from app.database import Base, create_db_engine
+from app.enums import DetectionEngine, DetectionMode
+from app.models import (
+    PaymentConfirmation,
+    ReconciliationIssue,
+    SettlementRecord,
+    TransactionLifecycle,
+    VoucherRecord,
+)
+from app.rules.engine import merge_by_transaction
+from app.schemas import PaymentIn, SettlementIn, VoucherIn
+from app.services.detection import run_detection
+from app.services.ingestion import ingest_payments, ingest_settlements, ingest_vouchers
+from app.services.parallel_detection import partition_bounds
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+def _load(filename, schema):
+    with open(DATA_DIR / filename) as f:
+        return [schema(**record) for record in json.load(f)]
+
+
+NOW = datetime.now(UTC).replace(tzinfo=None)
+
+
+def _edge_cases():
+    now = NOW
+    vouchers = [
+        VoucherIn(transaction_id="TXN-PARITY-TOL", amount="100.00", currency="MXN",
+                  payment_method="OXXO", status="PAID", created_at=now),
+        VoucherIn(transaction_id="TXN-PARITY-ZERO", amount="0.00", currency="MXN",
+                  payment_method="OXXO", status="PAID", created_at=now),
+        VoucherIn(transaction_id="TXN-PARITY-CUR", amount="100.00", currency="MXN",
+                  payment_method="OXXO", status="PAID", created_at=now),
+        VoucherIn(transaction_id="TXN-PARITY-EXP", amount="100.00", currency="MXN",
+                  payment_method="OXXO", status="PAID", created_at=now - timedelta(days=3),
+                  expires_at=now - timedelta(days=1, microseconds=-250)),
+        VoucherIn(transaction_id="TXN-PARITY-STUCK", amount="75.50", currency="MXN",
+                  payment_method="OXXO", status="PENDING", created_at=now - timedelta(hours=80)),
+    ]
+    payments = [
+        PaymentIn(transaction_id="TXN-PARITY-TOL", amount="101.00", currency="MXN",
+                  payment_method="OXXO", status="CONFIRMED", paid_at=now),
+        PaymentIn(transaction_id="TXN-PARITY-ZERO", amount="10.00", currency="MXN",
+                  payment_method="OXXO", status="CONFIRMED", paid_at=now),
+        PaymentIn(transaction_id="TXN-PARITY-CUR", amount="100.00", currency="COP",
+                  payment_method="OXXO", status="CONFIRMED", paid_at=now),
+        PaymentIn(transaction_id="TXN-PARITY-EXP", amount="100.00", currency="MXN",
+                  payment_method="OXXO", status="CONFIRMED", paid_at=now),
+    ]
+    return vouchers, payments
+
+
+def _issue_rows(db):
+    issues = db.execute(
+        select(ReconciliationIssue).execution_options(populate_existing=True)
+    ).scalars()
+    return sorted(
+        (
+            i.transaction_id,
+            i.issue_type,
+            i.severity,
+            i.amount_at_risk,
+            i.payment_method,
+            i.currency,
+            i.description,
+            i.suggested_resolution,
+        )
+        for i in issues
+    )
+
+
+def _seed(db):
+    ingest_vouchers(db, _load("vouchers.json", VoucherIn))
+    ingest_payments(db, _load("payments.json", PaymentIn))
+    ingest_settlements(db, _load("settlements.json", SettlementIn))
+    vouchers, payments = _edge_cases()
+    ingest_vouchers(db, vouchers)
+    ingest_payments(db, payments)
+    return db
+
+
+@pytest.fixture
+def seeded_session(db_session):
+    return _seed(db_session)
+
+
+@pytest.fixture
+def committed_session(tmp_path):
+    # Worker processes open their own connections, so they only see committed data.
+    file_engine = create_db_engine(f"sqlite:///{tmp_path / 'parallel.db'}")
+    Base.metadata.create_all(bind=file_engine)
+    session = sessionmaker(bind=file_engine)()
+    yield _seed(session)
+    session.close()
+    file_engine.dispose()
+
+
+def _run_with_engine(db, monkeypatch, engine, mode=DetectionMode.FULL):
+    monkeypatch.setattr(settings, "detection_engine", engine)
+    result = run_detection(db, mode, now=NOW)
+    return result, _issue_rows(db)
+
+
+class TestEngineParity:
+    @pytest.mark.parametrize("detection_engine", [DetectionEngine.SQL, DetectionEngine.STREAMING])
+    def test_engine_matches_python_engine(self, seeded_session, monkeypatch, detection_engine):
+        python_result, python_rows = _run_with_engine(
+            seeded_session, monkeypatch, DetectionEngine.PYTHON
+        )
+        result, rows = _run_with_engine(seeded_session, monkeypatch, detection_engine)
+
+        assert python_rows
+        assert rows == python_rows
+        assert result.issues_by_type == python_result.issues_by_type
+        assert result.new_issues_found == python_result.new_issues_found
+
+    def test_streaming_engine_flushes_in_small_batches(self, seeded_session, monkeypatch):
+        _, python_rows = _run_with_engine(seeded_session, monkeypatch, DetectionEngine.PYTHON)
+        monkeypatch.setattr(settings, "detection_stream_batch_size", 3)
+        _, rows = _run_with_engine(seeded_session, monkeypatch, DetectionEngine.STREAMING)
+
+        assert rows == python_rows
+
+    def test_sql_engine_covers_every_issue_type(self, seeded_session, monkeypatch):
+        result, _ = _run_with_engine(seeded_session, monkeypatch, DetectionEngine.SQL)
+
+        assert set(result.issues_by_type) == {
+            "ORPHANED_PAYMENT",
+            "STUCK_PENDING",
+            "AMOUNT_MISMATCH",
+            "ZOMBIE_COMPLETION",
+            "POST_EXPIRATION_PAYMENT",
+        }
+
+    def test_incremental_sql_matches_incremental_python(self, seeded_session, monkeypatch):
+        _, python_rows = _run_with_engine(
+            seeded_session, monkeypatch, DetectionEngine.PYTHON, DetectionMode.INCREMENTAL
+        )
+        _run_with_engine(seeded_session, monkeypatch, DetectionEngine.PYTHON)
+        ingest_payments(seeded_session, [
+            PaymentIn(transaction_id="TXN-PARITY-LATE", amount="5.00", currency="MXN",
+                      payment_method="OXXO", status="CONFIRMED", paid_at=datetime(2026, 1, 1)),
+        ])
+        sql_result, sql_rows = _run_with_engine(
+            seeded_session, monkeypatch, DetectionEngine.SQL, DetectionMode.INCREMENTAL
+        )
+
+        assert sql_result.transactions_evaluated == 1
+        assert sql_result.issues_by_type == {"ORPHANED_PAYMENT": 1}
+        assert set(python_rows) < set(sql_rows)
+
+
+class TestParallelEngine:
+    def test_parallel_engine_matches_python_engine(self, committed_session, monkeypatch):
+        monkeypatch.setattr(settings, "detection_workers", 2)
+        python_result, python_rows = _run_with_engine(
+            committed_session, monkeypatch, DetectionEngine.PYTHON
+        )
+        result, rows = _run_with_engine(committed_session, monkeypatch, DetectionEngine.PARALLEL)
+
+        assert rows == python_rows
+        assert result.issues_by_type == python_result.issues_by_type
+
+    def test_parallel_incremental_partitions_dirty_ids(self, committed_session, monkeypatch):
+        monkeypatch.setattr(settings, "detection_workers", 3)
+        _run_with_engine(committed_session, monkeypatch, DetectionEngine.PARALLEL)
+        ingest_payments(committed_session, [
+            PaymentIn(transaction_id=f"TXN-PARALLEL-{i}", amount="5.00", currency="MXN",
+                      payment_method="OXXO", status="CONFIRMED", paid_at=datetime(2026, 1, 1))
+            for i in range(5)
+        ])
+
+        result, _ = _run_with_engine(
+            committed_session, monkeypatch, DetectionEngine.PARALLEL, DetectionMode.INCREMENTAL
+        )
+
+        assert result.transactions_evaluated == 5
+        assert result.issues_by_type == {"ORPHANED_PAYMENT": 5}
+        assert result.issues_inserted == 5
+
+    def test_partition_bounds_split_transactions_into_contiguous_ranges(self, seeded_session):
+        ids = sorted(seeded_session.execute(select(TransactionLifecycle.transaction_id)).scalars())
+
+        bounds = partition_bounds(seeded_session, 3)
+
+        assert len(bounds) == 3
+        assert bounds[0][0] is None and bounds[-1][1] is None
+        assert all(left[1] == right[0] for left, right in zip(bounds, bounds[1:]))
+        sizes = [
+            sum(1 for i in ids if (low is None or i >= low) and (high is None or i < high))
+            for low, high in bounds
+        ]
+        assert sum(sizes) == len(ids)
+        assert max(sizes) - min(sizes) <= 1
+
+
+class TestIssueTextRefresh:
+    @pytest.mark.parametrize("detection_engine", [DetectionEngine.PYTHON, DetectionEngine.SQL])
+    def test_rerun_at_later_time_keeps_row_and_renders_new_age(
+        self, db_session, monkeypatch, detection_engine
+    ):
+        monkeypatch.setattr(settings, "detection_engine", detection_engine)
+        now = datetime(2026, 3, 1, 12, 0, 0)
+        transaction_id = f"TXN-TEXT-{detection_engine.upper()}"
+        ingest_vouchers(db_session, [
+            VoucherIn(transaction_id=transaction_id, amount="10.00", currency="MXN",
+                      payment_method="OXXO", status="PENDING",
+                      created_at=now - timedelta(hours=80)),
+        ])
+        query = select(ReconciliationIssue).where(
+            ReconciliationIssue.transaction_id == transaction_id
+        ).execution_options(populate_existing=True)
+
+        run_detection(db_session, now=now)
+        first = db_session.execute(query).scalar_one()
+        assert "80.0 hours" in first.description
+        first_detected_at = first.detected_at
+        result = run_detection(db_session, now=now + timedelta(hours=5))
+        second = db_session.execute(query).scalar_one()
+
+        assert result.issues_updated == 0
+        assert second.id == first.id
+        assert second.detected_at == first_detected_at
+        assert "85.0 hours" in second.description
+
+    @pytest.mark.parametrize("detection_engine", [DetectionEngine.PYTHON, DetectionEngine.SQL])
+    def test_crossing_high_threshold_updates_severity(
+        self, db_session, monkeypatch, detection_engine
+    ):
+        monkeypatch.setattr(settings, "detection_engine", detection_engine)
+        now = datetime(2026, 3, 1, 12, 0, 0)
+        transaction_id = f"TXN-ESCALATE-{detection_engine.upper()}"
+        ingest_vouchers(db_session, [
+            VoucherIn(transaction_id=transaction_id, amount="10.00", currency="MXN",
+                      payment_method="OXXO", status="PENDING",
+                      created_at=now - timedelta(hours=118)),
+        ])
+
+        run_detection(db_session, now=now)
+        result = run_detection(db_session, now=now + timedelta(hours=5))
+
+        issue = db_session.execute(
+            select(ReconciliationIssue).where(ReconciliationIssue.transaction_id == transaction_id)
+        ).scalar_one()
+        assert result.issues_updated == 1
+        assert issue.severity == "HIGH"
+        assert "123.0 hours" in issue.description
+
+
+class TestEngineSetting:
+    def test_engine_is_parsed_from_environment(self, monkeypatch):
+        monkeypatch.setenv("DETECTION_ENGINE", "sql")
+
+        assert Settings().detection_engine is DetectionEngine.SQL
+
+    def test_unknown_engine_is_rejected(self, monkeypatch):
+        monkeypatch.setenv("DETECTION_ENGINE", "sqll")
+
+        with pytest.raises(ValidationError):
+            Settings()
+
+
+class TestMergeByTransaction:
+    def test_aligns_sorted_streams_on_transaction_id(self):
+        vouchers = [VoucherRecord(transaction_id=t) for t in ("A", "C", "D")]
+        payments = [PaymentConfirmation(transaction_id=t) for t in ("B", "C")]
+        settlements = [SettlementRecord(transaction_id=t) for t in ("D", "E")]
+
+        merged = [
+            tuple(r.transaction_id if r else None for r in row)
+            for row in merge_by_transaction(vouchers, payments, settlements)
+        ]
+
+        assert merged == [
+            ("A", None, None),
+            (None, "B", None),
+            ("C", "C", None),
+            ("D", None, "D"),
+            (None, None, "E"),
+        ]
+
+    def test_empty_streams_yield_nothing(self):
+        assert list(merge_by_transaction([], [], [])) == []
@@ -3,12 +3,21 @@ from decimal import Decimal
 
 import pytest
 
-from app.enums import IssueType, PaymentStatus, Severity
+from app.config import settings
+from app.enums import IssueTemplate, IssueType, PaymentStatus, Severity
 from app.models import PaymentConfirmation, ReconciliationIssue, SettlementRecord, VoucherRecord
 from app.rules.amount_mismatch import detect_amount_mismatch
+from app.rules.orphan_matching import CandidateIndex, VoucherCandidate
 from app.rules.orphaned import detect_orphaned_payments
 from app.rules.post_expiration import detect_post_expiration_payments
+from app.rules.snapshots import (
+    PaymentSnapshot,
+    VoucherSnapshot,
+    from_minor_units,
+    to_minor_units,
+)
 from app.rules.stuck_pending import detect_stuck_pending
+from app.rules.templates import render_description, render_resolution
 from app.rules.zombie import detect_zombie_completions
 
 
@@ -135,6 +144,95 @@ class TestOrphanedPayments:
         assert "TXN-DESC" in issues[0].description
 
 
+def make_candidate(
+    transaction_id: str,
+    amount_minor: int = 50000,
+    currency: str = "MXN",
+    store_id: str | None = "STORE-1",
+    created_at: datetime | None = None,
+) -> VoucherCandidate:
+    return VoucherCandidate(
+        transaction_id=transaction_id,
+        amount_minor=amount_minor,
+        currency=currency,
+        store_id=store_id,
+        created_at=created_at or datetime(2026, 1, 1, 12, 0, 0),
+    )
+
+
+class TestOrphanMatching:
+    paid_at = datetime(2026, 1, 1, 14, 0, 0)
+
+    def test_exact_amount_same_store_within_window_is_matched(self):
+        index = CandidateIndex([make_candidate("TXN-0O1")])
+
+        matches = index.best_matches("MXN", "STORE-1", 50000, self.paid_at)
+
+        assert [m.transaction_id for m in matches] == ["TXN-0O1"]
+        assert matches[0].amount_difference_minor == 0
+        assert matches[0].seconds_apart == 7200
+
+    def test_other_store_or_currency_is_not_matched(self):
+        index = CandidateIndex([
+            make_candidate("TXN-STORE", store_id="STORE-2"),
+            make_candidate("TXN-CUR", currency="COP"),
+        ])
+
+        assert index.best_matches("MXN", "STORE-1", 50000, self.paid_at) == []
+
+    def test_voucher_outside_window_is_not_matched(self, monkeypatch):
+        monkeypatch.setattr(settings, "orphan_match_window_hours", 1)
+        index = CandidateIndex([make_candidate("TXN-OLD")])
+
+        assert index.best_matches("MXN", "STORE-1", 50000, self.paid_at) == []
+
+    def test_amount_outside_tolerance_is_not_matched(self):
+        index = CandidateIndex([make_candidate("TXN-OFF", amount_minor=50001)])
+
+        assert index.best_matches("MXN", "STORE-1", 50000, self.paid_at) == []
+
+    def test_tolerance_ranks_closest_amount_then_closest_time(self, monkeypatch):
+        monkeypatch.setattr(settings, "orphan_match_amount_tolerance", 1.0)
+        index = CandidateIndex([
+            make_candidate("TXN-NEAR-AMOUNT", amount_minor=50050),
+            make_candidate("TXN-EXACT-EARLY", created_at=datetime(2026, 1, 1, 8, 0, 0)),
+            make_candidate("TXN-EXACT-LATE", created_at=datetime(2026, 1, 1, 13, 0, 0)),
+            make_candidate("TXN-TOO-FAR", amount_minor=50101),
+        ])
+
+        matches = index.best_matches("MXN", "STORE-1", 50000, self.paid_at)
+
+        assert [m.transaction_id for m in matches] == [
+            "TXN-EXACT-LATE",
+            "TXN-EXACT-EARLY",
+            "TXN-NEAR-AMOUNT",
+        ]
+        assert matches[2].as_dict()["amount_difference"] == "0.50"
+
+    def test_suggestions_are_capped(self, monkeypatch):
+        monkeypatch.setattr(settings, "orphan_match_max_suggestions", 2)
+        index = CandidateIndex([make_candidate(f"TXN-CAND-{i}") for i in range(5)])
+
+        assert len(index.best_matches("MXN", "STORE-1", 50000, self.paid_at)) == 2
+
+    def test_lookup_scales_to_many_pending_vouchers(self):
+        start = datetime(2026, 1, 1)
+        index = CandidateIndex(
+            make_candidate(
+                f"TXN-BULK-{i}",
+                amount_minor=10000 + i % 500,
+                store_id=f"STORE-{i % 40}",
+                created_at=start + timedelta(minutes=i),
+            )
+            for i in range(50000)
+        )
+
+        matches = index.best_matches("MXN", "STORE-7", 10007, start + timedelta(minutes=7))
+
+        assert len(index) == 50000
+        assert matches[0].transaction_id == "TXN-BULK-7"
+
+
 class TestStuckPending:
     def test_73h_pending_no_confirmation_medium(self):
         created = datetime(2026, 1, 1, 0, 0, 0)
@@ -155,6 +253,15 @@ class TestStuckPending:
         assert len(issues) == 1
         assert issues[0].severity == Severity.HIGH
 
+    def test_params_do_not_change_as_the_voucher_ages(self):
+        created = datetime(2026, 1, 1, 0, 0, 0)
+        voucher = make_voucher(created_at=created)
+
+        first = detect_stuck_pending([voucher], set(), created + timedelta(hours=80))[0]
+        later = detect_stuck_pending([voucher], set(), created + timedelta(hours=85))[0]
+
+        assert first.params == later.params == {"created_at": "2026-01-01T00:00:00"}
+
     def test_71h_pending_not_flagged(self):
         created = datetime(2026, 1, 1, 0, 0, 0)
         now = created + timedelta(hours=71)
@@ -616,3 +723,109 @@ class TestPostExpirationPayments:
 
         assert len(issues) == 1
         assert issues[0].transaction_id == "TXN-LATE"
+
+
+class TestIssueTemplates:
+    def test_issue_stores_template_and_params_instead_of_text(self):
+        voucher = make_voucher(amount=Decimal("100.00"))
+        payment = make_payment(amount=Decimal("103.00"))
+
+        issue = detect_amount_mismatch([(voucher, payment)])[0]
+
+        assert issue.template == IssueTemplate.AMOUNT_MISMATCH
+        assert issue.params == {
+            "voucher_amount": "100.00",
+            "voucher_currency": "MXN",
+            "payment_amount": "103.00",
+            "payment_currency": "MXN",
+            "difference_pct": 3.0,
+        }
+        assert "description" not in ReconciliationIssue.__table__.columns
+        assert issue.description.endswith("(difference: 3.00%)")
+
+    def test_amount_mismatch_resolution_depends_on_severity(self):
+        assert render_resolution(IssueTemplate.AMOUNT_MISMATCH, Severity.LOW).startswith(
+            "Auto-approve"
+        )
+        assert render_resolution(IssueTemplate.AMOUNT_MISMATCH, Severity.HIGH).startswith(
+            "Escalate"
+        )
+
+    def test_orphan_resolution_names_best_suggested_match(self):
+        matches = [{"transaction_id": "TXN-BEST"}, {"transaction_id": "TXN-NEXT"}]
+
+        resolution = render_resolution(IssueTemplate.ORPHANED_PAYMENT, Severity.HIGH, matches)
+
+        assert "TXN-BEST" in resolution
+        assert "TXN-NEXT" not in resolution
+        assert render_resolution(IssueTemplate.ORPHANED_PAYMENT, Severity.HIGH).startswith(
+            "Investigate"
+        )
+
+    def test_every_template_renders(self):
+        params = {
+            IssueTemplate.STUCK_PENDING: {"created_at": "2026-01-01T00:00:00"},
+            IssueTemplate.CURRENCY_MISMATCH: {"voucher_currency": "MXN", "payment_currency": "COP"},
+            IssueTemplate.AMOUNT_MISMATCH: {
+                "voucher_amount": "1.00", "voucher_currency": "MXN",
+                "payment_amount": "2.00", "payment_currency": "MXN", "difference_pct": 100,
+            },
+            IssueTemplate.POST_EXPIRATION_PAYMENT: {
+                "paid_at": "2026-01-02T00:00:00", "expires_at": "2026-01-01T00:00:00",
+            },
+        }
+        as_of = datetime(2026, 1, 4, 8, 2, 0)
+        for template in IssueTemplate:
+            description = render_description(template, "TXN-TPL", params.get(template), as_of)
+            assert "TXN-TPL" in description
+            assert render_resolution(template, Severity.HIGH)
+
+        assert "80.0 hours" in render_description(
+            IssueTemplate.STUCK_PENDING, "TXN-TPL", params[IssueTemplate.STUCK_PENDING], as_of
+        )
+        assert "80.4 hours" in render_description(
+            IssueTemplate.STUCK_PENDING, "TXN-TPL", {"age_hours": 80.4}
+        )
+
+
+class TestSnapshots:
+    def test_minor_unit_round_trip(self):
+        assert to_minor_units(Decimal("1234.56")) == 123456
+        assert from_minor_units(123456) == Decimal("1234.56")
+        assert str(from_minor_units(50000)) == "500.00"
+
+    def test_snapshots_use_slots(self):
+        voucher = VoucherSnapshot("TXN-SNAP", 50000, "MXN", "OXXO", "PENDING",
+                                  datetime(2026, 1, 1), None)
+
+        assert not hasattr(voucher, "__dict__")
+        assert voucher.amount == Decimal("500.00")
+
+    def test_rules_accept_snapshots(self):
+        voucher = VoucherSnapshot("TXN-SNAP", 10000, "MXN", "OXXO", "PAID",
+                                  datetime(2026, 1, 1), datetime(2026, 1, 2))
+        payment = PaymentSnapshot("TXN-SNAP", 11500, "MXN", "OXXO", "CONFIRMED",
+                                  datetime(2026, 1, 3))
+
+        mismatch = detect_amount_mismatch([(voucher, payment)])
+        expired = detect_post_expiration_payments([(voucher, payment)])
+
+        assert mismatch[0].severity == Severity.HIGH
+        assert mismatch[0].amount_at_risk == Decimal("15.00")
+        assert "voucher=100.00 MXN" in mismatch[0].description
+        assert expired[0].amount_at_risk == Decimal("115.00")
+
+    def test_snapshot_and_orm_records_give_same_issues(self):
+        orm_pair = (make_voucher(amount=Decimal("200.00")), make_payment(amount=Decimal("190.00")))
+        snapshot_pair = (
+            VoucherSnapshot("TXN-001", 20000, "MXN", "OXXO", "PENDING", datetime(2026, 1, 1), None),
+            PaymentSnapshot("TXN-001", 19000, "MXN", "OXXO", "CONFIRMED", datetime(2026, 1, 1)),
+        )
+
+        orm_issue = detect_amount_mismatch([orm_pair])[0]
+        snapshot_issue = detect_amount_mismatch([snapshot_pair])[0]
+
+        assert snapshot_issue.description == orm_issue.description
+        assert snapshot_issue.severity == orm_issue.severity
+        assert snapshot_issue.amount_at_risk == orm_issue.amount_at_risk
+
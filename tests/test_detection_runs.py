@@ -0,0 +1,170 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base, create_db_engine
+from app.enums import DetectionEngine, DetectionRunStatus, IssueType
+from app.models import DetectionRun
+from app.schemas import PaymentIn
+from app.services import detection
+from app.services.detection import run_detection
+from app.services.ingestion import ingest_payments
+from app.services.run_history import list_runs, percentile, run_trends
+
+RULES = {issue_type.value for issue_type in IssueType}
+
+
+def _payment(transaction_id):
+    return PaymentIn(transaction_id=transaction_id, amount="50.00", currency="MXN",
+                     payment_method="OXXO", status="CONFIRMED",
+                     paid_at=datetime(2026, 1, 1, 12, 0, 0))
+
+
+def _run(run_id, wall_ms, rule_ms, status=DetectionRunStatus.SUCCEEDED):
+    timing = {"wall_ms": rule_ms, "cpu_ms": rule_ms}
+    return DetectionRun(id=run_id, wall_ms=wall_ms, rule_timings={"ORPHANED_PAYMENT": timing},
+                        phase_timings={}, status=status)
+
+
+@pytest.fixture
+def file_session(tmp_path):
+    # A failed run rolls back to the root transaction, which the shared fixtures hold open.
+    file_engine = create_db_engine(f"sqlite:///{tmp_path / 'runs.db'}")
+    Base.metadata.create_all(bind=file_engine)
+    session = sessionmaker(bind=file_engine)()
+    yield session
+    session.close()
+    file_engine.dispose()
+
+
+class TestRunRecording:
+    @pytest.mark.parametrize(
+        "detection_engine",
+        [DetectionEngine.PYTHON, DetectionEngine.STREAMING, DetectionEngine.SQL],
+    )
+    def test_run_records_rule_timings_and_rows(self, db_session, monkeypatch, detection_engine):
+        monkeypatch.setattr(settings, "detection_engine", detection_engine)
+        ingest_payments(db_session, [_payment("TXN-RUNS-001")])
+
+        result = run_detection(db_session)
+
+        run = db_session.get(DetectionRun, result.run_id)
+        assert run.engine == detection_engine
+        assert run.mode == "full"
+        assert run.status == DetectionRunStatus.SUCCEEDED
+        assert set(run.rule_timings) == RULES
+        assert run.issues_found == result.new_issues_found
+        assert run.issues_by_type == result.issues_by_type
+        assert run.wall_ms >= 0 and run.finished_at >= run.started_at
+        assert "merge_issues" in run.phase_timings
+        if detection_engine != DetectionEngine.SQL:
+            assert run.rows_loaded["payment_confirmations"] >= 1
+            assert "stage_issues" in run.phase_timings
+
+    def test_failed_run_is_recorded_with_its_error(self, file_session, monkeypatch):
+        def broken_merge(db, now, scope=None):
+            raise RuntimeError("merge exploded")
+
+        monkeypatch.setattr(detection, "merge_staged_issues", broken_merge)
+        ingest_payments(file_session, [_payment("TXN-RUNS-FAIL")])
+
+        with pytest.raises(RuntimeError, match="merge exploded"):
+            run_detection(file_session)
+
+        run = file_session.execute(select(DetectionRun)).scalar_one()
+        assert run.status == DetectionRunStatus.FAILED
+        assert run.error == "RuntimeError: merge exploded"
+        assert run.issues_found is None
+        assert set(run.rule_timings) == RULES
+        assert list_runs(file_session).trends["full"].failures == 1
+
+    def test_trace_memory_records_peak(self, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "detection_trace_memory", True)
+
+        run = db_session.get(DetectionRun, run_detection(db_session).run_id)
+
+        assert run.peak_traced_kb is not None
+
+    def test_rss_growth_is_measured_across_the_run(self, db_session, monkeypatch):
+        readings = iter([204_800, 266_240])
+        monkeypatch.setattr(detection, "_peak_rss_kb", lambda: next(readings))
+
+        run = db_session.get(DetectionRun, run_detection(db_session).run_id)
+
+        assert run.process_peak_rss_kb == 266_240
+        assert run.peak_rss_growth_kb == 61_440
+
+    def test_history_is_trimmed(self, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "detection_run_history_limit", 2)
+
+        run_ids = [run_detection(db_session).run_id for _ in range(3)]
+
+        remaining = db_session.execute(select(func.count(DetectionRun.id))).scalar()
+        assert remaining == 2
+        assert db_session.get(DetectionRun, run_ids[0]) is None
+
+
+class TestRunTrends:
+    def test_percentile_is_nearest_rank(self):
+        values = [float(value) for value in range(1, 21)]
+
+        assert percentile(values, 0.5) == 10.0
+        assert percentile(values, 0.95) == 19.0
+        assert percentile([7.0], 0.95) == 7.0
+
+    def test_trends_cover_duration_and_rules(self):
+        trends = run_trends([_run(i, wall_ms=i * 10.0, rule_ms=float(i)) for i in range(1, 11)])
+
+        assert trends.runs == 10
+        assert (trends.wall_ms.p50, trends.wall_ms.p95) == (50.0, 100.0)
+        assert trends.rules["ORPHANED_PAYMENT"].p50 == 5.0
+
+    def test_failed_runs_are_counted_but_left_out_of_percentiles(self):
+        runs = [_run(1, wall_ms=10.0, rule_ms=1.0),
+                _run(2, wall_ms=9000.0, rule_ms=1.0, status=DetectionRunStatus.FAILED)]
+
+        trends = run_trends(runs)
+
+        assert (trends.runs, trends.failures) == (2, 1)
+        assert trends.wall_ms.p95 == 10.0
+
+    def test_empty_history_has_no_trends(self):
+        trends = run_trends([])
+
+        assert trends.runs == 0
+        assert trends.wall_ms is None
+
+
+class TestRunsEndpoint:
+    def test_lists_recent_runs_newest_first(self, client):
+        first = client.post("/api/v1/detection/run").json()["run_id"]
+        second = client.post("/api/v1/detection/run").json()["run_id"]
+
+        response = client.get("/api/v1/detection/runs", params={"limit": 2})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [run["id"] for run in data["items"]] == [second, first]
+        assert set(data["items"][0]["rule_timings"]) == RULES
+        assert data["trends"]["full"]["runs"] == 2
+        assert set(data["trends"]["full"]["rules"]) == RULES
+
+    def test_trends_are_computed_per_mode(self, client):
+        client.post("/api/v1/detection/run")
+        client.post("/api/v1/detection/run", params={"mode": "incremental"})
+
+        data = client.get("/api/v1/detection/runs", params={"limit": 2}).json()
+
+        assert set(data["trends"]) == {"full", "incremental"}
+        assert data["trends"]["full"]["runs"] == data["trends"]["incremental"]["runs"] == 1
+
+    def test_filters_by_mode(self, client):
+        client.post("/api/v1/detection/run", params={"mode": "incremental"})
+
+        data = client.get("/api/v1/detection/runs", params={"mode": "incremental"}).json()
+
+        assert data["items"]
+        assert {run["mode"] for run in data["items"]} == {"incremental"}
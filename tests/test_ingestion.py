@@ -1,7 +1,12 @@
+import asyncio
+import json
 from decimal import Decimal
 
 import pytest
 
+from app.config import settings
+from app.services.ingestion import _ndjson_lines
+
 
 def _make_voucher(
     transaction_id="TXN-001",
@@ -111,6 +116,45 @@ class TestIngestVouchers:
         assert data["created"] == 3
         assert data["duplicates"] == 0
 
+    def test_duplicate_within_single_batch_is_counted_once(self, client):
+        vouchers = [
+            _make_voucher(transaction_id="TXN-INBATCH-001"),
+            _make_voucher(transaction_id="TXN-INBATCH-001", amount="999.00"),
+            _make_voucher(transaction_id="TXN-INBATCH-002"),
+        ]
+
+        response = client.post("/api/v1/ingest/vouchers", json=vouchers)
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["received"] == 3
+        assert data["created"] == 2
+        assert data["duplicates"] == 1
+
+    def test_batch_mixing_new_and_existing_ids(self, client):
+        client.post("/api/v1/ingest/vouchers", json=[_make_voucher(transaction_id="TXN-MIX-001")])
+
+        response = client.post("/api/v1/ingest/vouchers", json=[
+            _make_voucher(transaction_id="TXN-MIX-001"),
+            _make_voucher(transaction_id="TXN-MIX-002"),
+        ])
+
+        data = response.json()
+        assert data["created"] == 1
+        assert data["duplicates"] == 1
+
+    def test_large_batch_spanning_multiple_lookup_chunks(self, client):
+        first = [_make_voucher(transaction_id=f"TXN-BULK-{i:05d}") for i in range(600)]
+        client.post("/api/v1/ingest/vouchers", json=first)
+
+        second = [_make_voucher(transaction_id=f"TXN-BULK-{i:05d}") for i in range(1200)]
+        response = client.post("/api/v1/ingest/vouchers", json=second)
+
+        data = response.json()
+        assert data["received"] == 1200
+        assert data["created"] == 600
+        assert data["duplicates"] == 600
+
     def test_invalid_voucher_data_returns_422(self, client):
         invalid_payload = [{"transaction_id": "TXN-BAD"}]
 
@@ -136,6 +180,18 @@ class TestIngestPayments:
 
         assert response.status_code == 422
 
+    def test_duplicate_payment_within_batch_is_skipped(self, client):
+        payments = [
+            _make_payment(transaction_id="TXN-PAY-DUP"),
+            _make_payment(transaction_id="TXN-PAY-DUP"),
+        ]
+
+        response = client.post("/api/v1/ingest/payments", json=payments)
+
+        data = response.json()
+        assert data["created"] == 1
+        assert data["duplicates"] == 1
+
 
 class TestIngestSettlements:
     def test_valid_settlement_returns_201(self, client):
@@ -146,3 +202,95 @@ class TestIngestSettlements:
         assert data["received"] == 1
         assert data["created"] == 1
         assert data["duplicates"] == 0
+
+
+def _ndjson(records):
+    return "\n".join(json.dumps(r) for r in records) + "\n"
+
+
+NDJSON_HEADERS = {"Content-Type": "application/x-ndjson"}
+
+
+class TestIngestNdjsonStream:
+    def test_stream_ingests_all_lines(self, client):
+        body = _ndjson([_make_voucher(transaction_id=f"TXN-ND-{i:03d}") for i in range(5)])
+
+        response = client.post(
+            "/api/v1/ingest/vouchers/stream", content=body, headers=NDJSON_HEADERS
+        )
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["received"] == 5
+        assert data["created"] == 5
+        assert data["duplicates"] == 0
+        assert data["invalid"] == 0
+        assert data["errors"] == []
+
+    def test_stream_reports_invalid_lines_and_keeps_valid_ones(self, client):
+        body = "\n".join([
+            json.dumps(_make_payment(transaction_id="TXN-ND-PAY-001")),
+            "{not json",
+            json.dumps({"transaction_id": "TXN-ND-PAY-BAD"}),
+            "",
+            json.dumps(_make_payment(transaction_id="TXN-ND-PAY-002")),
+        ])
+
+        response = client.post(
+            "/api/v1/ingest/payments/stream", content=body, headers=NDJSON_HEADERS
+        )
+
+        data = response.json()
+        assert data["received"] == 4
+        assert data["created"] == 2
+        assert data["invalid"] == 2
+        assert [e["line"] for e in data["errors"]] == [2, 3]
+
+    def test_stream_commits_in_chunks_and_counts_duplicates(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "ingest_stream_chunk_size", 2)
+        records = [_make_settlement(transaction_id=f"TXN-ND-SET-{i}") for i in range(3)]
+        records.append(_make_settlement(transaction_id="TXN-ND-SET-0"))
+
+        response = client.post(
+            "/api/v1/ingest/settlements/stream", content=_ndjson(records), headers=NDJSON_HEADERS
+        )
+
+        data = response.json()
+        assert data["received"] == 4
+        assert data["created"] == 3
+        assert data["duplicates"] == 1
+
+    def test_stream_rejects_oversized_lines_and_keeps_reading(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "ingest_stream_max_line_bytes", 400)
+        body = "\n".join([
+            json.dumps(_make_payment(transaction_id="TXN-ND-LONG-001")),
+            json.dumps(_make_payment(transaction_id="TXN-ND-LONG-BAD")) + " " * 1000,
+            json.dumps(_make_payment(transaction_id="TXN-ND-LONG-002")),
+        ])
+
+        response = client.post(
+            "/api/v1/ingest/payments/stream", content=body, headers=NDJSON_HEADERS
+        )
+
+        data = response.json()
+        assert data["received"] == 3
+        assert data["created"] == 2
+        assert data["invalid"] == 1
+        assert data["errors"][0]["line"] == 2
+
+    def test_line_splitting_across_small_chunks(self):
+        body = b"short\n" + b"x" * 50 + b"\nlast"
+
+        async def chunks():
+            for start in range(0, len(body), 7):
+                yield body[start:start + 7]
+
+        async def collect():
+            return [line async for line in _ndjson_lines(chunks(), 20)]
+
+        assert asyncio.run(collect()) == [b"short", None, b"last"]
+
+    def test_stream_rejects_non_ndjson_content_type(self, client):
+        response = client.post("/api/v1/ingest/vouchers/stream", json=[_make_voucher()])
+
+        assert response.status_code == 415
@@ -1,5 +1,12 @@
+import csv
+import io
+import json
 from decimal import Decimal
 
+import pytest
+
+from app.config import settings
+
 
 def _make_voucher(transaction_id, amount="100.00", payment_method="OXXO", currency="MXN",
                   status="PENDING", created_at="2025-01-01T10:00:00", expires_at=None):
@@ -146,6 +153,113 @@ class TestIssuesFiltering:
         assert data["items"] == []
 
 
+class TestIssuesCursorPagination:
+    def test_cursor_walks_every_issue_once_in_stable_order(self, client):
+        _seed_diverse_issues(client)
+        total = client.get("/api/v1/issues").json()["total"]
+        expected = []
+        for offset in range(0, total, 200):
+            page = client.get("/api/v1/issues", params={"limit": 200, "offset": offset}).json()
+            expected += [item["id"] for item in page["items"]]
+
+        ids, cursor = [], None
+        while True:
+            params = {"limit": 7, "include_total": False}
+            if cursor:
+                params["cursor"] = cursor
+            page = client.get("/api/v1/issues", params=params).json()
+            ids += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert ids == expected
+        assert len(ids) == len(set(ids)) == total
+
+    def test_cursor_respects_filters(self, client):
+        _seed_diverse_issues(client)
+
+        first = client.get("/api/v1/issues", params={
+            "issue_type": "ORPHANED_PAYMENT", "limit": 1,
+        }).json()
+        second = client.get("/api/v1/issues", params={
+            "issue_type": "ORPHANED_PAYMENT", "limit": 1, "cursor": first["next_cursor"],
+        }).json()
+
+        assert first["next_cursor"] is not None
+        assert second["items"][0]["issue_type"] == "ORPHANED_PAYMENT"
+        assert second["items"][0]["id"] != first["items"][0]["id"]
+
+    def test_total_can_be_skipped(self, client):
+        _seed_diverse_issues(client)
+
+        data = client.get("/api/v1/issues", params={"include_total": False}).json()
+
+        assert data["total"] is None
+        assert data["items"]
+
+    def test_invalid_cursor_returns_400(self, client):
+        response = client.get("/api/v1/issues", params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == 400
+
+
+class TestIssuesExport:
+    def test_ndjson_export_streams_filtered_rows(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "issue_export_batch_size", 1)
+        _seed_diverse_issues(client)
+
+        response = client.get("/api/v1/issues/export", params={
+            "format": "ndjson", "issue_type": "ORPHANED_PAYMENT",
+        })
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        ids = {row["transaction_id"] for row in rows}
+        assert {"TXN-ISS-ORPH-001", "TXN-ISS-ORPH-002"} <= ids
+        assert all(row["issue_type"] == "ORPHANED_PAYMENT" for row in rows)
+        assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+        assert Decimal(rows[0]["amount_at_risk"]) == Decimal("100.00")
+
+    def test_csv_export_matches_ndjson_export(self, client):
+        _seed_diverse_issues(client)
+
+        ndjson_rows = [
+            json.loads(line)
+            for line in client.get("/api/v1/issues/export").text.splitlines()
+        ]
+        response = client.get("/api/v1/issues/export", params={"format": "csv"})
+
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="issues.csv"' in response.headers["content-disposition"]
+        csv_rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["id"] for row in csv_rows] == [str(row["id"]) for row in ndjson_rows]
+        assert [row["description"] for row in csv_rows] == [
+            row["description"] for row in ndjson_rows
+        ]
+
+    def test_parquet_export_round_trips(self, client, monkeypatch):
+        pq = pytest.importorskip("pyarrow.parquet")
+        monkeypatch.setattr(settings, "issue_export_batch_size", 2)
+        _seed_diverse_issues(client)
+
+        response = client.get("/api/v1/issues/export", params={
+            "format": "parquet", "severity": "HIGH",
+        })
+
+        assert response.status_code == 200
+        table = pq.read_table(io.BytesIO(response.content))
+        assert table.num_rows >= 3
+        assert set(table.column("severity").to_pylist()) == {"HIGH"}
+        assert table.schema.field("amount_at_risk").type.scale == 2
+
+    def test_unknown_format_rejected(self, client):
+        response = client.get("/api/v1/issues/export", params={"format": "xml"})
+
+        assert response.status_code == 422
+
+
 class TestIssuesSummary:
     def test_summary_returns_correct_counts_by_type(self, client):
         _seed_diverse_issues(client)
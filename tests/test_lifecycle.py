@@ -0,0 +1,97 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app.enums import LifecycleStatus
+from app.models import TransactionLifecycle
+from app.schemas import PaymentIn, SettlementIn, VoucherIn
+from app.services.ingestion import ingest_payments, ingest_settlements, ingest_vouchers
+from app.services.lifecycle import lifecycle_status, rebuild_lifecycle
+
+
+def _voucher(transaction_id, currency="MXN", store_id="STORE-1"):
+    return VoucherIn(transaction_id=transaction_id, amount="100.00", currency=currency,
+                     payment_method="OXXO", status="PENDING", store_id=store_id,
+                     created_at=datetime(2026, 1, 1, 10, 0, 0))
+
+
+def _payment(transaction_id, currency="MXN", store_id=None):
+    return PaymentIn(transaction_id=transaction_id, amount="99.50", currency=currency,
+                     payment_method="OXXO", status="CONFIRMED", store_id=store_id,
+                     paid_at=datetime(2026, 1, 1, 12, 0, 0))
+
+
+def _settlement(transaction_id):
+    return SettlementIn(transaction_id=transaction_id, amount="99.50", currency="MXN",
+                        status="COMPLETED", settled_at=datetime(2026, 1, 2, 9, 0, 0))
+
+
+def _lifecycle(db, transaction_id):
+    return db.get(TransactionLifecycle, transaction_id, populate_existing=True)
+
+
+def _snapshot(db, prefix):
+    rows = db.execute(
+        select(TransactionLifecycle)
+        .where(TransactionLifecycle.transaction_id.like(f"{prefix}%"))
+        .order_by(TransactionLifecycle.transaction_id)
+        .execution_options(populate_existing=True)
+    ).scalars()
+    columns = [column.name for column in TransactionLifecycle.__table__.columns]
+    return [{column: getattr(row, column) for column in columns} for row in rows]
+
+
+class TestLifecycleUpsert:
+    def test_payment_only_is_orphaned(self, db_session):
+        ingest_payments(db_session, [_payment("TXN-LIFE-001", store_id="STORE-9")])
+
+        row = _lifecycle(db_session, "TXN-LIFE-001")
+
+        assert row.status == LifecycleStatus.ORPHANED
+        assert (row.has_voucher, row.has_payment, row.has_settlement) == (False, True, False)
+        assert row.payment_amount == Decimal("99.50")
+        assert row.store_id == "STORE-9"
+
+    def test_status_follows_each_source_as_it_arrives(self, db_session):
+        ingest_payments(db_session, [_payment("TXN-LIFE-010", currency="COP")])
+        ingest_vouchers(db_session, [_voucher("TXN-LIFE-010")])
+
+        row = _lifecycle(db_session, "TXN-LIFE-010")
+        assert row.status == LifecycleStatus.PARTIAL
+        assert row.currency == "MXN"
+        assert row.store_id == "STORE-1"
+
+        ingest_settlements(db_session, [_settlement("TXN-LIFE-010")])
+
+        row = _lifecycle(db_session, "TXN-LIFE-010")
+        assert row.status == LifecycleStatus.COMPLETE
+        assert row.voucher_created_at == datetime(2026, 1, 1, 10, 0, 0)
+        assert row.paid_at == datetime(2026, 1, 1, 12, 0, 0)
+        assert row.settled_at == datetime(2026, 1, 2, 9, 0, 0)
+
+    def test_duplicate_ingest_leaves_row_unchanged(self, db_session):
+        ingest_vouchers(db_session, [_voucher("TXN-LIFE-020")])
+        before = _snapshot(db_session, "TXN-LIFE-020")
+
+        ingest_vouchers(db_session, [_voucher("TXN-LIFE-020", store_id="STORE-2")])
+
+        assert _snapshot(db_session, "TXN-LIFE-020") == before
+
+    def test_rebuild_matches_incremental_upserts(self, db_session):
+        ingest_settlements(db_session, [_settlement("TXN-LIFE-030")])
+        ingest_vouchers(db_session, [_voucher("TXN-LIFE-030"), _voucher("TXN-LIFE-031")])
+        ingest_payments(db_session, [_payment("TXN-LIFE-030"), _payment("TXN-LIFE-032")])
+        incremental = _snapshot(db_session, "TXN-LIFE-03")
+
+        rebuild_lifecycle(db_session)
+
+        assert _snapshot(db_session, "TXN-LIFE-03") == incremental
+        assert [row["status"] for row in incremental] == ["complete", "partial", "orphaned"]
+
+    def test_status_rule(self):
+        assert lifecycle_status(False, True, False) == LifecycleStatus.ORPHANED
+        assert lifecycle_status(False, True, True) == LifecycleStatus.ORPHANED
+        assert lifecycle_status(True, True, True) == LifecycleStatus.COMPLETE
+        assert lifecycle_status(True, False, True) == LifecycleStatus.PARTIAL
+        assert lifecycle_status(False, False, True) == LifecycleStatus.PARTIAL
@@ -0,0 +1,132 @@
+from app.config import settings
+from app.routers import issues as issues_router
+from app.services.response_cache import ResponseCache
+
+
+def _orphan_payment(transaction_id):
+    return {
+        "transaction_id": transaction_id,
+        "amount": "100.00",
+        "currency": "MXN",
+        "payment_method": "OXXO",
+        "status": "CONFIRMED",
+        "source_system": "payment_processor",
+        "paid_at": "2025-01-01T14:00:00",
+    }
+
+
+class TestResponseCache:
+    def test_repeated_read_is_served_from_cache(self, client, monkeypatch):
+        calls = []
+        original = issues_router.query_issues
+
+        def counting_query_issues(*args, **kwargs):
+            calls.append(kwargs)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(issues_router, "query_issues", counting_query_issues)
+
+        first = client.get("/api/v1/issues", params={"limit": 5, "severity": "HIGH"})
+        second = client.get("/api/v1/issues", params={"severity": "HIGH", "limit": 5})
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert first.headers["etag"] == second.headers["etag"]
+        assert len(calls) == 1
+
+    def test_matching_if_none_match_returns_304(self, client):
+        etag = client.get("/api/v1/issues/summary").headers["etag"]
+
+        response = client.get("/api/v1/issues/summary", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_ingestion_and_detection_invalidate_cached_responses(self, client):
+        before = client.get("/api/v1/issues/summary")
+
+        client.post("/api/v1/ingest/payments", json=[_orphan_payment("TXN-CACHE-001")])
+        after_ingest = client.get("/api/v1/issues/summary")
+        client.post("/api/v1/detection/run")
+        after_detection = client.get("/api/v1/issues/summary")
+
+        assert after_ingest.headers["etag"] != before.headers["etag"]
+        assert after_ingest.json()["total_transactions"] == before.json()["total_transactions"] + 1
+        assert after_detection.headers["etag"] != after_ingest.headers["etag"]
+        assert after_detection.json()["total_issues"] > after_ingest.json()["total_issues"]
+        stale = client.get(
+            "/api/v1/issues/summary", headers={"If-None-Match": before.headers["etag"]}
+        )
+        assert stale.status_code == 200
+
+    def test_detection_that_touches_no_issue_keeps_etag(self, client):
+        client.post("/api/v1/ingest/payments", json=[_orphan_payment("TXN-CACHE-QUIET")])
+        client.post("/api/v1/detection/run")
+        before = client.get("/api/v1/issues/summary").headers["etag"]
+
+        run = client.post("/api/v1/detection/run", params={"mode": "incremental"}).json()
+        after = client.get("/api/v1/issues/summary").headers["etag"]
+
+        assert run["transactions_evaluated"] == 0
+        assert after == before
+
+    def test_rerun_refreshes_cached_last_seen_at(self, client):
+        client.post("/api/v1/ingest/payments", json=[_orphan_payment("TXN-CACHE-SEEN")])
+        client.post("/api/v1/detection/run")
+        path = "/api/v1/transactions/TXN-CACHE-SEEN"
+        before = client.get(path)
+
+        run = client.post("/api/v1/detection/run").json()
+        after = client.get(path)
+
+        assert run["issues_inserted"] == run["issues_updated"] == run["issues_resolved"] == 0
+        assert after.headers["etag"] != before.headers["etag"]
+        stale = client.get(path, headers={"If-None-Match": before.headers["etag"]})
+        assert stale.status_code == 200
+        seen = [issue["last_seen_at"] for issue in after.json()["issues"]]
+        assert seen != [issue["last_seen_at"] for issue in before.json()["issues"]]
+
+    def test_wildcard_if_none_match_checks_existence_first(self, client):
+        client.post("/api/v1/ingest/payments", json=[_orphan_payment("TXN-CACHE-STAR")])
+        headers = {"If-None-Match": "*"}
+
+        missing = client.get("/api/v1/transactions/TXN-CACHE-STAR-404", headers=headers)
+        present = client.get("/api/v1/transactions/TXN-CACHE-STAR", headers=headers)
+
+        assert missing.status_code == 404
+        assert present.status_code == 304
+
+    def test_transaction_lookup_is_cached_but_not_found_is_not(self, client):
+        assert client.get("/api/v1/transactions/TXN-CACHE-404").status_code == 404
+
+        client.post("/api/v1/ingest/payments", json=[_orphan_payment("TXN-CACHE-404")])
+        response = client.get("/api/v1/transactions/TXN-CACHE-404")
+
+        assert response.status_code == 200
+        assert "etag" in response.headers
+
+    def test_invalid_cursor_is_not_cached(self, client):
+        assert client.get("/api/v1/issues", params={"cursor": "bad"}).status_code == 400
+        assert client.get("/api/v1/issues", params={"cursor": "bad"}).status_code == 400
+
+
+class TestResponseCacheEviction:
+    def test_least_recently_used_entry_is_evicted(self, monkeypatch):
+        monkeypatch.setattr(settings, "response_cache_max_entries", 2)
+        cache = ResponseCache()
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        cache.get("a")
+        cache.put("c", b"3")
+
+        assert cache.get("a") == b"1"
+        assert cache.get("b") is None
+        assert cache.get("c") == b"3"
+
+    def test_zero_max_entries_disables_caching(self, monkeypatch):
+        monkeypatch.setattr(settings, "response_cache_max_entries", 0)
+        cache = ResponseCache()
+        cache.put("a", b"1")
+
+        assert len(cache) == 0
@@ -0,0 +1,110 @@
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select
+
+from app.enums import DetectionMode
+from app.models import ReconciliationIssue, StuckPendingTimer
+from app.schemas import PaymentIn, VoucherIn
+from app.services.detection import run_detection
+from app.services.ingestion import ingest_payments, ingest_vouchers
+
+
+def _now():
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _voucher(transaction_id, created_at, status="PENDING"):
+    return VoucherIn(
+        transaction_id=transaction_id,
+        amount="120.00",
+        currency="MXN",
+        payment_method="OXXO",
+        status=status,
+        created_at=created_at,
+    )
+
+
+def _payment(transaction_id, status="CONFIRMED"):
+    return PaymentIn(
+        transaction_id=transaction_id,
+        amount="120.00",
+        currency="MXN",
+        payment_method="OXXO",
+        status=status,
+        paid_at=_now(),
+    )
+
+
+def _timers(db, transaction_id):
+    return db.execute(
+        select(StuckPendingTimer.due_at)
+        .where(StuckPendingTimer.transaction_id == transaction_id)
+        .order_by(StuckPendingTimer.due_at)
+    ).scalars().all()
+
+
+def _stuck_severity(db, transaction_id):
+    return db.execute(
+        select(ReconciliationIssue.severity).where(
+            ReconciliationIssue.transaction_id == transaction_id,
+            ReconciliationIssue.issue_type == "STUCK_PENDING",
+        )
+    ).scalar_one_or_none()
+
+
+class TestStuckTimers:
+    def test_pending_voucher_schedules_both_thresholds(self, db_session):
+        created_at = datetime(2026, 3, 1, 10, 0, 0)
+        ingest_vouchers(db_session, [_voucher("TXN-TIMER-001", created_at)])
+
+        assert _timers(db_session, "TXN-TIMER-001") == [
+            created_at + timedelta(hours=72),
+            created_at + timedelta(hours=120),
+        ]
+
+    def test_non_pending_voucher_schedules_nothing(self, db_session):
+        ingest_vouchers(db_session, [_voucher("TXN-TIMER-002", _now(), status="PAID")])
+
+        assert _timers(db_session, "TXN-TIMER-002") == []
+
+    def test_confirmed_payment_cancels_timers(self, db_session):
+        ingest_vouchers(db_session, [_voucher("TXN-TIMER-003", _now())])
+        ingest_payments(db_session, [_payment("TXN-TIMER-003")])
+
+        assert _timers(db_session, "TXN-TIMER-003") == []
+
+    def test_due_timers_drive_incremental_escalation(self, db_session):
+        now = _now()
+        ingest_vouchers(db_session, [_voucher("TXN-TIMER-004", now - timedelta(hours=10))])
+        run_detection(db_session, DetectionMode.INCREMENTAL, now=now)
+        assert _stuck_severity(db_session, "TXN-TIMER-004") is None
+
+        result = run_detection(db_session, DetectionMode.INCREMENTAL, now=now + timedelta(hours=63))
+        assert result.transactions_evaluated >= 1
+        assert _stuck_severity(db_session, "TXN-TIMER-004") == "MEDIUM"
+
+        result = run_detection(
+            db_session, DetectionMode.INCREMENTAL, now=now + timedelta(hours=111)
+        )
+        assert result.transactions_evaluated >= 1
+        assert _stuck_severity(db_session, "TXN-TIMER-004") == "HIGH"
+        assert _timers(db_session, "TXN-TIMER-004") == []
+
+    def test_incremental_run_without_due_timers_evaluates_nothing(self, db_session):
+        now = _now()
+        ingest_vouchers(db_session, [_voucher("TXN-TIMER-005", now)])
+        run_detection(db_session, DetectionMode.INCREMENTAL, now=now)
+
+        result = run_detection(db_session, DetectionMode.INCREMENTAL, now=now + timedelta(hours=1))
+
+        assert result.transactions_evaluated == 0
+
+    def test_full_run_rebuilds_only_future_timers(self, db_session):
+        now = _now()
+        ingest_vouchers(db_session, [_voucher("TXN-TIMER-006", now - timedelta(hours=100))])
+        db_session.query(StuckPendingTimer).delete()
+
+        run_detection(db_session, DetectionMode.FULL, now=now)
+
+        assert _timers(db_session, "TXN-TIMER-006") == [now + timedelta(hours=20)]
+        assert _stuck_severity(db_session, "TXN-TIMER-006") == "MEDIUM"
@@ -0,0 +1,90 @@
+from datetime import UTC, datetime
+
+from app.enums import DetectionMode
+from app.schemas import PaymentIn, SettlementIn, VoucherIn
+from app.services.detection import run_detection
+from app.services.ingestion import ingest_payments, ingest_settlements, ingest_vouchers
+from app.services.issues import get_summary
+from app.services.rollups import rebuild_summary
+
+
+def _now():
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _voucher(transaction_id, amount="100.00"):
+    return VoucherIn(transaction_id=transaction_id, amount=amount, currency="MXN",
+                     payment_method="OXXO", status="PAID", created_at=_now())
+
+
+def _payment(transaction_id, amount="100.00", currency="MXN"):
+    return PaymentIn(transaction_id=transaction_id, amount=amount, currency=currency,
+                     payment_method="OXXO", status="CONFIRMED", paid_at=_now())
+
+
+def _settlement(transaction_id):
+    return SettlementIn(transaction_id=transaction_id, amount="100.00", currency="MXN",
+                        status="COMPLETED", settled_at=_now())
+
+
+def _rebuilt_summary(db):
+    rebuild_summary(db)
+    return get_summary(db)
+
+
+class TestSummaryRollups:
+    def test_full_run_rollups_match_aggregates(self, db_session):
+        ingest_vouchers(db_session, [_voucher("TXN-ROLL-001")])
+        ingest_payments(db_session, [
+            _payment("TXN-ROLL-001", amount="150.00"),
+            _payment("TXN-ROLL-002"),
+        ])
+        run_detection(db_session)
+
+        summary = get_summary(db_session)
+
+        assert summary.total_issues >= 2
+        assert summary == _rebuilt_summary(db_session)
+
+    def test_incremental_run_applies_deltas(self, db_session):
+        ingest_vouchers(db_session, [_voucher("TXN-ROLL-010")])
+        ingest_payments(db_session, [_payment("TXN-ROLL-010", amount="150.00")])
+        run_detection(db_session)
+        before = get_summary(db_session)
+
+        ingest_payments(db_session, [_payment("TXN-ROLL-011"), _payment("TXN-ROLL-012")])
+        ingest_settlements(db_session, [_settlement("TXN-ROLL-013")])
+        run_detection(db_session, DetectionMode.INCREMENTAL)
+        after = get_summary(db_session)
+
+        assert after.total_issues == before.total_issues + 3
+        assert after.issues_by_type["ORPHANED_PAYMENT"] == (
+            before.issues_by_type.get("ORPHANED_PAYMENT", 0) + 2
+        )
+        assert after.transactions_with_issues == before.transactions_with_issues + 3
+        assert after == _rebuilt_summary(db_session)
+
+    def test_incremental_run_removes_resolved_issue_from_rollup(self, db_session):
+        ingest_payments(db_session, [_payment("TXN-ROLL-020")])
+        run_detection(db_session)
+        before = get_summary(db_session)
+
+        ingest_vouchers(db_session, [_voucher("TXN-ROLL-020")])
+        run_detection(db_session, DetectionMode.INCREMENTAL)
+        after = get_summary(db_session)
+
+        assert after.total_issues == before.total_issues - 1
+        assert after.transactions_with_issues == before.transactions_with_issues - 1
+        assert after == _rebuilt_summary(db_session)
+
+    def test_ingestion_counts_each_transaction_once_across_sources(self, db_session):
+        before = get_summary(db_session).total_transactions
+
+        ingest_vouchers(db_session, [_voucher("TXN-ROLL-030"), _voucher("TXN-ROLL-031")])
+        ingest_payments(db_session, [_payment("TXN-ROLL-030"), _payment("TXN-ROLL-032")])
+        ingest_settlements(db_session, [_settlement("TXN-ROLL-030")])
+        ingest_vouchers(db_session, [_voucher("TXN-ROLL-031")])
+
+        summary = get_summary(db_session)
+        assert summary.total_transactions == before + 3
+        assert summary == _rebuilt_summary(db_session)
@@ -1,3 +1,11 @@
+from sqlalchemy import event
+
+from app.enums import LookupField
+from app.schemas import PaymentIn
+from app.services.ingestion import ingest_payments
+from app.services.transactions import lookup_transactions
+
+
 def _make_voucher(
     transaction_id="TXN-VIEW-001",
     amount="200.00",
@@ -132,3 +140,88 @@ class TestTransactionView:
         assert response.status_code == 200
         data = response.json()
         assert data["issues"] == []
+
+
+class TestTransactionLookup:
+    def test_returns_views_in_request_order_with_not_found(self, client):
+        _ingest_full_lifecycle(client, "TXN-LOOKUP-001")
+        client.post("/api/v1/ingest/payments", json=[_make_payment("TXN-LOOKUP-002")])
+
+        response = client.post("/api/v1/transactions/lookup", json={
+            "transaction_ids": ["TXN-LOOKUP-002", "TXN-LOOKUP-404", "TXN-LOOKUP-001",
+                                "TXN-LOOKUP-002"],
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["transaction_id"] for item in data["items"]] == [
+            "TXN-LOOKUP-002", "TXN-LOOKUP-001",
+        ]
+        assert [item["status"] for item in data["items"]] == ["orphaned", "complete"]
+        assert data["not_found"] == ["TXN-LOOKUP-404"]
+        assert data["items"][1]["settlement"]["source_system"] == "bank_settlement"
+
+    def test_matches_single_transaction_view(self, client):
+        _ingest_full_lifecycle(client, "TXN-LOOKUP-010")
+        client.post("/api/v1/detection/run")
+
+        single = client.get("/api/v1/transactions/TXN-LOOKUP-010").json()
+        batch = client.post("/api/v1/transactions/lookup", json={
+            "transaction_ids": ["TXN-LOOKUP-010"],
+        }).json()
+
+        assert batch["items"] == [single]
+
+    def test_field_projection_omits_unrequested_parts(self, client):
+        client.post("/api/v1/ingest/payments", json=[_make_payment("TXN-LOOKUP-020")])
+        client.post("/api/v1/detection/run")
+
+        response = client.post("/api/v1/transactions/lookup", json={
+            "transaction_ids": ["TXN-LOOKUP-020"],
+            "fields": ["issues"],
+        })
+
+        item = response.json()["items"][0]
+        assert set(item) == {"transaction_id", "status", "issues"}
+        assert item["status"] == "orphaned"
+        assert item["issues"][0]["issue_type"] == "ORPHANED_PAYMENT"
+
+    def test_query_count_does_not_grow_with_ids(self, db_session):
+        ingest_payments(db_session, [
+            PaymentIn(**_make_payment(f"TXN-LOOKUP-Q{i:03d}")) for i in range(50)
+        ])
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+        try:
+            result = lookup_transactions(db_session, [f"TXN-LOOKUP-Q{i:03d}" for i in range(50)])
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+        assert len(result.items) == 50
+        assert len(statements) == 5
+
+    def test_issue_only_projection_skips_source_tables(self, db_session):
+        ingest_payments(db_session, [PaymentIn(**_make_payment("TXN-LOOKUP-P001"))])
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+        try:
+            result = lookup_transactions(db_session, ["TXN-LOOKUP-P001"], [LookupField.ISSUES])
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+        assert result.items[0].status == "orphaned"
+        assert len(statements) == 2
+        assert "payment_confirmations" not in " ".join(statements)
+
+    def test_rejects_empty_id_list(self, client):
+        response = client.post("/api/v1/transactions/lookup", json={"transaction_ids": []})
+
+        assert response.status_code == 422
@@ -0,0 +1,169 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base, create_db_engine
+from app.models import VoucherRecord
+from app.routers import ingestion as ingestion_router
+from app.schemas import VoucherIn
+from app.services.ingestion import stage_vouchers
+from app.services.write_coordinator import GroupCommitCoordinator, PendingWrite
+
+
+@pytest.fixture
+def coordinator(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ingest_group_commit_window_ms", 200)
+    file_engine = create_db_engine(f"sqlite:///{tmp_path / 'group.db'}")
+    Base.metadata.create_all(bind=file_engine)
+    coordinator = GroupCommitCoordinator(sessionmaker(bind=file_engine))
+    yield coordinator
+    coordinator.stop()
+    file_engine.dispose()
+
+
+def _voucher(transaction_id):
+    return VoucherIn(
+        transaction_id=transaction_id,
+        amount="150.00",
+        currency="MXN",
+        payment_method="OXXO",
+        status="PENDING",
+        source_system="voucher_system",
+        created_at="2026-02-20T10:00:00",
+    )
+
+
+def _count_groups(coordinator, monkeypatch):
+    groups = []
+    commit_group = coordinator._commit_group
+
+    def recording_commit_group(group):
+        groups.append(len(group))
+        commit_group(group)
+
+    monkeypatch.setattr(coordinator, "_commit_group", recording_commit_group)
+    return groups
+
+
+def _submit_concurrently(coordinator, batches):
+    with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+        return list(pool.map(lambda records: coordinator.submit(stage_vouchers, records), batches))
+
+
+class TestGroupCommit:
+    def test_concurrent_writes_share_one_commit(self, coordinator, monkeypatch):
+        groups = _count_groups(coordinator, monkeypatch)
+        coordinator.start()
+
+        results = _submit_concurrently(
+            coordinator, [[_voucher(f"TXN-GROUP-{i:03d}")] for i in range(8)]
+        )
+
+        assert [r.created for r in results] == [1] * 8
+        assert groups == [8]
+        with coordinator.session_factory() as db:
+            assert db.execute(select(func.count(VoucherRecord.id))).scalar() == 8
+
+    def test_group_flushes_early_at_max_rows(self, coordinator, monkeypatch):
+        monkeypatch.setattr(settings, "ingest_group_commit_window_ms", 10_000)
+        monkeypatch.setattr(settings, "ingest_group_commit_max_rows", 3)
+        groups = _count_groups(coordinator, monkeypatch)
+
+        result = coordinator.submit(
+            stage_vouchers, [_voucher(f"TXN-GROUP-MAX-{i}") for i in range(3)]
+        )
+
+        assert result.created == 3
+        assert groups == [1]
+
+    def test_result_is_returned_only_after_commit(self, coordinator):
+        result = coordinator.submit(stage_vouchers, [_voucher("TXN-GROUP-DURABLE")])
+
+        assert result.created == 1
+        with coordinator.session_factory() as db:
+            stored = db.execute(
+                select(VoucherRecord).where(VoucherRecord.transaction_id == "TXN-GROUP-DURABLE")
+            ).scalar_one_or_none()
+        assert stored is not None
+
+    def test_duplicates_across_a_group_are_counted_once(self, coordinator):
+        results = _submit_concurrently(
+            coordinator, [[_voucher("TXN-GROUP-DUP")], [_voucher("TXN-GROUP-DUP")]]
+        )
+
+        assert sorted(r.created for r in results) == [0, 1]
+        assert sorted(r.duplicates for r in results) == [0, 1]
+
+    def test_failing_write_does_not_fail_the_rest_of_the_group(self, coordinator):
+        started = threading.Barrier(2)
+
+        def failing_stage(db, records):
+            raise RuntimeError("bad write")
+
+        def submit(stage, records):
+            started.wait()
+            return coordinator.submit(stage, records)
+
+        coordinator.start()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            good = pool.submit(submit, stage_vouchers, [_voucher("TXN-GROUP-OK")])
+            bad = pool.submit(submit, failing_stage, [_voucher("TXN-GROUP-BAD")])
+
+            assert good.result().created == 1
+            with pytest.raises(RuntimeError, match="bad write"):
+                bad.result()
+
+    def test_stop_flushes_pending_writes(self, coordinator):
+        coordinator.submit(stage_vouchers, [_voucher("TXN-GROUP-STOP")])
+        coordinator.stop()
+
+        with coordinator.session_factory() as db:
+            assert db.execute(select(func.count(VoucherRecord.id))).scalar() == 1
+
+    def test_writes_left_behind_the_stop_sentinel_are_failed(self, coordinator):
+        coordinator.start()
+        coordinator._queue.put(None)
+        stranded = PendingWrite(stage_vouchers, [_voucher("TXN-GROUP-STRANDED")])
+        coordinator._queue.put(stranded)
+
+        coordinator.stop()
+
+        with pytest.raises(RuntimeError, match="stopped"):
+            stranded.future.result(timeout=1)
+
+    def test_submit_after_stop_restarts_the_writer(self, coordinator):
+        coordinator.submit(stage_vouchers, [_voucher("TXN-GROUP-RESTART-1")])
+        coordinator.stop()
+
+        result = coordinator.submit(stage_vouchers, [_voucher("TXN-GROUP-RESTART-2")])
+
+        assert result.created == 1
+
+
+class TestGroupCommitEndpoint:
+    def test_ingest_endpoint_uses_coordinator_when_enabled(self, client, monkeypatch):
+        calls = []
+
+        def fake_submit(stage, records):
+            calls.append((stage, len(records)))
+            return {"received": len(records), "created": 0, "duplicates": 0}
+
+        monkeypatch.setattr(settings, "ingest_group_commit", True)
+        monkeypatch.setattr(ingestion_router.write_coordinator, "submit", fake_submit)
+
+        response = client.post("/api/v1/ingest/vouchers", json=[{
+            "transaction_id": "TXN-GROUP-API",
+            "amount": "150.00",
+            "currency": "MXN",
+            "payment_method": "OXXO",
+            "status": "PENDING",
+            "source_system": "voucher_system",
+            "created_at": "2026-02-20T10:00:00",
+        }])
+
+        assert response.status_code == 201
+        assert calls == [(stage_vouchers, 1)]